@@ -0,0 +1,253 @@
+# detection_evaluation.py
+
+import argparse
+import concurrent.futures
+import json
+import random
+import sys
+
+import numpy as np
+
+import Read_Signal
+from Simulation_Config import SIMULATION_DURATION_S, CAN_SAMPLE_INTERVAL_S, WINDOW_DURATION_S
+from Critical_Health_Monitoring.simulation_runner import BrakingHealthPipeline
+from High_Speed_Monitoring.Simulation_Runner import StabilityPipeline
+from Driver_Alertness_Module.Alertness_Runner import AlertnessPipeline
+
+# --- Ground Truth ---
+# Every monitor reports "ALERT" (any non-normal level) plus one entry per rule.
+# Each entry lists the (start_s, end_s) windows during which it *should* fire;
+# any firing outside them (and outside the clear tail of a detected event) is a
+# false alert.
+ALERT_RULE = "ALERT"
+
+def _scenario_window(scenario_name):
+    for start_time, end_time, name in Read_Signal.SCENARIO_BOUNDARIES:
+        if name == scenario_name:
+            return (start_time, end_time)
+    raise ValueError(f"Unknown scenario: {scenario_name}")
+
+def _merge_windows(windows):
+    """Merges overlapping (start, end) windows into a sorted, disjoint list."""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+_FATIGUE_WINDOW = _scenario_window(Read_Signal.SCENARIO_FATIGUE_LIKE_DRIVING)
+_BRAKING_RULE_WINDOWS = {
+    "LOW_BRAKE_FLUID": [Read_Signal.BRAKE_FLUID_LOW_WINDOW],
+    "MC_PRESSURE_IMPLAUSIBLE": [Read_Signal.MC_PRESSURE_SENSOR_FAULT_WINDOW],
+    "BRAKE_WARNING_LIGHT": [Read_Signal.BRAKE_WARNING_WINDOW],
+    "ABS_WARNING_LIGHT": [Read_Signal.ABS_WARNING_WINDOW],
+    "TIRE_PUNCTURE_WARNING": [Read_Signal.TIRE_PUNCTURE_WINDOW],
+}
+
+GROUND_TRUTH_EVENTS = {
+    "braking": dict(_BRAKING_RULE_WINDOWS, **{
+        ALERT_RULE: _merge_windows(w for windows in _BRAKING_RULE_WINDOWS.values() for w in windows),
+    }),
+    "stability": {
+        ALERT_RULE: [Read_Signal.LOW_FRICTION_WINDOW],
+        "LOW_ROAD_FRICTION": [Read_Signal.LOW_FRICTION_WINDOW],
+        "HIGH_YAW_LOW_STEERING": [],
+        "ASYMMETRIC_WHEEL_SPEEDS": [],
+        "HIGH_LAT_G_LOW_STEERING": [],
+    },
+    "alertness": {
+        ALERT_RULE: [_FATIGUE_WINDOW],
+        "STR_ANGLE_STD": [_FATIGUE_WINDOW],
+        "VSA_LON_G_STD": [_FATIGUE_WINDOW],
+        "VSA_LAT_G_STD": [_FATIGUE_WINDOW],
+        "VSA_YAW_1_STD": [_FATIGUE_WINDOW],
+        "STR_REVERSAL_RATE": [_FATIGUE_WINDOW],
+        "STR_LF_BAND_POWER": [_FATIGUE_WINDOW],
+    },
+}
+
+# Monitor rule keys that are scored under a shared ground-truth entry
+RULE_ALIASES = {
+    "MC_PRESSURE_IMPLAUSIBLE_LOW": "MC_PRESSURE_IMPLAUSIBLE",
+    "MC_PRESSURE_IMPLAUSIBLE_HIGH": "MC_PRESSURE_IMPLAUSIBLE",
+}
+
+
+# --- Virtual-Time Session Replay ---
+def run_session(seed, duration_s=SIMULATION_DURATION_S, sample_interval_s=CAN_SAMPLE_INTERVAL_S,
+                window_duration=WINDOW_DURATION_S):
+    """
+    Runs all three monitor pipelines over one seeded session in virtual time (no sleeping).
+
+    Returns:
+        tuple: (timestamps array, {monitor: {rule: bool array of "rule fired" per sample}})
+    """
+    random.seed(seed)
+    pipelines = [
+        BrakingHealthPipeline(),
+        StabilityPipeline(window_duration=window_duration),
+        AlertnessPipeline(window_duration=window_duration),
+    ]
+
+    timestamps = np.arange(0.0, duration_s, sample_interval_s)
+    fired = {monitor: {rule: np.zeros(timestamps.size, dtype=bool) for rule in rules}
+             for monitor, rules in GROUND_TRUTH_EVENTS.items()}
+
+    for i, current_sim_time in enumerate(timestamps.tolist()):
+        signals = Read_Signal.generate_all_signals(current_sim_time)
+        for pipeline in pipelines:
+            alert_level, _ = pipeline.process(current_sim_time, signals)
+            monitor_fired = fired[pipeline.name]
+            monitor_fired[ALERT_RULE][i] = alert_level != pipeline.normal_level
+            for rule in pipeline.triggered_rules():
+                monitor_fired[RULE_ALIASES.get(rule, rule)][i] = True
+
+    return timestamps, fired
+
+
+# --- Scoring ---
+def score_rule(timestamps, fired, events, sample_interval_s):
+    """
+    Compares one rule's firing series with its ground-truth event windows.
+
+    Time-to-detect is measured from event start to the first firing sample inside
+    the event. Time-to-clear is measured from event end to the first non-firing
+    sample after it. Firing outside events (and outside a detected event's clear
+    tail) counts as false alerts, grouped into episodes of consecutive samples.
+
+    Returns:
+        dict: raw counts and latency lists for one session.
+    """
+    explained = np.zeros(timestamps.size, dtype=bool)
+    in_any_event = np.zeros(timestamps.size, dtype=bool)
+    result = {"events": len(events), "missed": 0, "time_to_detect_s": [], "time_to_clear_s": [], "not_cleared": 0}
+    for start, end in events:
+        in_event = (timestamps >= start) & (timestamps < end)
+        in_any_event |= in_event
+        explained |= in_event
+        hits = np.flatnonzero(in_event & fired)
+        if hits.size == 0:
+            result["missed"] += 1
+            continue
+        result["time_to_detect_s"].append(float(timestamps[hits[0]] - start))
+        tail_start = int(np.searchsorted(timestamps, end, side="left"))
+        cleared = np.flatnonzero(~fired[tail_start:])
+        if cleared.size:
+            tail_end = tail_start + int(cleared[0])
+            result["time_to_clear_s"].append(float(timestamps[tail_end] - end))
+        else:
+            tail_end = timestamps.size
+            result["not_cleared"] += 1
+        explained[tail_start:tail_end] = True
+
+    false_firing = fired & ~explained
+    result["false_alerts"] = int(np.count_nonzero(false_firing[1:] & ~false_firing[:-1]) + bool(false_firing[:1].any()))
+    result["false_alert_samples"] = int(np.count_nonzero(false_firing))
+    result["normal_samples"] = int(np.count_nonzero(~in_any_event))
+    result["normal_hours"] = result["normal_samples"] * sample_interval_s / 3600.0
+    return result
+
+
+def evaluate_session(seed, duration_s=SIMULATION_DURATION_S, sample_interval_s=CAN_SAMPLE_INTERVAL_S,
+                     window_duration=WINDOW_DURATION_S):
+    """Replays one seeded session and scores every monitor rule against the ground truth."""
+    timestamps, fired = run_session(seed, duration_s, sample_interval_s, window_duration)
+    return {monitor: {rule: score_rule(timestamps, fired[monitor][rule], events, sample_interval_s)
+                      for rule, events in rules.items()}
+            for monitor, rules in GROUND_TRUTH_EVENTS.items()}
+
+
+def _distribution(values):
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p90": None, "p99": None, "max": None}
+    values = np.asarray(values)
+    p50, p90, p99 = np.percentile(values, [50, 90, 99])
+    return {"count": int(values.size), "mean": float(values.mean()), "p50": float(p50),
+            "p90": float(p90), "p99": float(p99), "max": float(values.max())}
+
+
+def aggregate_results(session_results):
+    """Combines per-session rule scores into per-monitor, per-rule metrics."""
+    report = {}
+    for monitor, rules in GROUND_TRUTH_EVENTS.items():
+        report[monitor] = {}
+        for rule in rules:
+            parts = [result[monitor][rule] for result in session_results]
+            events = sum(p["events"] for p in parts)
+            missed = sum(p["missed"] for p in parts)
+            false_alerts = sum(p["false_alerts"] for p in parts)
+            normal_hours = sum(p["normal_hours"] for p in parts)
+            normal_samples = sum(p["normal_samples"] for p in parts)
+            report[monitor][rule] = {
+                "events": events,
+                "detected": events - missed,
+                "missed": missed,
+                "missed_event_rate": missed / events if events else None,
+                "time_to_detect_s": _distribution([v for p in parts for v in p["time_to_detect_s"]]),
+                "time_to_clear_s": dict(_distribution([v for p in parts for v in p["time_to_clear_s"]]),
+                                        not_cleared=sum(p["not_cleared"] for p in parts)),
+                "false_alerts": false_alerts,
+                "false_alert_rate_per_hour": false_alerts / normal_hours if normal_hours else None,
+                "false_alert_sample_fraction": (sum(p["false_alert_samples"] for p in parts) / normal_samples
+                                                if normal_samples else None),
+            }
+    return report
+
+
+def run_evaluation(seeds, duration_s=SIMULATION_DURATION_S, sample_interval_s=CAN_SAMPLE_INTERVAL_S,
+                   window_duration=WINDOW_DURATION_S, workers=None):
+    """
+    Evaluates detection latency and accuracy over many seeded sessions.
+
+    Args:
+        seeds (list): One session is replayed per seed.
+        workers (int): Worker processes (None = one per CPU, 1 = run in this process).
+
+    Returns:
+        dict: machine-readable report (settings + per-monitor, per-rule metrics).
+    """
+    seeds = list(seeds)
+    args = ([duration_s] * len(seeds), [sample_interval_s] * len(seeds), [window_duration] * len(seeds))
+    if workers == 1:
+        session_results = list(map(evaluate_session, seeds, *args))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            session_results = list(executor.map(evaluate_session, seeds, *args))
+    return {
+        "settings": {"sessions": len(seeds), "duration_s": duration_s,
+                     "sample_interval_s": sample_interval_s, "window_duration_s": window_duration},
+        "monitors": aggregate_results(session_results),
+    }
+
+
+# --- Command Line ---
+def build_arg_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Measure detection latency and accuracy against scenario ground truth.")
+    parser.add_argument("--sessions", type=int, default=20, help="Number of seeded sessions")
+    parser.add_argument("--first-seed", type=int, default=0, help="Seed of the first session")
+    parser.add_argument("--duration", type=float, default=SIMULATION_DURATION_S, help="Session length (s)")
+    parser.add_argument("--interval", type=float, default=CAN_SAMPLE_INTERVAL_S, help="Sample interval (s)")
+    parser.add_argument("--window", type=float, default=WINDOW_DURATION_S, help="Rolling window duration (s)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--output", default="-", help="JSON report path ('-' for stdout)")
+    return parser
+
+
+def main(args=None):
+    if not isinstance(args, argparse.Namespace):
+        args = build_arg_parser().parse_args(args)
+    seeds = range(args.first_seed, args.first_seed + args.sessions)
+    report = run_evaluation(seeds, args.duration, args.interval, args.window, workers=args.workers)
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
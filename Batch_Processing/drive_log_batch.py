@@ -0,0 +1,300 @@
+# drive_log_batch.py
+#
+# Re-runs the monitors over a directory of recorded drive logs (session files).
+# Files are spread over a process pool, largest first; each worker streams its
+# file in chunks through the micro-batch pipeline (array windows, vectorized
+# features and rules) and returns a per-file alert summary. Every finished
+# summary is appended to a JSON-lines progress file, so an interrupted batch
+# resumes with the files it has not finished. The progress file starts with a
+# fingerprint of the thresholds: after a rule change every file is re-run.
+
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from Read_Signal import SIGNAL_NAMES
+from Simulation_Config import WINDOW_DURATION_S
+from vehicle_logic.runtime import MONITOR_PIPELINES, ALL_MONITORS, resolve_monitor_names
+from High_Speed_Monitoring import Threeholds as stability_thresholds
+from . import vectorized_rules
+from .session_arrays import TIMESTAMP_KEY, iter_session_chunks, list_session_files
+
+DEFAULT_CHUNK_SAMPLES = 65536
+TOP_FILES = 10 # Files with the most alert samples listed per monitor in the report
+LEVEL_NAMES = vectorized_rules.ALERT_LEVEL_NAMES
+
+
+# --- Per-File Processing ---
+def process_log(path, monitor_names="all", window_duration=WINDOW_DURATION_S, chunk_samples=DEFAULT_CHUNK_SAMPLES):
+    """
+    Runs the selected monitors over one drive log.
+
+    Returns:
+        dict: file, samples, duration_s, elapsed_s and per monitor the sample count of
+              every alert level, the number of alert episodes and the first alert time.
+              A file that cannot be read returns {"file", "error"} instead.
+    """
+    from vehicle_logic.microbatch import MicroBatchPipeline
+
+    start = time.perf_counter()
+    pipeline = MicroBatchPipeline(monitor_names, window_duration=window_duration)
+    monitors = {monitor: {"levels": dict.fromkeys(LEVEL_NAMES, 0), "episodes": 0, "first_alert_s": None}
+                for monitor in pipeline.monitors}
+    in_alert = dict.fromkeys(pipeline.monitors, False)
+    samples = 0
+    first_timestamp = last_timestamp = None
+    try:
+        for chunk in iter_session_chunks(path, chunk_samples):
+            timestamps = chunk[TIMESTAMP_KEY]
+            if timestamps.size == 0:
+                continue
+            result = pipeline.evaluate(timestamps, {name: chunk[name] for name in SIGNAL_NAMES})
+            for monitor, levels in result.levels.items():
+                summary = monitors[monitor]
+                for code, count in enumerate(np.bincount(levels, minlength=len(LEVEL_NAMES)).tolist()):
+                    summary["levels"][LEVEL_NAMES[code]] += count
+                alert = levels > 0
+                if alert.any():
+                    if summary["first_alert_s"] is None:
+                        summary["first_alert_s"] = float(timestamps[np.argmax(alert)])
+                    # Episodes start where an alert follows a normal sample (also across chunks)
+                    previous = np.concatenate(([in_alert[monitor]], alert[:-1]))
+                    summary["episodes"] += int(np.count_nonzero(alert & ~previous))
+                in_alert[monitor] = bool(alert[-1])
+            samples += timestamps.size
+            if first_timestamp is None:
+                first_timestamp = float(timestamps[0])
+            last_timestamp = float(timestamps[-1])
+    except Exception as e: # Unreadable, truncated or corrupt file (BadZipFile, EOFError, zlib.error, ...) or missing column
+        return {"file": path, "error": f"{type(e).__name__}: {e}"}
+    return {
+        "file": path, "samples": samples, "elapsed_s": time.perf_counter() - start,
+        "duration_s": (last_timestamp - first_timestamp) if samples else 0.0,
+        "monitors": monitors,
+    }
+
+
+# --- Resumable Progress ---
+def settings_fingerprint(monitor_names, window_duration):
+    """Hash of everything that changes the results (thresholds, feature statistics, window, monitors)."""
+    settings = {
+        "thresholds": vectorized_rules.default_threshold_config(),
+        "statistics": vectorized_rules.std_feature_statistics(),
+        "rule_inputs": stability_thresholds.STABILITY_RULE_INPUT_STATISTICS,
+        "window_duration": window_duration,
+        "monitors": monitor_names,
+    }
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def file_key(path):
+    """Identifies one version of a file: a log rewritten since it was processed is run again."""
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def load_progress(progress_path, fingerprint):
+    """
+    Reads the summaries of a previous (possibly interrupted) batch.
+
+    Returns:
+        list: summaries from the progress file, or [] if it is missing or was written with other settings.
+    """
+    if not os.path.exists(progress_path):
+        return []
+    summaries = []
+    with open(progress_path) as f:
+        lines = f.read().splitlines()
+    if not lines:
+        return []
+    try:
+        header = json.loads(lines[0])
+    except ValueError:
+        header = {}
+    if header.get("fingerprint") != fingerprint:
+        print(f"{progress_path} was written with other thresholds or settings; starting over.")
+        return []
+    for line in lines[1:]:
+        try:
+            summaries.append(json.loads(line))
+        except ValueError: # Last line cut short by the interruption
+            break
+    return summaries
+
+
+class ProgressLog:
+    """Append-only JSON-lines record of finished files (synced after every file)."""
+    def __init__(self, path, fingerprint, summaries):
+        self._file = open(path, "w")
+        self._write({"fingerprint": fingerprint})
+        for summary in summaries: # Rewrite what is kept, dropping a truncated tail
+            self._write(summary)
+
+    def _write(self, record):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def append(self, summary):
+        self._write(summary)
+
+    def close(self):
+        self._file.close()
+
+
+# --- Report ---
+def aggregate_summaries(summaries):
+    """Combines per-file summaries into fleet totals per monitor."""
+    processed = [s for s in summaries if "error" not in s]
+    monitors = {}
+    for summary in processed:
+        for monitor, counts in summary["monitors"].items():
+            total = monitors.setdefault(monitor, {"levels": dict.fromkeys(LEVEL_NAMES, 0), "episodes": 0,
+                                                  "files_with_alerts": 0, "top_files": []})
+            alert_samples = 0
+            for level, count in counts["levels"].items():
+                total["levels"][level] += count
+                if level != LEVEL_NAMES[0]:
+                    alert_samples += count
+            total["episodes"] += counts["episodes"]
+            if alert_samples:
+                total["files_with_alerts"] += 1
+                total["top_files"].append((alert_samples, summary["file"]))
+    for total in monitors.values():
+        total["top_files"] = [{"file": path, "alert_samples": count}
+                              for count, path in sorted(total["top_files"], reverse=True)[:TOP_FILES]]
+    return {
+        "files": len(processed),
+        "failed": [{"file": s["file"], "error": s["error"]} for s in summaries if "error" in s],
+        "samples": sum(s["samples"] for s in processed),
+        "duration_h": sum(s["duration_s"] for s in processed) / 3600.0,
+        "monitors": monitors,
+    }
+
+
+# --- Batch Driver ---
+def run_batch(directory, monitor_names="all", window_duration=WINDOW_DURATION_S, workers=None,
+              chunk_samples=DEFAULT_CHUNK_SAMPLES, progress_path=None, verbose=True):
+    """
+    Processes every session file in a directory, resuming from progress_path if it exists.
+
+    Args:
+        directory (str): Directory of drive logs (.npz/.csv).
+        monitor_names: Monitor name, list of names, or "all".
+        workers (int): Worker processes (None = one per CPU, 1 = run in this process).
+        chunk_samples (int): Samples streamed through the pipeline per step.
+        progress_path (str): JSON-lines progress file (None = not resumable).
+        verbose (bool): Print progress while files complete.
+
+    Returns:
+        dict: report (settings, totals, per-monitor aggregates).
+    """
+    names = resolve_monitor_names(monitor_names)
+    fingerprint = settings_fingerprint(names, window_duration)
+    paths = list_session_files(directory)
+    summaries = load_progress(progress_path, fingerprint) if progress_path else []
+    current_keys = {path: file_key(path) for path in paths}
+    wanted = {tuple(key) for key in current_keys.values()}
+    summaries = [s for s in summaries if tuple(s.get("key", ())) in wanted] # Drop deleted or rewritten files
+    done = {tuple(s["key"]) for s in summaries}
+    pending = sorted((path for path in paths if tuple(current_keys[path]) not in done),
+                     key=lambda path: current_keys[path][1], reverse=True) # Largest first balances the pool
+    if verbose and done:
+        print(f"Resuming: {len(done)} of {len(paths)} files already processed")
+
+    progress = ProgressLog(progress_path, fingerprint, summaries) if progress_path else None
+    start = time.perf_counter()
+    last_print = start
+    new_samples = 0
+
+    def record(summary, path):
+        nonlocal last_print, new_samples
+        summary["key"] = current_keys[path]
+        summaries.append(summary)
+        new_samples += summary.get("samples", 0)
+        if progress is not None:
+            progress.append(summary)
+        now = time.perf_counter()
+        finished = len(summaries)
+        if verbose and (now - last_print >= 1.0 or finished == len(paths)):
+            last_print = now
+            elapsed = now - start
+            remaining = len(paths) - finished
+            rate = (finished - len(done)) / elapsed if elapsed else 0.0
+            eta = f", ETA {remaining / rate:.0f}s" if rate and remaining else ""
+            print(f"[{finished}/{len(paths)}] files, {new_samples / elapsed:.0f} samples/s{eta}")
+
+    try:
+        if workers == 1:
+            for path in pending:
+                record(process_log(path, names, window_duration, chunk_samples), path)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(process_log, path, names, window_duration, chunk_samples): path
+                           for path in pending}
+                try:
+                    for future in concurrent.futures.as_completed(futures):
+                        record(future.result(), futures[future])
+                except BaseException:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise
+    finally:
+        if progress is not None:
+            progress.close()
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "settings": {"directory": directory, "monitors": names, "window_duration_s": window_duration,
+                     "fingerprint": fingerprint},
+        "elapsed_s": elapsed,
+        "samples_per_s": new_samples / elapsed if elapsed else 0.0,
+    }
+    report.update(aggregate_summaries(summaries))
+    return report
+
+
+# --- Command Line ---
+def build_arg_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Re-run the monitors over a directory of recorded drive logs.")
+    parser.add_argument("directory", help="Directory of drive logs (.npz/.csv session files)")
+    parser.add_argument("--monitor", default=ALL_MONITORS, choices=list(MONITOR_PIPELINES) + [ALL_MONITORS],
+                        help="Monitor pipeline(s) to run")
+    parser.add_argument("--window", type=float, default=WINDOW_DURATION_S, help="Rolling window duration (s)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK_SAMPLES, help="Samples per streamed chunk")
+    parser.add_argument("--progress", default=None,
+                        help="Resumable progress file (default: <output>.progress.jsonl; 'none' to disable)")
+    parser.add_argument("--output", default="batch_report.json", help="JSON report path ('-' for stdout)")
+    return parser
+
+
+def main(args=None):
+    if not isinstance(args, argparse.Namespace):
+        args = build_arg_parser().parse_args(args)
+    progress_path = args.progress
+    if progress_path is None:
+        progress_path = "batch_report.progress.jsonl" if args.output == "-" else f"{args.output}.progress.jsonl"
+    elif progress_path == "none":
+        progress_path = None
+
+    report = run_batch(args.directory, args.monitor, args.window, args.workers, args.chunk, progress_path,
+                       verbose=args.output != "-")
+    if args.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"--- {report['files']} files ({report['duration_h']:.1f} h, {report['samples']} samples), "
+              f"{len(report['failed'])} failed, in {report['elapsed_s']:.1f}s -> {args.output} ---")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# ewm_calibration.py
+
+import argparse
+
+import numpy as np
+
+from Simulation_Config import SIMULATION_DURATION_S, CAN_SAMPLE_INTERVAL_S, WINDOW_DURATION_S
+from Signal_Processing.rolling_features import rolling_std
+from Signal_Processing.ewm_statistics import EwmStatistics, matched_time_constant
+from Driver_Alertness_Module import alertness_thresholds
+from . import vectorized_rules
+from .session_arrays import generate_session, load_session, list_session_files
+
+# Fits EWM_STD_SCALES (alertness_thresholds.py): for every STD feature, the factor
+# that maps the exponentially weighted STD onto the exact window STD over the
+# same sessions, so the window-tuned threshold tables can be used in ewm mode.
+
+
+def _feature_tables():
+    """Returns STD feature -> (threshold table, ordered keys giving 1, 2 and 3 points)."""
+    return {feature_name: (getattr(alertness_thresholds, table), keys)
+            for table, (feature_name, keys) in vectorized_rules.ALERTNESS_TABLES.items()
+            if feature_name in vectorized_rules.STD_FEATURE_SIGNALS}
+
+
+def _points(values, table, keys):
+    return sum((values > table[key]).astype(np.int8) for key in keys)
+
+
+def paired_std_features(session, window_duration=WINDOW_DURATION_S):
+    """
+    Computes the exact window STD and the (unscaled) exponentially weighted STD of
+    every STD feature, skipping the first window_duration while the window fills.
+
+    Returns:
+        dict: feature name -> (exact np.ndarray, ewm np.ndarray)
+    """
+    t = session["timestamp"]
+    warm = t - t[0] >= window_duration
+    pairs = {}
+    for feature_name, signal_name in vectorized_rules.STD_FEATURE_SIGNALS.items():
+        exact = rolling_std(session[signal_name], t, window_duration)
+        ewm = EwmStatistics(matched_time_constant(window_duration)).update_many(session[signal_name], t)
+        pairs[feature_name] = (exact[warm], ewm[warm])
+    return pairs
+
+
+def calibrate_ewm_scales(sessions, window_duration=WINDOW_DURATION_S):
+    """
+    Fits one scale per STD feature by least squares through the origin
+    (exact ~= scale * ewm) and measures how often the scaled EWM feature earns
+    the same score points as the exact window STD.
+
+    Returns:
+        dict: feature name -> {"scale", "point_agreement", "correlation", "samples"}
+    """
+    pairs = {feature_name: ([], []) for feature_name in vectorized_rules.STD_FEATURE_SIGNALS}
+    for session in sessions:
+        for feature_name, (exact, ewm) in paired_std_features(session, window_duration).items():
+            pairs[feature_name][0].append(exact)
+            pairs[feature_name][1].append(ewm)
+
+    tables = _feature_tables()
+    report = {}
+    for feature_name, (exact_parts, ewm_parts) in pairs.items():
+        exact = np.concatenate(exact_parts)
+        ewm = np.concatenate(ewm_parts)
+        denominator = float(np.dot(ewm, ewm))
+        scale = float(np.dot(exact, ewm)) / denominator if denominator > 0 else 1.0
+        table, keys = tables[feature_name]
+        agreement = float(np.mean(_points(exact, table, keys) == _points(scale * ewm, table, keys))) if exact.size else 0.0
+        correlation = float(np.corrcoef(exact, ewm)[0, 1]) if exact.size > 1 and exact.std() > 0 and ewm.std() > 0 else 0.0
+        report[feature_name] = {"scale": scale, "point_agreement": agreement, "correlation": correlation,
+                                "samples": int(exact.size)}
+    return report
+
+
+def build_arg_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Fit EWM_STD_SCALES against the exact window STD.")
+    parser.add_argument("--sessions", default=None, help="Directory of recorded sessions (.npz/.csv)")
+    parser.add_argument("--generate", type=int, default=10, metavar="N", help="Number of generated sessions if --sessions is not given")
+    parser.add_argument("--duration", type=float, default=SIMULATION_DURATION_S, help="Generated session length (s)")
+    parser.add_argument("--interval", type=float, default=CAN_SAMPLE_INTERVAL_S, help="Generated sample interval (s)")
+    parser.add_argument("--window", type=float, default=WINDOW_DURATION_S, help="Rolling window duration (s)")
+    return parser
+
+
+def main(args=None):
+    if not isinstance(args, argparse.Namespace):
+        args = build_arg_parser().parse_args(args)
+    if args.sessions:
+        sessions = [load_session(path) for path in list_session_files(args.sessions)]
+    else:
+        sessions = [generate_session(args.duration, args.interval, seed=seed) for seed in range(args.generate)]
+    if not sessions:
+        print("No sessions to calibrate on.")
+        return {}
+
+    report = calibrate_ewm_scales(sessions, args.window)
+    print(f"--- EWM calibration: {len(sessions)} sessions, window {args.window:g}s, "
+          f"time constant {matched_time_constant(args.window):g}s ---")
+    for feature_name, row in report.items():
+        print(f"  {feature_name:14s} scale={row['scale']:.3f}  same points={row['point_agreement']:.1%}  "
+              f"corr={row['correlation']:.3f}  ({row['samples']} samples)")
+    print("EWM_STD_SCALES = {")
+    for feature_name, row in report.items():
+        print(f'    "{feature_name}": {row["scale"]:.3f},')
+    print("}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
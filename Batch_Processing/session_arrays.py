@@ -0,0 +1,136 @@
+# session_arrays.py
+
+import csv
+import os
+import random
+
+import numpy as np
+
+import Read_Signal
+from Read_Signal import SIGNAL_NAMES
+from Simulation_Config import SIMULATION_DURATION_S, CAN_SAMPLE_INTERVAL_S
+from Signal_Processing.signal_encoding import encode_columns, decode_columns, saturated_counts
+
+# A session is a dict of equally long NumPy arrays:
+#   "timestamp" -> sample times in seconds (sorted)
+#   one entry per name in Read_Signal.SIGNAL_NAMES
+TIMESTAMP_KEY = "timestamp"
+SESSION_FILE_EXTENSIONS = (".npz", ".csv")
+
+
+# --- Session Generation ---
+def generate_session(duration_s=SIMULATION_DURATION_S, sample_interval_s=CAN_SAMPLE_INTERVAL_S, seed=None):
+    """
+    Generates a simulated session by sampling every Read_Signal generator on a fixed grid.
+
+    Args:
+        duration_s (float): Session length in seconds.
+        sample_interval_s (float): Time between samples in seconds.
+        seed (int): Seed for the `random` module used by Read_Signal (None = unseeded).
+
+    Returns:
+        dict: session arrays keyed by "timestamp" and signal name.
+    """
+    if seed is not None:
+        random.seed(seed)
+    timestamps = np.arange(0.0, duration_s, sample_interval_s)
+    session = {TIMESTAMP_KEY: timestamps}
+    for name in SIGNAL_NAMES:
+        session[name] = np.empty(timestamps.size)
+    for i, current_sim_time in enumerate(timestamps.tolist()):
+        signals = Read_Signal.generate_all_signals(current_sim_time)
+        for name in SIGNAL_NAMES:
+            session[name][i] = signals[name]
+    return session
+
+
+# --- Session Files ---
+def save_session(path, session, compact=False):
+    """
+    Saves a session to a compressed .npz file (or .csv if the path ends with .csv).
+
+    Args:
+        compact (bool): Store the signals of an .npz file as DBC raw integer codes
+                        (about 4x smaller before compression, quantized to the DBC
+                        resolution). load_session() decodes them transparently.
+                        Values outside a signal's DBC range are saturated and reported.
+    """
+    if path.endswith(".csv"):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow([TIMESTAMP_KEY] + SIGNAL_NAMES)
+            columns = [session[TIMESTAMP_KEY]] + [session[name] for name in SIGNAL_NAMES]
+            writer.writerows(zip(*[column.tolist() for column in columns]))
+    else:
+        if compact:
+            for name, count in saturated_counts(session).items():
+                print(f"save_session: {count} {name} value(s) outside the DBC range saved saturated")
+        np.savez_compressed(path, **(encode_columns(session) if compact else session))
+
+
+def load_session(path):
+    """
+    Loads a recorded session from a .npz or .csv file.
+
+    CSV files must have a header row naming "timestamp" and the DBC signal names.
+    Signals saved as raw codes (save_session(..., compact=True)) are decoded to physical values.
+
+    Returns:
+        dict: session arrays keyed by "timestamp" and signal name.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError(f"Empty session file: {path}")
+            rows = np.array([[float(cell) for cell in row] for row in reader if row], dtype=np.float64)
+        rows = rows.reshape(-1, len(header))
+        return {name: rows[:, i] for i, name in enumerate(header)}
+    with np.load(path) as data:
+        return decode_columns({name: data[name] for name in data.files})
+
+
+def iter_session_chunks(path, chunk_samples):
+    """
+    Yields a recorded session as consecutive session dicts of at most chunk_samples
+    samples. CSV files are parsed chunk by chunk; .npz columns are decompressed
+    whole (the format has no partial reads) and decoded one chunk at a time.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                raise ValueError(f"Empty session file: {path}")
+            rows = []
+            for row in reader:
+                if row:
+                    rows.append(row)
+                if len(rows) == chunk_samples:
+                    block = np.array(rows, dtype=np.float64).reshape(-1, len(header))
+                    yield {name: block[:, i] for i, name in enumerate(header)}
+                    rows = []
+            if rows:
+                block = np.array(rows, dtype=np.float64).reshape(-1, len(header))
+                yield {name: block[:, i] for i, name in enumerate(header)}
+        return
+    with np.load(path) as data:
+        columns = {name: data[name] for name in data.files}
+    count = columns[TIMESTAMP_KEY].size
+    for start in range(0, count, chunk_samples):
+        yield decode_columns({name: values[start:start + chunk_samples] for name, values in columns.items()})
+
+
+def list_session_files(directory):
+    """Returns the sorted paths of all session files in a directory."""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.endswith(SESSION_FILE_EXTENSIONS)
+    )
+
+
+def concatenate_sessions(sessions):
+    """Concatenates per-session arrays key by key (features must be computed per session first)."""
+    keys = sessions[0].keys()
+    return {key: np.concatenate([session[key] for session in sessions]) for key in keys}
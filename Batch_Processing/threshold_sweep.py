@@ -0,0 +1,225 @@
+# threshold_sweep.py
+
+import argparse
+import concurrent.futures
+import csv
+import itertools
+import random
+import time
+
+import numpy as np
+
+from Simulation_Config import SIMULATION_DURATION_S, CAN_SAMPLE_INTERVAL_S, WINDOW_DURATION_S
+from . import vectorized_rules
+from .session_arrays import generate_session, load_session, list_session_files, concatenate_sessions
+
+# --- Sweep Configuration ---
+DEFAULT_CHUNK_SIZE = 64 # Configurations scored together in one vectorized call
+MONITOR_NAMES = ("alertness", "stability", "braking")
+LEVEL_NAMES = vectorized_rules.ALERT_LEVEL_NAMES
+
+
+# --- Configuration Generation ---
+def _check_parameter_names(names, base):
+    unknown = [name for name in names if name not in base]
+    if unknown:
+        raise ValueError(f"Unknown threshold parameter(s): {', '.join(unknown)}")
+
+
+def _is_ordered(config):
+    """True if every threshold table in the config is non-decreasing (as the if/elif chains assume)."""
+    for group in vectorized_rules.ordered_threshold_groups():
+        values = [config[key] for key in group]
+        if any(a > b for a, b in zip(values, values[1:])):
+            return False
+    return True
+
+
+def grid_configs(param_grid, base=None):
+    """
+    Builds the full cartesian grid of threshold configurations.
+
+    Args:
+        param_grid (dict): parameter name -> list of values to try.
+        base (dict): Values for parameters not in the grid (default: current thresholds).
+
+    Returns:
+        list: threshold config dicts (configs with unordered tables are dropped).
+    """
+    base = base or vectorized_rules.default_threshold_config()
+    _check_parameter_names(param_grid, base)
+    names = list(param_grid)
+    configs = []
+    for values in itertools.product(*(param_grid[name] for name in names)):
+        config = dict(base)
+        config.update(zip(names, values))
+        if _is_ordered(config):
+            configs.append(config)
+    return configs
+
+
+def random_configs(param_ranges, count, seed=None, base=None):
+    """
+    Samples threshold configurations uniformly from the given ranges.
+
+    Args:
+        param_ranges (dict): parameter name -> (low, high).
+        count (int): Number of configurations to draw.
+        seed (int): Seed for reproducible sweeps.
+        base (dict): Values for parameters not being sampled.
+
+    Returns:
+        list: threshold config dicts (table values are sorted to stay ordered).
+    """
+    base = base or vectorized_rules.default_threshold_config()
+    _check_parameter_names(param_ranges, base)
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(count):
+        config = dict(base)
+        for name, (low, high) in param_ranges.items():
+            config[name] = rng.uniform(low, high)
+        for group in vectorized_rules.ordered_threshold_groups():
+            for key, value in zip(group, sorted(config[key] for key in group)):
+                config[key] = value
+        configs.append(config)
+    return configs
+
+
+# --- Scoring ---
+def prepare_features(sessions, window_duration=WINDOW_DURATION_S):
+    """Computes features per session (windows must not span sessions) and concatenates them."""
+    return concatenate_sessions([vectorized_rules.compute_features(s, window_duration) for s in sessions])
+
+
+def _level_rates(levels):
+    """Fraction of samples at each level for every config in a (K, N) level array."""
+    counts = np.stack([(levels == code).sum(axis=1) for code in range(len(LEVEL_NAMES))], axis=1)
+    return counts / max(levels.shape[1], 1)
+
+
+def score_configs(features, configs):
+    """
+    Scores a batch of configurations against precomputed features.
+
+    Returns:
+        list: one row dict per config with the thresholds and per-monitor alert rates.
+    """
+    level_arrays = {
+        "alertness": vectorized_rules.alertness_levels(features, configs),
+        "stability": vectorized_rules.stability_levels(features, configs),
+        "braking": vectorized_rules.braking_levels(features, configs),
+    }
+    rows = [dict(config) for config in configs]
+    for monitor, levels in level_arrays.items():
+        rates = _level_rates(levels)
+        alert_rates = (levels > 0).mean(axis=1)
+        for i, row in enumerate(rows):
+            for code, level_name in enumerate(LEVEL_NAMES):
+                row[f"{monitor}_rate_{level_name}"] = float(rates[i, code])
+            row[f"{monitor}_alert_rate"] = float(alert_rates[i])
+    return rows
+
+
+# Features are sent to each worker process once, not once per chunk
+_worker_features = None
+
+def _init_worker(features):
+    global _worker_features
+    _worker_features = features
+
+def _score_chunk(configs):
+    return score_configs(_worker_features, configs)
+
+
+def run_sweep(configs, features, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Evaluates every configuration, spreading chunks of configurations across a process pool.
+
+    Args:
+        configs (list): Threshold config dicts.
+        features (dict): Output of prepare_features().
+        workers (int): Worker processes (None = one per CPU, 1 = run in this process).
+        chunk_size (int): Configurations per vectorized call.
+
+    Returns:
+        list: result rows, in the same order as configs.
+    """
+    chunks = [configs[i:i + chunk_size] for i in range(0, len(configs), chunk_size)]
+    if workers == 1:
+        return [row for chunk in chunks for row in score_configs(features, chunk)]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(features,)) as executor:
+        return [row for rows in executor.map(_score_chunk, chunks) for row in rows]
+
+
+def write_sweep_report(rows, path):
+    """Writes the sweep results as CSV (one row per configuration)."""
+    if not rows:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+# --- Command Line ---
+def _parse_param(text, as_range):
+    """Parses NAME=v1,v2,... (grid) or NAME=low:high (random)."""
+    name, _, values = text.partition("=")
+    if as_range:
+        low, high = values.split(":")
+        return name, (float(low), float(high))
+    return name, [float(v) for v in values.split(",")]
+
+
+def build_arg_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Sweep monitor thresholds over recorded or generated sessions.")
+    parser.add_argument("--param", action="append", default=[],
+                        help="NAME=v1,v2,... for a grid sweep, or NAME=low:high with --random")
+    parser.add_argument("--random", type=int, default=0, metavar="N", help="Draw N random configurations instead of a grid")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for random configurations")
+    parser.add_argument("--sessions", default=None, help="Directory of recorded sessions (.npz/.csv)")
+    parser.add_argument("--generate", type=int, default=10, metavar="N", help="Number of generated sessions if --sessions is not given")
+    parser.add_argument("--duration", type=float, default=SIMULATION_DURATION_S, help="Generated session length (s)")
+    parser.add_argument("--interval", type=float, default=CAN_SAMPLE_INTERVAL_S, help="Generated sample interval (s)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--output", default="threshold_sweep.csv", help="CSV report path")
+    return parser
+
+
+def main(args=None):
+    if not isinstance(args, argparse.Namespace):
+        args = build_arg_parser().parse_args(args)
+    params = dict(_parse_param(p, as_range=bool(args.random)) for p in args.param)
+    if args.random:
+        configs = random_configs(params, args.random, seed=args.seed)
+    else:
+        configs = grid_configs(params)
+
+    if args.sessions:
+        sessions = [load_session(path) for path in list_session_files(args.sessions)]
+    else:
+        sessions = [generate_session(args.duration, args.interval, seed=seed) for seed in range(args.generate)]
+    if not sessions:
+        print("No sessions to evaluate.")
+        return []
+
+    start = time.perf_counter()
+    features = prepare_features(sessions)
+    rows = run_sweep(configs, features, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    write_sweep_report(rows, args.output)
+
+    print(f"Evaluated {len(rows)} configurations x {features['timestamp'].size} samples "
+          f"from {len(sessions)} sessions in {elapsed:.1f}s -> {args.output}")
+    for monitor in MONITOR_NAMES:
+        key = f"{monitor}_alert_rate"
+        if rows:
+            rates = [row[key] for row in rows]
+            print(f"  {monitor:9s} alert rate: min={min(rates):.3f} max={max(rates):.3f}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
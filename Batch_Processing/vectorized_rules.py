@@ -0,0 +1,292 @@
+# vectorized_rules.py
+
+import numpy as np
+
+from Simulation_Config import WINDOW_DURATION_S
+from Signal_Processing.rolling_features import rolling_std
+from Signal_Processing.rolling_quantiles import RollingQuantiles, window_statistic
+from Driver_Alertness_Module import alertness_thresholds
+from Driver_Alertness_Module.steering_features import SteeringFrequencyFeatures
+from High_Speed_Monitoring import Threeholds as stability_thresholds
+from Critical_Health_Monitoring import Threeholds as braking_thresholds
+
+# Array versions of DriverAlertnessScore, VehicleStabilityMonitor.check_stability and
+# HealthMonitor.check_braking_health. Every rule is evaluated for K threshold
+# configurations x N samples in one call, so results are (K, N) arrays.
+#
+# A threshold configuration is a flat dict. Table entries use "TABLE.KEY" names
+# (e.g. "STR_ANGLE_STD_THRESHOLDS.NORMAL_MAX"), scalar thresholds use their
+# constant name (e.g. "HIGH_YAW_THRESHOLD_DEGS").
+
+# --- Alert Level Codes (index = severity) ---
+ALERT_LEVEL_CODES = {
+    stability_thresholds.ALERT_LEVEL_NONE: 0,
+    stability_thresholds.ALERT_LEVEL_LOW: 1,
+    stability_thresholds.ALERT_LEVEL_MODERATE: 2,
+    stability_thresholds.ALERT_LEVEL_HIGH: 3,
+}
+ALERT_LEVEL_NAMES = tuple(ALERT_LEVEL_CODES) # Level code -> level name
+
+# --- Tunable Thresholds ---
+# Threshold table name -> (feature, ordered keys giving 1, 2 and 3 points)
+ALERTNESS_TABLES = {
+    "STR_ANGLE_STD_THRESHOLDS": ("str_angle_std", ("NORMAL_MAX", "MODERATE_FATIGUE_START", "SEVERE_FATIGUE_START")),
+    "VSA_LON_G_STD_THRESHOLDS": ("lon_g_std", ("NORMAL_MAX", "MODERATE_START", "SEVERE_START")),
+    "VSA_LAT_G_STD_THRESHOLDS": ("lat_g_std", ("NORMAL_MAX", "MODERATE_START", "SEVERE_START")),
+    "VSA_YAW_1_STD_THRESHOLDS": ("yaw_1_std", ("NORMAL_MAX", "MODERATE_START", "SEVERE_START")),
+    "STR_REVERSAL_RATE_THRESHOLDS": ("str_reversal_rate", ("NORMAL_MAX", "MODERATE_START", "SEVERE_START")),
+    "STR_LF_POWER_THRESHOLDS": ("str_lf_power_ratio", ("NORMAL_MAX", "MODERATE_START", "SEVERE_START")),
+}
+ALERT_SCORE_KEYS = ("MILD_START", "MODERATE_START", "CRITICAL_START")
+
+STABILITY_PARAMETERS = (
+    "HIGH_SPEED_THRESHOLD_KMH",
+    "MIN_STEERING_FOR_TURN_DEG",
+    "HIGH_YAW_THRESHOLD_DEGS",
+    "HIGH_LAT_G_THRESHOLD_MS2",
+    "WHEEL_SLIP_THRESHOLD_KMH",
+    "SMALL_STEERING_WINDOW_DEG",
+    "LOW_FRICTION_THRESHOLD_MYU",
+)
+
+BRAKING_PARAMETERS = (
+    "MIN_MASTER_CYLINDER_PRESSURE_ACTIVE_BRAKE_KPA",
+    "MAX_MASTER_CYLINDER_PRESSURE_NO_BRAKE_KPA",
+)
+
+
+def default_threshold_config():
+    """Returns the thresholds currently configured in the monitor packages as a flat dict."""
+    config = {}
+    for table, (_, keys) in ALERTNESS_TABLES.items():
+        for key in keys:
+            config[f"{table}.{key}"] = getattr(alertness_thresholds, table)[key]
+    for key in ALERT_SCORE_KEYS:
+        config[f"ALERT_SCORE_THRESHOLDS.{key}"] = alertness_thresholds.ALERT_SCORE_THRESHOLDS[key]
+    for name in STABILITY_PARAMETERS:
+        config[name] = getattr(stability_thresholds, name)
+    for name in BRAKING_PARAMETERS:
+        config[name] = getattr(braking_thresholds, name)
+    return config
+
+
+def ordered_threshold_groups():
+    """Returns the groups of config keys whose values must be non-decreasing."""
+    groups = [[f"{table}.{key}" for key in keys] for table, (_, keys) in ALERTNESS_TABLES.items()]
+    groups.append([f"ALERT_SCORE_THRESHOLDS.{key}" for key in ALERT_SCORE_KEYS])
+    return groups
+
+
+# --- Feature Extraction ---
+def instantaneous_features(signals):
+    """
+    Computes the per-sample (window-free) features used by the stability and braking rules.
+
+    Args:
+        signals (dict): Arrays keyed by DBC signal name (a session or a micro-batch).
+
+    Returns:
+        dict: feature name -> np.ndarray (one value per sample)
+    """
+    fl = signals["VSA_ABS_FL_WHEEL_SPEED_255"]
+    fr = signals["VSA_ABS_FR_WHEEL_SPEED_255"]
+    rl = signals["VSA_ABS_RL_WHEEL_SPEED_255"]
+    rr = signals["VSA_ABS_RR_WHEEL_SPEED_255"]
+    return {
+        # Vehicle stability (instantaneous)
+        "vehicle_speed": (fl + fr + rl + rr) / 4.0,
+        "abs_str_angle": np.abs(signals["STR_ANGLE"]),
+        "abs_yaw_1": np.abs(signals["VSA_YAW_1"]),
+        "abs_lat_g": np.abs(signals["VSA_LAT_G"]),
+        "max_axle_speed_diff": np.maximum(np.abs(fl - fr), np.abs(rl - rr)),
+        "myu_value": signals["VSA_MAEPS_MYU_VALUE"],
+        # Braking health (status signals)
+        "brake_fluid": signals["METER_SW_STATUS_BRAKE_FLUID"],
+        "brake_pedal": signals["ENG_SW_STATUS_BRAKE_NO"],
+        "mc_pressure": signals["VSA_MASTER_CYLINDER_PRESSURE"],
+        "warn_brake": signals["VSA_WARN_STATUS_BRAKE"],
+        "warn_abs": signals["VSA_WARN_STATUS_ABS"],
+        "warn_puncture": signals["VSA_WARN_STATUS_PUNCTURE"],
+    }
+
+
+# Rolling STD feature -> DBC signal it is computed from
+STD_FEATURE_SIGNALS = {
+    "str_angle_std": "STR_ANGLE",
+    "lon_g_std": "VSA_LON_G",
+    "lat_g_std": "VSA_LAT_G",
+    "yaw_1_std": "VSA_YAW_1",
+}
+
+
+# Stability rule input -> (DBC signal, compared as an absolute value)
+STABILITY_INPUT_FEATURES = {
+    "abs_str_angle": ("STR_ANGLE", True),
+    "abs_yaw_1": ("VSA_YAW_1", True),
+    "abs_lat_g": ("VSA_LAT_G", True),
+    "myu_value": ("VSA_MAEPS_MYU_VALUE", False),
+}
+
+
+def std_feature_statistics():
+    """Returns STD feature -> window statistic its threshold table selects ("std" unless it sets "STATISTIC")."""
+    return {feature_name: window_statistic(getattr(alertness_thresholds, table))
+            for table, (feature_name, _) in ALERTNESS_TABLES.items() if feature_name in STD_FEATURE_SIGNALS}
+
+
+def rule_input_trackers():
+    """
+    Returns a RollingQuantiles for every stability rule input that
+    STABILITY_RULE_INPUT_STATISTICS does not take from the current sample.
+
+    Returns:
+        dict: feature name -> RollingQuantiles
+    """
+    trackers = {}
+    for feature_name, (signal_name, _) in STABILITY_INPUT_FEATURES.items():
+        statistic = stability_thresholds.STABILITY_RULE_INPUT_STATISTICS.get(signal_name, "instant")
+        if statistic != "instant":
+            trackers[feature_name] = RollingQuantiles(stability_thresholds.STABILITY_ROBUST_WINDOW_S, statistic)
+    return trackers
+
+
+def apply_rule_input_trackers(features, signals, timestamps, trackers):
+    """Replaces instantaneous stability inputs with their rolling statistics (trackers from rule_input_trackers())."""
+    for feature_name, tracker in trackers.items():
+        signal_name, absolute = STABILITY_INPUT_FEATURES[feature_name]
+        values = tracker.extend(signals[signal_name], timestamps)
+        features[feature_name] = np.abs(values) if absolute else values
+
+
+def compute_features(session, window_duration=WINDOW_DURATION_S):
+    """
+    Computes every feature the three monitors use, for all samples of one session.
+
+    Args:
+        session (dict): Session arrays (see session_arrays.py).
+        window_duration (float): Rolling window duration for the STD features.
+
+    Returns:
+        dict: feature name -> np.ndarray (one value per sample)
+    """
+    t = session["timestamp"]
+    features = {"timestamp": t}
+    # Driver alertness (rolling STDs, or the robust statistics the threshold tables select)
+    statistics = std_feature_statistics()
+    for feature_name, signal_name in STD_FEATURE_SIGNALS.items():
+        if statistics[feature_name] == "std":
+            features[feature_name] = rolling_std(session[signal_name], t, window_duration)
+        else:
+            features[feature_name] = RollingQuantiles(window_duration, statistics[feature_name]).extend(session[signal_name], t)
+    # Steering frequency features are sequential by nature: run the incremental trackers
+    features["str_reversal_rate"], features["str_lf_power_ratio"] = \
+        SteeringFrequencyFeatures(window_duration).update_many(session["STR_ANGLE"], t)
+    features.update(instantaneous_features(session))
+    apply_rule_input_trackers(features, session, t, rule_input_trackers())
+    return features
+
+
+def _column(configs, key):
+    """Returns one threshold for all configs as a (K, 1) array that broadcasts over samples."""
+    return np.array([config[key] for config in configs], dtype=np.float64)[:, None]
+
+
+# --- Driver Alertness ---
+def alertness_rule_points(features, configs):
+    """
+    Returns the score contribution (0-3 points) of each STD feature.
+
+    Returns:
+        dict: threshold table name -> (K, N) int8 points
+    """
+    points = {}
+    for table, (feature_name, keys) in ALERTNESS_TABLES.items():
+        feature = features[feature_name][None, :]
+        table_points = np.zeros((len(configs), feature.shape[1]), dtype=np.int8)
+        for key in keys:
+            table_points += feature > _column(configs, f"{table}.{key}")
+        points[table] = table_points
+    return points
+
+
+def alertness_levels(features, configs):
+    """Returns the (K, N) alert level (0-3) that DriverAlertnessScore.get_alert_level() would give."""
+    score = sum(alertness_rule_points(features, configs).values())
+    levels = np.zeros(score.shape, dtype=np.int8)
+    for key in ALERT_SCORE_KEYS:
+        levels += score >= _column(configs, f"ALERT_SCORE_THRESHOLDS.{key}")
+    return levels
+
+
+# --- Vehicle Stability ---
+def stability_rule_triggers(features, configs):
+    """
+    Evaluates each VehicleStabilityMonitor rule.
+
+    Returns:
+        dict: VEHICLE_STABILITY_DETAIL_DESCRIPTIONS key -> (K, N) bool
+    """
+    abs_str_angle = features["abs_str_angle"][None, :]
+    abs_yaw_1 = features["abs_yaw_1"][None, :]
+    active = features["vehicle_speed"][None, :] >= _column(configs, "HIGH_SPEED_THRESHOLD_KMH")
+    high_yaw = _column(configs, "HIGH_YAW_THRESHOLD_DEGS")
+    return {
+        "LOW_ROAD_FRICTION": active & (features["myu_value"][None, :] < _column(configs, "LOW_FRICTION_THRESHOLD_MYU")),
+        "HIGH_YAW_LOW_STEERING": active & (abs_yaw_1 > high_yaw)
+                                 & (abs_str_angle < _column(configs, "MIN_STEERING_FOR_TURN_DEG")),
+        "ASYMMETRIC_WHEEL_SPEEDS": active & (features["max_axle_speed_diff"][None, :] > _column(configs, "WHEEL_SLIP_THRESHOLD_KMH")),
+        "HIGH_LAT_G_LOW_STEERING": active & (features["abs_lat_g"][None, :] > _column(configs, "HIGH_LAT_G_THRESHOLD_MS2"))
+                                   & (abs_str_angle < _column(configs, "SMALL_STEERING_WINDOW_DEG"))
+                                   & (abs_yaw_1 < high_yaw * 0.5),
+    }
+
+
+def stability_levels(features, configs, triggers=None):
+    """Returns the (K, N) alert level code that check_stability() would give."""
+    if triggers is None:
+        triggers = stability_rule_triggers(features, configs)
+    moderate = triggers["ASYMMETRIC_WHEEL_SPEEDS"] | triggers["HIGH_LAT_G_LOW_STEERING"]
+    levels = np.where(triggers["LOW_ROAD_FRICTION"], 1, 0)
+    levels = np.where(moderate, 2, levels)
+    levels = np.where(triggers["HIGH_YAW_LOW_STEERING"], 3, levels)
+    return levels.astype(np.int8)
+
+
+# --- Braking Health ---
+def braking_rule_triggers(features, configs):
+    """
+    Evaluates each HealthMonitor rule.
+
+    Returns:
+        dict: BRAKING_HEALTH_DETAIL_DESCRIPTIONS key -> (K, N) bool
+    """
+    shape = (len(configs), features["mc_pressure"].size)
+    pedal_pressed = features["brake_pedal"][None, :] == 1
+    mc_pressure = features["mc_pressure"][None, :]
+
+    def status(feature_name, active_value):
+        return np.broadcast_to(features[feature_name][None, :] == active_value, shape)
+
+    return {
+        "LOW_BRAKE_FLUID": status("brake_fluid", braking_thresholds.LOW_BRAKE_FLUID_STATUS_FAULT),
+        "MC_PRESSURE_IMPLAUSIBLE_LOW": pedal_pressed & (mc_pressure < _column(configs, "MIN_MASTER_CYLINDER_PRESSURE_ACTIVE_BRAKE_KPA")),
+        "MC_PRESSURE_IMPLAUSIBLE_HIGH": ~pedal_pressed & (mc_pressure > _column(configs, "MAX_MASTER_CYLINDER_PRESSURE_NO_BRAKE_KPA")),
+        "BRAKE_WARNING_LIGHT": status("warn_brake", braking_thresholds.WARN_STATUS_ACTIVE),
+        "ABS_WARNING_LIGHT": status("warn_abs", braking_thresholds.WARN_STATUS_ACTIVE),
+        "TIRE_PUNCTURE_WARNING": status("warn_puncture", braking_thresholds.PUNCTURE_WARN_ACTIVE),
+    }
+
+
+def braking_levels(features, configs, triggers=None):
+    """Returns the (K, N) alert level code that check_braking_health() would give."""
+    if triggers is None:
+        triggers = braking_rule_triggers(features, configs)
+    # The first triggered rule (in HealthMonitor order) decides the level
+    conditions = [
+        triggers["LOW_BRAKE_FLUID"],
+        triggers["MC_PRESSURE_IMPLAUSIBLE_LOW"] | triggers["MC_PRESSURE_IMPLAUSIBLE_HIGH"],
+        triggers["BRAKE_WARNING_LIGHT"],
+        triggers["ABS_WARNING_LIGHT"],
+        triggers["TIRE_PUNCTURE_WARNING"],
+    ]
+    return np.select(conditions, [3, 2, 3, 3, 2], default=0).astype(np.int8)
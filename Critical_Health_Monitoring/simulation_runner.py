@@ -1,92 +1,138 @@
-import collections
-import time
-import Read_Signal 
+import Read_Signal
 from Simulation_Config import *
+from Simulation_Clock import RealTimeClock
 from serial_logger import SerialLogger
-from .health_monitor import HealthMonitor
+from .health_monitor import HealthMonitor, IncrementalHealthMonitor
 from .Threeholds import *
-master_pressure_window = collections.deque()
-caliper_fr_pressure_window = collections.deque() # Still generated by Read_Signal (but not used by monitor)
-caliper_fl_pressure_window = collections.deque() # Still generated by Read_Signal (but not used by monitor)
 
 
+# --- Per-Tick Pipeline (signal intake -> rules -> output) ---
+class BrakingHealthPipeline:
+    """
+    Runs the braking health rules for one tick at a time.
+    Used by run_simulation() below and by the vehicle_logic runtime, which can
+    drive several monitor pipelines from one loop.
+    """
+    name = "braking"
+    normal_level = ALERT_LEVEL_NONE
+    sketch_features = ("mc_pressure",) # last_features keys worth a fleet-wide distribution
+
+    def __init__(self, incremental=True):
+        # Initialize the braking health monitor. The incremental monitor gives the same
+        # results and only re-runs rules whose inputs changed (HealthMonitor re-runs all).
+        self.monitor = IncrementalHealthMonitor() if incremental else HealthMonitor()
+        self._check_signals = self.monitor.check_signals # Bound once: process() runs every tick
+        self.last_features = {"mc_pressure": 0.0} # Features of the last tick (for sketches), updated in place
+
+    def read_signals(self, current_sim_time):
+        """
+        Generates simulated CAN signals using Read_Signal.py functions.
+        Only generating the strictly defined signals relevant to braking health.
+
+        Returns:
+            dict: DBC signal name -> value
+        """
+        simulated_eng_sw_status_brake_no = Read_Signal.generate_simulated_eng_sw_status_brake_no(current_sim_time)
+        return {
+            "METER_SW_STATUS_BRAKE_FLUID": Read_Signal.generate_simulated_meter_sw_status_brake_fluid(current_sim_time),
+            "ENG_SW_STATUS_BRAKE_NO": simulated_eng_sw_status_brake_no,
+            "VSA_MASTER_CYLINDER_PRESSURE": Read_Signal.generate_simulated_vsa_master_cylinder_pressure(current_sim_time, simulated_eng_sw_status_brake_no),
+            "VSA_WARN_STATUS_BRAKE": Read_Signal.generate_simulated_vsa_warn_status_brake(current_sim_time),
+            "VSA_WARN_STATUS_ABS": Read_Signal.generate_simulated_vsa_warn_status_abs(current_sim_time),
+            "VSA_WARN_STATUS_PUNCTURE": Read_Signal.generate_simulated_vsa_warn_status_puncture(current_sim_time),
+        }
+
+    def process(self, current_sim_time, signals):
+        """
+        Applies the braking health monitoring rules to one set of signals.
+
+        Returns:
+            tuple: (alert_level, alert_description)
+        """
+        self.last_features["mc_pressure"] = signals["VSA_MASTER_CYLINDER_PRESSURE"]
+        return self._check_signals(current_sim_time, signals)
+
+    def triggered_rules(self):
+        """Returns the detail keys of the rules triggered by the last process() call."""
+        return self.monitor.last_triggered_rules
+
+    # --- Checkpointing (see vehicle_logic/checkpoint.py) ---
+    # The braking rules keep no history: the incremental monitor's cache refills on the first tick.
+    def snapshot_state(self):
+        return {"last_triggered_rules": list(self.monitor.last_triggered_rules)}
+
+    def restore_state(self, state, current_sim_time):
+        self.monitor.last_triggered_rules = list(state["last_triggered_rules"])
+
+    def alert_message(self, alert_level, alert_description):
+        """Returns the serial alert message for this result, or None if nothing should be sent."""
+        if alert_level != ALERT_LEVEL_NONE:
+            return f"ALERT: {alert_level} - {alert_description}" # Newline added by log_alert
+        return None
+
+    def print_status(self, current_sim_time, signals, alert_level, alert_description):
+        """Prints the simulation status for one tick."""
+        print(f"Time: {current_sim_time:0.1f}s")
+        print(f"  --- Braking System Health ---")
+        print(f"  Brake Fluid: {'LOW' if signals['METER_SW_STATUS_BRAKE_FLUID'] else 'Normal'} | "
+              f"Brake Pedal: {'PRESSED' if signals['ENG_SW_STATUS_BRAKE_NO'] else 'RELEASED'}")
+        print(f"  Master Cylinder Pressure: {signals['VSA_MASTER_CYLINDER_PRESSURE']:7.1f} kPa") # Removed MC fail status print
+        print(f"  Warnings: BRAKE={'Active' if signals['VSA_WARN_STATUS_BRAKE'] else 'Inactive'}, "
+              f"ABS={'Active' if signals['VSA_WARN_STATUS_ABS'] else 'Inactive'}, "
+              f"PUNCTURE={'Active' if signals['VSA_WARN_STATUS_PUNCTURE'] else 'Inactive'}") # Removed ABS_MIL
+        print(f"  Braking Health Alert: {alert_level} | Description: {alert_description}\n")
+
 
 # --- Encapsulated Simulation Logic ---
-def run_simulation():
+def run_simulation(clock=None, duration_s=SIMULATION_DURATION_S, sample_interval_s=CAN_SAMPLE_INTERVAL_S,
+                   serial_port_name='COM4', baud_rate=9600):
     """
     Runs the braking health detection simulation, focusing on the strictly defined signals.
     This function simulates real-time data reception and processing,
     with processing occurring every CAN_SAMPLE_INTERVAL_S.
+
+    Args:
+        clock: Simulation_Clock clock pacing the loop (default: RealTimeClock).
+        duration_s (float): Total simulated time in seconds.
+        sample_interval_s (float): Time between CAN samples in seconds.
+        serial_port_name (str): Serial port for alerts (e.g. 'COM1' on Windows, '/dev/ttyUSB0' on Linux).
+        baud_rate (int): Must match the receiving device.
     """
-    print(f"--- Simulating Braking System Health Monitoring for {SIMULATION_DURATION_S}s ---")
-    print(f"CAN data simulated to arrive every {CAN_SAMPLE_INTERVAL_S}s.")
+    clock = clock or RealTimeClock()
+    print(f"--- Simulating Braking System Health Monitoring for {duration_s}s ---")
+    print(f"CAN data simulated to arrive every {sample_interval_s}s.")
 
     print(f"Simulated signals generated from module: {Read_Signal.__name__}\n")
 
-    # Initialize the braking health monitor
-    braking_health_monitor = HealthMonitor()
-    
-        # --- Serial Port Configuration ---
-    # IMPORTANT: Replace 'COMx' with your actual serial port (e.g., 'COM1' on Windows, '/dev/ttyUSB0' on Linux)
-    # IMPORTANT: Ensure the baudrate matches your receiving device.
-    serial_port_name = 'COM4'  # <--- CHANGE THIS TO YOUR SERIAL PORT
-    baud_rate = 9600          # <--- CHANGE THIS TO YOUR BAUD RATE
-    
+    pipeline = BrakingHealthPipeline()
+
     # Initialize the SerialLogger
     serial_logger = SerialLogger(serial_port_name, baud_rate)
-    
-    # We will use a simple counter for simulation time, as time.sleep paces the loop
-    current_sim_time = 0.0
 
-    while current_sim_time < SIMULATION_DURATION_S:
-        # --- Generate simulated CAN signals using YOUR Read_Signal.py functions ---
-        # Only generating the strictly defined signals relevant to braking health
-        simulated_meter_sw_status_brake_fluid = Read_Signal.generate_simulated_meter_sw_status_brake_fluid(current_sim_time)
-        simulated_eng_sw_status_brake_no = Read_Signal.generate_simulated_eng_sw_status_brake_no(current_sim_time)
-        simulated_vsa_master_cylinder_pressure = Read_Signal.generate_simulated_vsa_master_cylinder_pressure(current_sim_time, simulated_eng_sw_status_brake_no)
-        
-      
-        
-        simulated_vsa_warn_status_brake = Read_Signal.generate_simulated_vsa_warn_status_brake(current_sim_time)
-        simulated_vsa_warn_status_abs = Read_Signal.generate_simulated_vsa_warn_status_abs(current_sim_time)
-        simulated_vsa_warn_status_puncture = Read_Signal.generate_simulated_vsa_warn_status_puncture(current_sim_time)
+    # We will use a simple counter for simulation time, as the clock paces the loop
+    current_sim_time = 0.0
 
+    while current_sim_time < duration_s:
+        signals = pipeline.read_signals(current_sim_time)
 
-    
         # --- Apply Braking Health Monitoring Rules ---
-        braking_alert_level, braking_alert_description = braking_health_monitor.check_braking_health(
-            current_sim_time,
-            simulated_meter_sw_status_brake_fluid,
-            simulated_eng_sw_status_brake_no,
-            simulated_vsa_master_cylinder_pressure,
-            simulated_vsa_warn_status_brake,
-            simulated_vsa_warn_status_abs,
-            simulated_vsa_warn_status_puncture
-        )
+        braking_alert_level, braking_alert_description = pipeline.process(current_sim_time, signals)
 
         # --- Print Simulation Status ---
-        print(f"Time: {current_sim_time:0.1f}s")
-        print(f"  --- Braking System Health ---")
-        print(f"  Brake Fluid: {'LOW' if simulated_meter_sw_status_brake_fluid else 'Normal'} | "
-              f"Brake Pedal: {'PRESSED' if simulated_eng_sw_status_brake_no else 'RELEASED'}")
-        print(f"  Master Cylinder Pressure: {simulated_vsa_master_cylinder_pressure:7.1f} kPa") # Removed MC fail status print
-        # Print caliper pressures for context, even if not directly used by monitor rules
-        
-        print(f"  Warnings: BRAKE={'Active' if simulated_vsa_warn_status_brake else 'Inactive'}, ABS={'Active' if simulated_vsa_warn_status_abs else 'Inactive'}, PUNCTURE={'Active' if simulated_vsa_warn_status_puncture else 'Inactive'}") # Removed ABS_MIL
-        print(f"  Braking Health Alert: {braking_alert_level} | Description: {braking_alert_description}\n")
-
-                # --- Serial Output for Alerts ---
-        if serial_logger.is_active() and braking_alert_level != ALERT_LEVEL_NONE:
-            message = f"ALERT: {braking_alert_level} - {braking_alert_description}" # Newline added by log_alert
+        pipeline.print_status(current_sim_time, signals, braking_alert_level, braking_alert_description)
+
+        # --- Serial Output for Alerts ---
+        message = pipeline.alert_message(braking_alert_level, braking_alert_description)
+        if serial_logger.is_active() and message:
             serial_logger.log_alert(message)
 
         # Advance simulation time for the next iteration
-        current_sim_time += CAN_SAMPLE_INTERVAL_S
-        
+        current_sim_time += sample_interval_s
+
         # Pause for the specified interval to simulate real-time data arrival
-        time.sleep(CAN_SAMPLE_INTERVAL_S)
+        clock.sleep(sample_interval_s)
 
     print("\n--- Simulation Ended ---")
 
-        # --- Close Serial Port ---
+    # --- Close Serial Port ---
     serial_logger.close()
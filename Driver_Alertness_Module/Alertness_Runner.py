@@ -1,21 +1,19 @@
 # simulation_runner.py
 
 import collections
-import time
-import numpy as np # For STD calculatio
 
 from .Driver_Alertness import DriverAlertnessScore, ALERT_LEVEL_DESCRIPTIONS
+from .steering_features import SteeringFrequencyFeatures
+from .alertness_thresholds import STR_ANGLE_STD_THRESHOLDS, VSA_LON_G_STD_THRESHOLDS, VSA_LAT_G_STD_THRESHOLDS, VSA_YAW_1_STD_THRESHOLDS
+from .alertness_thresholds import EWM_STD_SCALES
+from Signal_Processing.window_state import snapshot_window, restore_window
+from Signal_Processing.rolling_quantiles import RollingQuantiles, window_statistic
+from Signal_Processing.ewm_statistics import EwmStatistics, FEATURE_MODES, matched_time_constant
 from Read_Signal import generate_simulated_str_angle, generate_simulated_vsa_lon_g, generate_simulated_vsa_lat_g, generate_simulated_vsa_yaw_1
 from Simulation_Config import WINDOW_DURATION_S, CAN_SAMPLE_INTERVAL_S, SIMULATION_DURATION_S
+from Simulation_Clock import RealTimeClock
 
 
-# --- Rolling Window Data Storage ---
-# Store (value, timestamp) tuples for each signal
-str_angle_window_60s = collections.deque()
-vsa_lon_g_window_60s = collections.deque()
-vsa_lat_g_window_60s = collections.deque()
-vsa_yaw_1_window_60s = collections.deque()
-
 # --- Functions for Feature Calculation and Window Management ---
 def manage_rolling_window(deque_obj, value, current_timestamp, window_duration):
     """Adds new data and prunes old data from a deque."""
@@ -25,86 +23,228 @@ def manage_rolling_window(deque_obj, value, current_timestamp, window_duration):
 
 def calculate_std(deque_obj):
     """Calculates sample standard deviation from deque values."""
+    import numpy as np # For STD calculation (imported lazily to keep startup fast)
     values = [item[0] for item in deque_obj]
     if len(values) < 2: # Ensure there are at least 2 data points for ddof=1
         return 0.0 # Return 0.0 if not enough data
     return np.std(values, ddof=1)
 
+# Window feature -> (DBC signal, threshold table whose "STATISTIC" selects how the feature is computed)
+WINDOW_FEATURE_TABLES = {
+    "str_angle_std": ("STR_ANGLE", STR_ANGLE_STD_THRESHOLDS),
+    "lon_g_std": ("VSA_LON_G", VSA_LON_G_STD_THRESHOLDS),
+    "lat_g_std": ("VSA_LAT_G", VSA_LAT_G_STD_THRESHOLDS),
+    "yaw_1_std": ("VSA_YAW_1", VSA_YAW_1_STD_THRESHOLDS),
+}
+
+
+# --- Per-Tick Pipeline (signal intake -> windows -> STD features -> score) ---
+class AlertnessPipeline:
+    """
+    Updates the driver alertness score for one tick at a time and owns the
+    60s rolling windows, so several pipelines (e.g. one per vehicle) can coexist.
+
+    With feature_mode="ewm" the STD features come from exponentially weighted
+    statistics (O(1) memory per signal, scaled by EWM_STD_SCALES) instead of the windows.
+    """
+    name = "alertness"
+    normal_level = 0
+    sketch_features = ("str_angle_std", "lon_g_std", "lat_g_std", "yaw_1_std",  # last_features keys worth
+                       "str_reversal_rate", "str_lf_power_ratio")               # a fleet-wide distribution
+
+    def __init__(self, window_duration=WINDOW_DURATION_S, feature_mode="window"):
+        if feature_mode not in FEATURE_MODES:
+            raise ValueError(f"Unknown feature mode: {feature_mode}")
+        # Initialize the alertness score manager
+        self.alertness_scorer = DriverAlertnessScore()
+        self.window_duration = window_duration
+        self.feature_mode = feature_mode
+
+        # --- Rolling Window Data Storage ---
+        # Store (value, timestamp) tuples for each signal
+        self.str_angle_window_60s = collections.deque()
+        self.vsa_lon_g_window_60s = collections.deque()
+        self.vsa_lat_g_window_60s = collections.deque()
+        self.vsa_yaw_1_window_60s = collections.deque()
+
+        # Incremental steering reversal rate and low-frequency band power
+        self.steering_features = SteeringFrequencyFeatures(window_duration)
+
+        # Exponentially weighted statistics (ewm mode), or rolling order statistics for
+        # the features whose threshold table selects a robust statistic
+        self.robust_features = {}
+        self.ewm_features = {}
+        for feature, (_, table) in WINDOW_FEATURE_TABLES.items():
+            statistic = window_statistic(table)
+            if feature_mode == "ewm":
+                if statistic != "std":
+                    raise ValueError(f"{feature}: the ewm feature mode has no {statistic} statistic")
+                self.ewm_features[feature] = EwmStatistics(matched_time_constant(window_duration))
+            elif statistic != "std":
+                self.robust_features[feature] = RollingQuantiles(window_duration, statistic)
+
+        self.last_features = {} # Features of the last tick (for printing)
+
+    def read_signals(self, current_sim_time):
+        """
+        Calls individual simulation functions for each signal.
+
+        Returns:
+            dict: DBC signal name -> value
+        """
+        return {
+            "STR_ANGLE": generate_simulated_str_angle(current_sim_time),
+            "VSA_LON_G": generate_simulated_vsa_lon_g(current_sim_time),
+            "VSA_LAT_G": generate_simulated_vsa_lat_g(current_sim_time),
+            "VSA_YAW_1": generate_simulated_vsa_yaw_1(current_sim_time),
+        }
+
+    def process(self, current_sim_time, signals):
+        """
+        Updates the rolling windows and the alertness score.
+
+        Returns:
+            tuple: (alert_level, alert_description)
+        """
+        # Manage rolling windows for all relevant signals (not kept in the constant-memory ewm mode)
+        if not self.ewm_features:
+            manage_rolling_window(self.str_angle_window_60s, signals["STR_ANGLE"], current_sim_time, self.window_duration)
+            manage_rolling_window(self.vsa_lon_g_window_60s, signals["VSA_LON_G"], current_sim_time, self.window_duration)
+            manage_rolling_window(self.vsa_lat_g_window_60s, signals["VSA_LAT_G"], current_sim_time, self.window_duration)
+            manage_rolling_window(self.vsa_yaw_1_window_60s, signals["VSA_YAW_1"], current_sim_time, self.window_duration)
+
+        # Calculate STDs (or the robust statistics the threshold tables select) for the current windows
+        current_str_angle_std_60s = self._window_feature("str_angle_std", self.str_angle_window_60s, signals, current_sim_time)
+        current_lon_g_std_60s = self._window_feature("lon_g_std", self.vsa_lon_g_window_60s, signals, current_sim_time)
+        current_lat_g_std_60s = self._window_feature("lat_g_std", self.vsa_lat_g_window_60s, signals, current_sim_time)
+        current_yaw_1_std_60s = self._window_feature("yaw_1_std", self.vsa_yaw_1_window_60s, signals, current_sim_time)
+        str_reversal_rate, str_lf_power_ratio = self.steering_features.update(signals["STR_ANGLE"], current_sim_time)
+
+        self.last_features = {
+            "str_angle_std": current_str_angle_std_60s,
+            "lon_g_std": current_lon_g_std_60s,
+            "lat_g_std": current_lat_g_std_60s,
+            "yaw_1_std": current_yaw_1_std_60s,
+            "str_reversal_rate": str_reversal_rate,
+            "str_lf_power_ratio": str_lf_power_ratio,
+        }
+
+        # Update the alertness score based on all relevant STD features
+        self.alertness_scorer.update_str_angle_std_contribution(current_str_angle_std_60s)
+        self.alertness_scorer.update_vsa_contribution(
+            current_lon_g_std_60s,
+            current_lat_g_std_60s,
+            current_yaw_1_std_60s
+        )
+        self.alertness_scorer.update_steering_frequency_contribution(str_reversal_rate, str_lf_power_ratio)
+        current_alert_level = self.alertness_scorer.get_alert_level()
+        return current_alert_level, ALERT_LEVEL_DESCRIPTIONS[current_alert_level]
+
+    def _window_feature(self, feature, window, signals, current_sim_time):
+        """Returns the STD of the window, or the statistic the feature's threshold table selects."""
+        ewm = self.ewm_features.get(feature)
+        if ewm is not None:
+            return ewm.update(signals[WINDOW_FEATURE_TABLES[feature][0]], current_sim_time) * EWM_STD_SCALES[feature]
+        tracker = self.robust_features.get(feature)
+        if tracker is None:
+            return calculate_std(window)
+        return tracker.update(signals[WINDOW_FEATURE_TABLES[feature][0]], current_sim_time)
+
+    def triggered_rules(self):
+        """Returns the features currently contributing points to the score."""
+        return [name for name, points in self.alertness_scorer.get_contributions().items() if points > 0]
+
+    # --- Checkpointing (see vehicle_logic/checkpoint.py) ---
+    def _windows(self):
+        return (self.str_angle_window_60s, self.vsa_lon_g_window_60s, self.vsa_lat_g_window_60s, self.vsa_yaw_1_window_60s)
+
+    def snapshot_state(self):
+        """Returns the window contents, steering trackers and score state as plain data and arrays."""
+        return {
+            "windows": [snapshot_window(window) for window in self._windows()],
+            "steering": self.steering_features.snapshot_state(),
+            "ewm": {feature: dict(vars(ewm)) for feature, ewm in self.ewm_features.items()},
+            "scorer": dict(vars(self.alertness_scorer)),
+            "last_features": dict(self.last_features),
+        }
+
+    def restore_state(self, state, current_sim_time):
+        """Restores snapshot_state() output, discarding samples that are stale at current_sim_time."""
+        for window, snapshot in zip(self._windows(), state["windows"]):
+            restore_window(window, snapshot, current_sim_time, self.window_duration)
+        self.steering_features.restore_state(state["steering"], current_sim_time)
+        for feature, ewm_state in state.get("ewm", {}).items():
+            if feature in self.ewm_features:
+                vars(self.ewm_features[feature]).update(ewm_state)
+        windows = dict(zip(WINDOW_FEATURE_TABLES, self._windows()))
+        for feature, tracker in self.robust_features.items(): # Rebuilt from the restored windows
+            tracker.refill(windows[feature])
+        vars(self.alertness_scorer).update(state["scorer"])
+        self.last_features = dict(state["last_features"])
+
+    def alert_message(self, alert_level, alert_description):
+        """Returns the serial alert message for this result, or None if nothing should be sent."""
+        if alert_level > 0:
+            return f"ALERT: {alert_level} - {alert_description}"
+        return None
+
+    def print_status(self, current_sim_time, signals, alert_level, alert_description):
+        """Prints the simulation status for one tick."""
+        # Determine number of data points (should be same for all 60s windows)
+        num_data_points = len(self.str_angle_window_60s)
+        print(f"Time: {current_sim_time:0.1f}s | "
+              f"STR_ANGLE: {signals['STR_ANGLE']:5.1f} | "
+              f"LON_G: {signals['VSA_LON_G']:5.1f} | "
+              f"LAT_G: {signals['VSA_LAT_G']:5.1f} | "
+              f"YAW_1: {signals['VSA_YAW_1']:5.1f} | "
+              f"Window Size: {num_data_points:2d} pts")
+        print(f"  STD_60s: STR_ANGLE={self.last_features['str_angle_std']:5.2f}, "
+              f"LON_G={self.last_features['lon_g_std']:5.2f}, "
+              f"LAT_G={self.last_features['lat_g_std']:5.2f}, "
+              f"YAW_1={self.last_features['yaw_1_std']:5.2f}")
+        print(f"  Steering: reversals={self.last_features['str_reversal_rate']:5.1f}/min, "
+              f"0.1-0.5Hz power={self.last_features['str_lf_power_ratio']:4.2f}")
+        print(f"  Alert Score: {self.alertness_scorer.get_current_score()} | "
+              f"Alert Level: {alert_level} ({alert_description})\n")
+
+
 # --- Encapsulated Simulation Logic ---
-def run_simulation():
+def run_simulation(clock=None, duration_s=SIMULATION_DURATION_S, sample_interval_s=CAN_SAMPLE_INTERVAL_S):
     """
     Runs the driver alertness detection simulation.
     This function can be called from a main script.
+
+    Args:
+        clock: Simulation_Clock clock pacing the loop (default: RealTimeClock).
+        duration_s (float): Total simulated time in seconds.
+        sample_interval_s (float): Time between CAN samples in seconds.
     """
+    clock = clock or RealTimeClock()
     print(f"--- Simulating Rolling Window for {WINDOW_DURATION_S}s ---")
-    print(f"CAN data arriving every {CAN_SAMPLE_INTERVAL_S}s.")
+    print(f"CAN data arriving every {sample_interval_s}s.")
 
-    # Initialize the alertness score manager
-    alertness_scorer = DriverAlertnessScore()
-    
-    start_real_time = time.time()
-    next_can_event_time = start_real_time + CAN_SAMPLE_INTERVAL_S # When the first CAN data should be processed
+    pipeline = AlertnessPipeline()
+
+    start_time = clock.now()
+    next_can_event_time = sample_interval_s # When the first CAN data should be processed
 
     while True:
-        current_real_time = time.time()
-        current_sim_time = current_real_time - start_real_time
+        current_sim_time = clock.now() - start_time
 
         # Check if the total simulation duration has passed
-        if current_sim_time >= SIMULATION_DURATION_S:
+        if current_sim_time >= duration_s:
             break # End the simulation
         # Simulate receiving new CAN signals every CAN_SAMPLE_INTERVAL_S
-        if current_real_time >= next_can_event_time:
-            # Call individual simulation functions for each signal
-            simulated_str_angle = generate_simulated_str_angle(current_sim_time)
-            simulated_vsa_lon_g = generate_simulated_vsa_lon_g(current_sim_time)
-            simulated_vsa_lat_g = generate_simulated_vsa_lat_g(current_sim_time)
-            simulated_vsa_yaw_1 = generate_simulated_vsa_yaw_1(current_sim_time)
-
-            # Manage rolling windows for all relevant signals
-            manage_rolling_window(str_angle_window_60s, simulated_str_angle, current_sim_time, WINDOW_DURATION_S)
-            manage_rolling_window(vsa_lon_g_window_60s, simulated_vsa_lon_g, current_sim_time, WINDOW_DURATION_S)
-            manage_rolling_window(vsa_lat_g_window_60s, simulated_vsa_lat_g, current_sim_time, WINDOW_DURATION_S)
-            manage_rolling_window(vsa_yaw_1_window_60s, simulated_vsa_yaw_1, current_sim_time, WINDOW_DURATION_S)
-
-            # Calculate STDs for the current windows
-            current_str_angle_std_60s = calculate_std(str_angle_window_60s)
-            current_lon_g_std_60s = calculate_std(vsa_lon_g_window_60s)
-            current_lat_g_std_60s = calculate_std(vsa_lat_g_window_60s)
-            current_yaw_1_std_60s = calculate_std(vsa_yaw_1_window_60s)
-            
-            # Determine number of data points (should be same for all 60s windows)
-            num_data_points = len(str_angle_window_60s)
-
-            # Update the alertness score based on all relevant STD features
-            alertness_scorer.update_str_angle_std_contribution(current_str_angle_std_60s)
-            alertness_scorer.update_vsa_contribution(
-                current_lon_g_std_60s,
-                current_lat_g_std_60s,
-                current_yaw_1_std_60s
-            )
-            current_alertness_score = alertness_scorer.get_current_score()
-            current_alert_level = alertness_scorer.get_alert_level()
-
-            print(f"Time: {current_sim_time:0.1f}s | "
-                  f"STR_ANGLE: {simulated_str_angle:5.1f} | "
-                  f"LON_G: {simulated_vsa_lon_g:5.1f} | "
-                  f"LAT_G: {simulated_vsa_lat_g:5.1f} | "
-                  f"YAW_1: {simulated_vsa_yaw_1:5.1f} | "
-                  f"Window Size: {num_data_points:2d} pts")
-            print(f"  STD_60s: STR_ANGLE={current_str_angle_std_60s:5.2f}, "
-                  f"LON_G={current_lon_g_std_60s:5.2f}, "
-                  f"LAT_G={current_lat_g_std_60s:5.2f}, "
-                  f"YAW_1={current_yaw_1_std_60s:5.2f}")
-            print(f"  Alert Score: {current_alertness_score} | "
-                  f"Alert Level: {current_alert_level} ({ALERT_LEVEL_DESCRIPTIONS[current_alert_level]})\n")
-
-            next_can_event_time += CAN_SAMPLE_INTERVAL_S
+        if current_sim_time >= next_can_event_time:
+            signals = pipeline.read_signals(current_sim_time)
+            current_alert_level, current_alert_description = pipeline.process(current_sim_time, signals)
+            pipeline.print_status(current_sim_time, signals, current_alert_level, current_alert_description)
+
+            next_can_event_time += sample_interval_s
 
         # Advance simulation time
-        time.sleep(CAN_SAMPLE_INTERVAL_S)
-        # In a real system, you might `time.sleep(CAN_SAMPLE_INTERVAL_S)` to match real-time
-    
-    
-    time.sleep(5)
-    print("\n--- Simulation Ended ---")
+        clock.sleep(sample_interval_s)
+
 
+    clock.sleep(5)
+    print("\n--- Simulation Ended ---")
@@ -33,12 +33,16 @@ VEHICLE_SPEED = (VSA_ABS_FL_WHEEL_SPEED_255 + VSA_ABS_FR_WHEEL_SPEED_255 +
                  VSA_ABS_RL_WHEEL_SPEED_255 + VSA_ABS_RR_WHEEL_SPEED_255) / 4
 # VEHICLE_SPEED: Approximate vehicle speed in km/h calculated from wheel speeds
 
-# Print all values for debug/demo purposes
-print("Yaw Rate:", VSA_YAW_1, "deg/s")
-print("Lateral G:", VSA_LAT_G, "g")
-print("Longitudinal G:", VSA_LON_G, "g")
-print("Steering Angle:", STR_ANGLE, "deg")
-print("Accel Pedal Pos:", ENG_SMART_ACCELE_PEDAL_POSITION, "%")
-print("Brake Pressed:", ENG_SW_STATUS_BRAKE_NO == 0)
-print("Engine RPM:", ENG_ENG_SPEED)
-print("Vehicle Speed:", round(VEHICLE_SPEED, 2), "km/h")
+def print_signal_summary():
+    """Prints all values for debug/demo purposes."""
+    print("Yaw Rate:", VSA_YAW_1, "deg/s")
+    print("Lateral G:", VSA_LAT_G, "g")
+    print("Longitudinal G:", VSA_LON_G, "g")
+    print("Steering Angle:", STR_ANGLE, "deg")
+    print("Accel Pedal Pos:", ENG_SMART_ACCELE_PEDAL_POSITION, "%")
+    print("Brake Pressed:", ENG_SW_STATUS_BRAKE_NO == 0)
+    print("Engine RPM:", ENG_ENG_SPEED)
+    print("Vehicle Speed:", round(VEHICLE_SPEED, 2), "km/h")
+
+if __name__ == "__main__":
+    print_signal_summary()
@@ -4,7 +4,10 @@ from .alertness_thresholds import ( # Import thresholds from the new file
     STR_ANGLE_STD_THRESHOLDS,
     VSA_LON_G_STD_THRESHOLDS,
     VSA_LAT_G_STD_THRESHOLDS,
-    VSA_YAW_1_STD_THRESHOLDS
+    VSA_YAW_1_STD_THRESHOLDS,
+    STR_REVERSAL_RATE_THRESHOLDS,
+    STR_LF_POWER_THRESHOLDS,
+    ALERT_SCORE_THRESHOLDS
 )
 
 class DriverAlertnessScore:
@@ -19,6 +22,8 @@ class DriverAlertnessScore:
         self._vsa_lon_g_std_contribution = 0
         self._vsa_lat_g_std_contribution = 0
         self._vsa_yaw_1_std_contribution = 0
+        self._str_reversal_rate_contribution = 0
+        self._str_lf_power_contribution = 0
 
     def update_str_angle_std_contribution(self, str_angle_std_60s):
         """
@@ -33,6 +38,7 @@ class DriverAlertnessScore:
             self._str_angle_std_contribution = 2
         else: # str_angle_std_60s > SEVERE_FATIGUE_START
             self._str_angle_std_contribution = 3
+        self._update_total_score()
 
     def update_vsa_contribution(self, lon_g_std_60s, lat_g_std_60s, yaw_1_std_60s):
         """
@@ -68,18 +74,61 @@ class DriverAlertnessScore:
         else:
             self._vsa_yaw_1_std_contribution = 3
 
+        self._update_total_score()
+
+    def update_steering_frequency_contribution(self, reversal_rate_per_min, lf_power_ratio):
+        """
+        Updates the score contributions based on the steering reversal rate and the
+        share of steering variance in the low-frequency (drift-and-correct) band.
+        """
+        # Steering reversal rate contribution
+        if reversal_rate_per_min <= STR_REVERSAL_RATE_THRESHOLDS["NORMAL_MAX"]:
+            self._str_reversal_rate_contribution = 0
+        elif reversal_rate_per_min <= STR_REVERSAL_RATE_THRESHOLDS["MODERATE_START"]:
+            self._str_reversal_rate_contribution = 1
+        elif reversal_rate_per_min <= STR_REVERSAL_RATE_THRESHOLDS["SEVERE_START"]:
+            self._str_reversal_rate_contribution = 2
+        else:
+            self._str_reversal_rate_contribution = 3
+
+        # Low-frequency steering band power contribution
+        if lf_power_ratio <= STR_LF_POWER_THRESHOLDS["NORMAL_MAX"]:
+            self._str_lf_power_contribution = 0
+        elif lf_power_ratio <= STR_LF_POWER_THRESHOLDS["MODERATE_START"]:
+            self._str_lf_power_contribution = 1
+        elif lf_power_ratio <= STR_LF_POWER_THRESHOLDS["SEVERE_START"]:
+            self._str_lf_power_contribution = 2
+        else:
+            self._str_lf_power_contribution = 3
+
+        self._update_total_score()
+
+    def _update_total_score(self):
         # Aggregate all contributions to the total score
         self._current_alertness_score = (
             self._str_angle_std_contribution +
             self._vsa_lon_g_std_contribution +
             self._vsa_lat_g_std_contribution +
-            self._vsa_yaw_1_std_contribution
+            self._vsa_yaw_1_std_contribution +
+            self._str_reversal_rate_contribution +
+            self._str_lf_power_contribution
         )
 
     def get_current_score(self):
         """Returns the current aggregated alertness score."""
         return self._current_alertness_score
 
+    def get_contributions(self):
+        """Returns the current score contribution (0-3 points) of each feature."""
+        return {
+            "STR_ANGLE_STD": self._str_angle_std_contribution,
+            "VSA_LON_G_STD": self._vsa_lon_g_std_contribution,
+            "VSA_LAT_G_STD": self._vsa_lat_g_std_contribution,
+            "VSA_YAW_1_STD": self._vsa_yaw_1_std_contribution,
+            "STR_REVERSAL_RATE": self._str_reversal_rate_contribution,
+            "STR_LF_BAND_POWER": self._str_lf_power_contribution,
+        }
+
     def get_alert_level(self):
         """
         Determines the alert level based on the current score.
@@ -87,11 +136,11 @@ class DriverAlertnessScore:
         """
         score = self._current_alertness_score
         # These thresholds are for the *total* aggregated score
-        if score >= 30: # Example: High combined impact from multiple features
+        if score >= ALERT_SCORE_THRESHOLDS["CRITICAL_START"]: # Example: High combined impact from multiple features
             return 3 # Critical Alert
-        elif score >= 15: # Example: Moderate combined impact
+        elif score >= ALERT_SCORE_THRESHOLDS["MODERATE_START"]: # Example: Moderate combined impact
             return 2 # Moderate Alert
-        elif score >= 3: # Example: Mild combined impact
+        elif score >= ALERT_SCORE_THRESHOLDS["MILD_START"]: # Example: Mild combined impact
             return 1 # Mild Alert
         else:
             return 0 # Normal
@@ -103,6 +152,8 @@ class DriverAlertnessScore:
         self._vsa_lon_g_std_contribution = 0
         self._vsa_lat_g_std_contribution = 0
         self._vsa_yaw_1_std_contribution = 0
+        self._str_reversal_rate_contribution = 0
+        self._str_lf_power_contribution = 0
 
 # --- Alert Level Definitions (for interpretation) ---
 ALERT_LEVEL_DESCRIPTIONS = {
@@ -1,5 +1,12 @@
 # alertness_thresholds.py
 
+# Each STD table may select the window statistic its thresholds are compared with
+# through "STATISTIC" (see Signal_Processing/rolling_quantiles.py):
+#   "std" (default) - sample STD of the window
+#   "mad" / "iqr"   - robust STD estimates (scaled to equal the STD of normal data,
+#                     so the thresholds below still apply), not inflated by single spikes
+#   "median", "pNN" - rolling median / NN-th percentile of the signal itself
+
 # Define thresholds for STR_ANGLE_STD_60s contribution to alertness score
 # These are conceptual and need extensive real-world tuning.
 # Lower STD means more stable steering, higher means more variable.
@@ -8,7 +15,8 @@ STR_ANGLE_STD_THRESHOLDS = {
     "NORMAL_MAX": 2.5,  # STD up to this is considered normal, 0 points
     "MILD_FATIGUE_START": 2.5, # STD above this adds 1 point
     "MODERATE_FATIGUE_START": 4.0, # STD above this adds 2 points
-    "SEVERE_FATIGUE_START": 6.0  # STD above this adds 3 points
+    "SEVERE_FATIGUE_START": 6.0, # STD above this adds 3 points
+    "STATISTIC": "std" # Window statistic compared with the thresholds above
 }
 
 # Define thresholds for VSA_LON_G_STD_60s contribution (Longitudinal Inconsistency)
@@ -16,7 +24,8 @@ VSA_LON_G_STD_THRESHOLDS = {
     "NORMAL_MAX": 0.04, # m/s^2 STD
     "MILD_START": 0.04, # adds 1 point
     "MODERATE_START": 0.08, # adds 2 points
-    "SEVERE_START": 0.12 # adds 3 points
+    "SEVERE_START": 0.12, # adds 3 points
+    "STATISTIC": "std"
 }
 
 # Define thresholds for VSA_LAT_G_STD_60s contribution (Lateral Inconsistency / Weaving)
@@ -24,7 +33,8 @@ VSA_LAT_G_STD_THRESHOLDS = {
     "NORMAL_MAX": 0.03, # m/s^2 STD
     "MILD_START": 0.03, # adds 1 point
     "MODERATE_START": 0.06, # adds 2 points
-    "SEVERE_START": 0.09 # adds 3 points
+    "SEVERE_START": 0.09, # adds 3 points
+    "STATISTIC": "std"
 }
 
 # Define thresholds for VSA_YAW_1_STD_60s contribution (Rotational Inconsistency / Weaving)
@@ -32,6 +42,51 @@ VSA_YAW_1_STD_THRESHOLDS = {
     "NORMAL_MAX": 0.10, # deg/s STD
     "MILD_START": 0.10, # adds 1 point
     "MODERATE_START": 0.20, # adds 2 points
-    "SEVERE_START": 0.30 # adds 3 points
+    "SEVERE_START": 0.30, # adds 3 points
+    "STATISTIC": "std"
+}
+
+# Define thresholds for the *total* aggregated score -> alert level (0-3)
+ALERT_SCORE_THRESHOLDS = {
+    "MILD_START": 3, # score at or above this is a Mild Alert (1)
+    "MODERATE_START": 15, # score at or above this is a Moderate Alert (2)
+    "CRITICAL_START": 30 # score at or above this is a Critical Alert (3)
+}
+
+# --- Steering Frequency Features (see steering_features.py) ---
+# A steering reversal is a turn back of at least this many degrees from the last extreme
+STEERING_REVERSAL_GAP_DEG = 3.0
+# Reversals are counted on the angle low-passed at this cutoff (first order), so sensor
+# noise at high sample rates does not register as steering corrections
+STEERING_REVERSAL_LOWPASS_HZ = 0.6
+# Reversals closer than this to the previously counted one are not counted
+STEERING_MIN_REVERSAL_INTERVAL_S = 1.0
+
+# Low-frequency steering band (Hz): slow drift-and-correct steering typical of fatigue
+STEERING_LF_BAND_HZ = (0.1, 0.5)
+
+# Define thresholds for the steering reversal rate (reversals per minute over the window)
+STR_REVERSAL_RATE_THRESHOLDS = {
+    "NORMAL_MAX": 5.0, # reversals/min up to this is normal, 0 points
+    "MILD_START": 5.0, # adds 1 point
+    "MODERATE_START": 10.0, # adds 2 points
+    "SEVERE_START": 20.0 # adds 3 points
+}
+
+# Define thresholds for the share of steering variance in STEERING_LF_BAND_HZ (0.0-1.0)
+STR_LF_POWER_THRESHOLDS = {
+    "NORMAL_MAX": 0.15, # band power ratio up to this is normal, 0 points
+    "MILD_START": 0.15, # adds 1 point
+    "MODERATE_START": 0.25, # adds 2 points
+    "SEVERE_START": 0.35 # adds 3 points
+}
+
+# --- Constant-Memory Feature Mode (see Signal_Processing/ewm_statistics.py) ---
+# Factor from the exponentially weighted STD to the window STD the tables above are
+# tuned for, so the same thresholds apply (fit with: python -m vehicle_logic calibrate-ewm)
+EWM_STD_SCALES = {
+    "str_angle_std": 1.041, # Fitted on 10 generated sessions at CAN_SAMPLE_INTERVAL_S; close to 1.0
+    "lon_g_std": 1.045,     # at higher sample rates (1.001 at 0.1 s)
+    "lat_g_std": 1.045,
+    "yaw_1_std": 1.042,
 }
- 
\ No newline at end of file
@@ -0,0 +1,322 @@
+# steering_features.py
+#
+# Incremental steering features for fatigue detection. Both trackers are
+# updated once per STR_ANGLE sample at constant cost, so no FFT over the
+# window ever runs per tick:
+#   - SteeringReversalCounter: steering reversals per minute (O(1) per sample)
+#   - SlidingBandPower: share of steering variance in the 0.1-0.5 Hz band,
+#     from a sliding DFT evaluated only at the band's bins (O(bins) per sample)
+
+import collections
+import itertools
+import math
+
+from Simulation_Config import WINDOW_DURATION_S
+from Signal_Processing.window_state import snapshot_window, restore_window
+from .alertness_thresholds import (STEERING_REVERSAL_GAP_DEG, STEERING_REVERSAL_LOWPASS_HZ,
+                                   STEERING_MIN_REVERSAL_INTERVAL_S, STEERING_LF_BAND_HZ)
+
+MIN_WINDOW_COVERAGE = 0.9 # Band power is reported once the window spans this much of window_duration
+
+
+# --- Steering Reversal Rate ---
+class SteeringReversalCounter:
+    """
+    Counts steering reversals in a time-based window.
+
+    A reversal is registered when the wheel turns back by at least gap_deg from
+    the last local extreme (the usual reversal-rate definition with a gap size,
+    which ignores jitter smaller than the gap). Reversal times are kept in a
+    deque with the same retention rule as manage_rolling_window().
+
+    The angle is first low-passed (first order, lowpass_hz cutoff, exact for
+    irregular timestamps) and reversals closer than min_interval_s to the last
+    counted one are skipped, so the rate does not grow with the sample rate as
+    faster sampling resolves more sensor noise. Set lowpass_hz=None to count on
+    the raw angle.
+    """
+    def __init__(self, window_duration=WINDOW_DURATION_S, gap_deg=STEERING_REVERSAL_GAP_DEG,
+                 lowpass_hz=STEERING_REVERSAL_LOWPASS_HZ, min_interval_s=STEERING_MIN_REVERSAL_INTERVAL_S):
+        self.window_duration = window_duration
+        self.gap_deg = gap_deg
+        self.min_interval_s = min_interval_s
+        self._time_constant = 1.0 / (2.0 * math.pi * lowpass_hz) if lowpass_hz else 0.0
+        self._filtered = None     # Low-passed angle
+        self._last_timestamp = None
+        self._direction = 0       # +1 turning right (increasing), -1 turning left, 0 unknown
+        self._extreme = None      # Angle of the current local extreme
+        self._reversal_times = collections.deque()
+
+    def update(self, str_angle, current_timestamp):
+        """
+        Adds one STR_ANGLE sample.
+
+        Returns:
+            float: reversals per minute over the window.
+        """
+        if self._filtered is None or not self._time_constant:
+            self._filtered = str_angle
+        else:
+            dt = max(0.0, current_timestamp - self._last_timestamp)
+            self._filtered -= (self._filtered - str_angle) * -math.expm1(-dt / self._time_constant)
+        self._last_timestamp = current_timestamp
+        str_angle = self._filtered
+
+        if self._extreme is None:
+            self._extreme = str_angle
+        elif self._direction >= 0 and str_angle > self._extreme:
+            self._extreme = str_angle # Still turning the same way: extend the extreme
+            self._direction = 1
+        elif self._direction <= 0 and str_angle < self._extreme:
+            self._extreme = str_angle
+            self._direction = -1
+        elif abs(str_angle - self._extreme) >= self.gap_deg:
+            if self._direction != 0 and (not self._reversal_times or
+                                         current_timestamp - self._reversal_times[-1] >= self.min_interval_s):
+                self._reversal_times.append(current_timestamp)
+            self._direction = 1 if str_angle > self._extreme else -1
+            self._extreme = str_angle
+
+        while self._reversal_times and current_timestamp - self._reversal_times[0] > self.window_duration:
+            self._reversal_times.popleft()
+        return len(self._reversal_times) * 60.0 / self.window_duration
+
+    def snapshot_state(self):
+        return {"direction": self._direction, "extreme": self._extreme, "reversal_times": list(self._reversal_times),
+                "filtered": self._filtered, "last_timestamp": self._last_timestamp}
+
+    def restore_state(self, state, current_timestamp):
+        """Restores a snapshot, dropping reversals that are stale at current_timestamp."""
+        self._direction = state["direction"]
+        self._extreme = state["extreme"]
+        self._filtered = state.get("filtered") # Missing in checkpoints written before the filter
+        self._last_timestamp = state.get("last_timestamp")
+        self._reversal_times = collections.deque(
+            t for t in state["reversal_times"] if 0 <= current_timestamp - t <= self.window_duration)
+
+
+# --- Low-Frequency Band Power (sliding DFT) ---
+class SlidingBandPower:
+    """
+    Fraction of the windowed signal's variance that lies in a frequency band.
+
+    Keeps, for each DFT bin f_k = k / window_duration inside the band, the running
+    sums S_k = sum(x * exp(-2j*pi*f_k*t)) and E_k = sum(exp(-2j*pi*f_k*t)) over the
+    samples in the window. A new sample adds its terms and an expired sample
+    subtracts them, so each update costs O(bins) and works for irregular timestamps.
+    The phase is computed from the absolute timestamp (not accumulated), and the
+    sums are rebuilt from the window every resync_every updates to cancel rounding.
+
+    Returns 0.0 while the sampling rate is too low to resolve the band (e.g. the
+    default 5 s CAN interval), since the band would then be pure aliasing.
+    """
+    SMALL_BLOCK_SAMPLES = 16 # update_many() runs shorter blocks through update()
+
+    def __init__(self, window_duration=WINDOW_DURATION_S, band_hz=STEERING_LF_BAND_HZ, resync_every=None):
+        import numpy as np # Imported lazily, like calculate_std(), to keep startup fast
+        self._np = np
+        low_hz, high_hz = band_hz
+        self.window_duration = window_duration
+        self.max_frequency_hz = high_hz
+        first_bin = max(1, math.ceil(low_hz * window_duration))
+        last_bin = math.floor(high_hz * window_duration)
+        self.omegas = -2.0 * np.pi * np.arange(first_bin, last_bin + 1) / window_duration
+        self.resync_every = resync_every
+        self._window = collections.deque() # (value, timestamp)
+        self._resync()
+
+    def _add(self, value, timestamp, sign):
+        self._sum_x += sign * value
+        self._sum_x2 += sign * value * value
+        phase = self._np.exp(1j * self.omegas * timestamp)
+        if sign < 0:
+            phase = -phase
+        self._window_sums += phase
+        self._signal_sums += value * phase
+
+    def _resync(self):
+        """Rebuilds every running sum from the samples in the window."""
+        np = self._np
+        values = np.array([item[0] for item in self._window], dtype=np.float64)
+        timestamps = np.array([item[1] for item in self._window], dtype=np.float64)
+        phases = np.exp(1j * np.outer(timestamps, self.omegas)) # (samples, bins)
+        self._sum_x = float(values.sum())
+        self._sum_x2 = float(np.dot(values, values))
+        self._window_sums = phases.sum(axis=0)  # E_k
+        self._signal_sums = values @ phases     # S_k
+        self._updates_since_resync = 0
+
+    def update(self, value, current_timestamp):
+        """
+        Adds one sample and drops samples that left the window.
+
+        Returns:
+            float: band power / total variance (0.0-1.0).
+        """
+        self._window.append((value, current_timestamp))
+        self._add(value, current_timestamp, 1.0)
+        while self._window and current_timestamp - self._window[0][1] > self.window_duration:
+            old_value, old_timestamp = self._window.popleft()
+            self._add(old_value, old_timestamp, -1.0)
+
+        self._updates_since_resync += 1
+        if self._updates_since_resync >= (self.resync_every or max(len(self._window), 1)):
+            self._resync()
+        return self.band_power_ratio()
+
+    def update_many(self, values, timestamps, block_samples=4096):
+        """
+        Vectorized update() for a block of samples (sorted, not older than the window).
+
+        The running sums carry over between calls, as in update(): each block only
+        adds the terms of its own samples and subtracts those of the samples it
+        evicts, using prefix sums over the block, so a call costs O(block x bins)
+        array work however long the window is. Blocks shorter than
+        SMALL_BLOCK_SAMPLES go through update(), which is cheaper at that size.
+
+        Returns:
+            np.ndarray: band power ratio as seen by each new sample.
+        """
+        np = self._np
+        values = np.asarray(values, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        if values.size < self.SMALL_BLOCK_SAMPLES:
+            update = self.update
+            return np.array([update(value, timestamp) for value, timestamp in
+                             zip(values.tolist(), timestamps.tolist())], dtype=np.float64)
+        ratios = np.empty(values.size)
+        for first in range(0, values.size, block_samples):
+            block = slice(first, first + block_samples)
+            ratios[block] = self._update_block(values[block], timestamps[block])
+        return ratios
+
+    def _update_block(self, values, timestamps):
+        np = self._np
+        window = self._window
+        retained = len(window)
+        count_new = values.size
+        # Samples the newest sample evicts (update()'s retention rule). Timestamps are
+        # sorted, so every new sample's window starts within them.
+        newest = float(timestamps[-1])
+        evicted = 0
+        for _, old_timestamp in window:
+            if newest - old_timestamp <= self.window_duration:
+                break
+            evicted += 1
+        # Candidate window starts, indexed like the retained window + the block: the
+        # evicted samples plus the first kept one, or everything if nothing is kept
+        head = list(itertools.islice(window, evicted + 1))
+        head_values = np.array([item[0] for item in head], dtype=np.float64)
+        head_timestamps = np.array([item[1] for item in head], dtype=np.float64)
+        if evicted == retained:
+            head_values = np.concatenate((head_values, values))
+            head_timestamps = np.concatenate((head_timestamps, timestamps))
+        own_index = np.minimum(retained + np.arange(count_new), head_timestamps.size - 1)
+        starts = np.minimum(np.searchsorted(head_timestamps, timestamps - self.window_duration, side="left"), own_index)
+        # t - W can round differently from the per-sample test t - t_old > W: fix the boundary sample
+        starts += (timestamps - head_timestamps[starts]) > self.window_duration
+        earlier = np.maximum(starts - 1, 0)
+        starts -= (starts > 0) & ((timestamps - head_timestamps[earlier]) <= self.window_duration)
+
+        def prefix_sums(terms):
+            return np.concatenate((np.zeros((1,) + terms.shape[1:], dtype=terms.dtype), np.cumsum(terms, axis=0)))
+        def running_sums(current, added, removed):
+            """Running sum as seen by each new sample: current + its added terms - its evicted terms."""
+            return current + prefix_sums(added)[1:] - prefix_sums(removed)[starts]
+        phases = np.exp(1j * np.outer(timestamps, self.omegas))
+        head_phases = np.exp(1j * np.outer(head_timestamps[:int(starts[-1])], self.omegas))
+        evicted_values = head_values[:head_phases.shape[0]]
+        counts = retained + np.arange(1, count_new + 1) - starts
+        sum_x = running_sums(self._sum_x, values, evicted_values)
+        sum_x2 = running_sums(self._sum_x2, values * values, evicted_values * evicted_values)
+        window_sums = running_sums(self._window_sums, phases, head_phases)
+        signal_sums = running_sums(self._signal_sums, values[:, None] * phases, evicted_values[:, None] * head_phases)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = sum_x / counts
+            variance_sum = sum_x2 - counts * mean * mean
+            residual = signal_sums - mean[:, None] * window_sums
+            band_power = (residual.real ** 2 + residual.imag ** 2).sum(axis=1)
+            ratios = np.minimum(1.0, 2.0 * band_power / (counts * variance_sum))
+            span = timestamps - head_timestamps[starts]
+            valid = ((counts >= 2) & (span >= MIN_WINDOW_COVERAGE * self.window_duration)
+                     & ((counts - 1) > 2.0 * self.max_frequency_hz * span) & (variance_sum > 1e-12))
+        if not self.omegas.size:
+            valid[:] = False
+        ratios = np.where(valid, ratios, 0.0)
+
+        # Carry the newest sample's sums and window into the next call
+        self._sum_x, self._sum_x2 = float(sum_x[-1]), float(sum_x2[-1])
+        self._window_sums, self._signal_sums = window_sums[-1], signal_sums[-1]
+        keep = int(starts[-1])
+        for _ in range(min(keep, retained)):
+            window.popleft()
+        first_kept = max(0, keep - retained)
+        window.extend(zip(values[first_kept:].tolist(), timestamps[first_kept:].tolist()))
+        self._updates_since_resync += count_new
+        if self._updates_since_resync >= (self.resync_every or max(len(window), 1)):
+            self._resync()
+        return ratios
+
+    def snapshot_state(self):
+        return {"window": snapshot_window(self._window)}
+
+    def restore_state(self, state, current_timestamp):
+        """Restores a snapshot, dropping samples that are stale at current_timestamp (sums are rebuilt)."""
+        restore_window(self._window, state["window"], current_timestamp, self.window_duration)
+        self._resync()
+
+    def band_power_ratio(self):
+        count = len(self._window)
+        if count < 2 or not self.omegas.size:
+            return 0.0
+        span = self._window[-1][1] - self._window[0][1]
+        if span < MIN_WINDOW_COVERAGE * self.window_duration: # Bins are only orthogonal over a full window
+            return 0.0
+        if (count - 1) / span <= 2.0 * self.max_frequency_hz: # Band reaches the Nyquist frequency
+            return 0.0
+        mean = self._sum_x / count
+        variance_sum = self._sum_x2 - count * mean * mean # sum((x - mean)^2)
+        if variance_sum <= 1e-12:
+            return 0.0
+        # Subtracting mean * E_k removes the DC leakage of a window that is not a whole number of periods
+        residual = self._signal_sums - mean * self._window_sums
+        band_power = float(self._np.vdot(residual, residual).real)
+        return min(1.0, 2.0 * band_power / (count * variance_sum))
+
+
+class SteeringFrequencyFeatures:
+    """Both steering trackers for one vehicle, fed from the same STR_ANGLE samples."""
+    def __init__(self, window_duration=WINDOW_DURATION_S):
+        self.reversals = SteeringReversalCounter(window_duration)
+        self.band_power = SlidingBandPower(window_duration)
+
+    def update(self, str_angle, current_timestamp):
+        """
+        Returns:
+            tuple: (reversal rate per minute, 0.1-0.5 Hz band power ratio)
+        """
+        return (self.reversals.update(str_angle, current_timestamp),
+                self.band_power.update(str_angle, current_timestamp))
+
+    def snapshot_state(self):
+        return {"reversals": self.reversals.snapshot_state(), "band_power": self.band_power.snapshot_state()}
+
+    def restore_state(self, state, current_timestamp):
+        self.reversals.restore_state(state["reversals"], current_timestamp)
+        self.band_power.restore_state(state["band_power"], current_timestamp)
+
+    def update_many(self, str_angles, timestamps):
+        """
+        Feeds a block of samples (a recorded session or a micro-batch) in order.
+
+        Returns:
+            tuple: (reversal rates, band power ratios) as np.ndarray, one value per sample
+        """
+        np = self.band_power._np
+        str_angles = np.asarray(str_angles, dtype=np.float64)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        reversal_update = self.reversals.update
+        reversal_rates = np.array([reversal_update(value, timestamp) for value, timestamp in
+                                   zip(str_angles.tolist(), timestamps.tolist())], dtype=np.float64)
+        return reversal_rates, self.band_power.update_many(str_angles, timestamps)
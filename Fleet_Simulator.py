@@ -0,0 +1,252 @@
+# Fleet_Simulator.py
+#
+# Vectorized fleet signal simulator for load testing. Unlike Read_Signal.py,
+# where every signal is drawn independently for one vehicle, this steps N
+# vehicles at once through a kinematic bicycle model, so steering angle, yaw
+# rate, lateral G, wheel speeds and friction stay physically consistent:
+#   steering (driver model) -> road wheel angle -> yaw rate -> lateral G,
+#   yaw rate -> inner/outer wheel speeds, friction -> grip limit -> slip / spin.
+# The driver model, friction and braking faults follow the scenario timeline
+# and fault windows of Read_Signal.py.
+#
+#     python -m vehicle_logic fleet --vehicles 10000 --rate 100 --duration 60
+
+import argparse
+import math
+import time
+
+import numpy as np
+
+import Read_Signal
+from Read_Signal import SIGNAL_NAMES
+
+GRAVITY_MS2 = 9.81
+WHEELBASE_M = 2.7
+TRACK_WIDTH_M = 1.6
+STEERING_RATIO = 15.0         # Steering wheel degrees per road wheel degree
+YAW_RESPONSE_TAU_S = 0.3      # First-order lag of the yaw rate behind the kinematic target
+SPIN_GAIN_DEGS = 20.0         # Extra yaw rate (deg/s) per unit of lateral demand beyond the grip limit
+WHEEL_SPEED_NOISE_KMH = 0.3
+CRUISE_SPEED_KMH = (80.0, 110.0)   # Per-vehicle target speed range on the highway
+URBAN_SPEED_KMH = (30.0, 60.0)     # Target speed range of vehicles driving in town
+SPEED_GAIN_PER_S = 0.3        # Cruise controller gain (m/s^2 per m/s of speed error)
+
+# Driver steering model per scenario: (Ornstein-Uhlenbeck std in deg, weave amplitude in deg,
+# weave frequency range in Hz). Fatigue means larger, slower weaving (0.1-0.5 Hz band).
+STEERING_MODEL = {
+    Read_Signal.SCENARIO_NORMAL_DRIVING: (1.0, 0.5, (0.03, 0.08)),
+    Read_Signal.SCENARIO_FATIGUE_LIKE_DRIVING: (4.0, 4.0, (0.1, 0.4)),
+    Read_Signal.SCENARIO_POST_FATIGUE_DRIVING: (2.0, 1.5, (0.05, 0.15)),
+}
+STEERING_REVERSION_PER_S = 1.0 # OU mean reversion rate of the steering corrections
+
+# Friction ranges (same as generate_simulated_vsa_maeps_myu_value)
+FRICTION_NORMAL = (0.7, 0.9)
+FRICTION_LOW = (0.2, 0.4)
+FRICTION_AFTER = (0.5, 0.7)
+MYU_NOISE = 0.02
+
+
+def _uniform_in(rng, bounds, size):
+    return rng.uniform(bounds[0], bounds[1], size)
+
+
+class FleetSimulator:
+    """
+    Steps N vehicles together; every signal is a float64 array with one value per vehicle.
+
+    Args:
+        vehicles (int): Fleet size.
+        sample_interval_s (float): Time step in seconds.
+        seed (int): Seed for the simulator's own NumPy generator (None = unseeded).
+        urban_share (float): Fraction of vehicles cruising at town speeds (below the
+                             stability monitor's speed gate) instead of highway speeds.
+        stagger_s (float): Spread of the vehicles' positions on the scenario timeline
+                           (0 = every vehicle follows the timeline in lockstep).
+    """
+    def __init__(self, vehicles, sample_interval_s=0.1, seed=None, urban_share=0.0, stagger_s=0.0):
+        rng = self.rng = np.random.default_rng(seed)
+        self.vehicles = vehicles
+        self.sample_interval_s = sample_interval_s
+        self.time = 0.0
+        self.steps = 0
+        self.timeline_offsets = rng.uniform(0.0, stagger_s, vehicles) if stagger_s else np.zeros(vehicles)
+
+        urban = rng.random(vehicles) < urban_share
+        self.target_speed_ms = np.where(urban, _uniform_in(rng, URBAN_SPEED_KMH, vehicles),
+                                        _uniform_in(rng, CRUISE_SPEED_KMH, vehicles)) / 3.6
+        self.speed_ms = self.target_speed_ms.copy()
+        self.yaw_rate = np.zeros(vehicles)         # rad/s
+        self.steering_noise = np.zeros(vehicles)   # OU part of the steering wheel angle (deg)
+        self.weave_phase = rng.uniform(0.0, 2.0 * math.pi, vehicles)
+        self.weave_unit_frequency = rng.random(vehicles) # Position inside the scenario's frequency range
+        self.brake_decel_ms2 = rng.uniform(0.3, 1.0, vehicles) # Each driver's light brake press
+        self.friction_unit = rng.random(vehicles)  # Position inside the current friction range
+
+    # --- Scenario Timeline ---
+    def _local_times(self):
+        return self.time + self.timeline_offsets
+
+    @staticmethod
+    def _in_window(local_times, window):
+        return (local_times > window[0]) & (local_times < window[1]) # Strictly inside, like Read_Signal
+
+    def _scenario_parameters(self, local_times):
+        """Per-vehicle steering model parameters for the scenario each vehicle is in."""
+        noise_std = np.empty(self.vehicles)
+        weave_amplitude = np.empty(self.vehicles)
+        weave_frequency = np.empty(self.vehicles)
+        for start, end, scenario in Read_Signal.SCENARIO_BOUNDARIES:
+            inside = (local_times >= start) & (local_times < end)
+            std, amplitude, (low_hz, high_hz) = STEERING_MODEL[scenario]
+            noise_std[inside] = std
+            weave_amplitude[inside] = amplitude
+            weave_frequency[inside] = low_hz + (high_hz - low_hz) * self.weave_unit_frequency[inside]
+        return noise_std, weave_amplitude, weave_frequency
+
+    def _friction(self, local_times):
+        start, end = Read_Signal.LOW_FRICTION_WINDOW
+        bounds = np.select([local_times < start, local_times < end], # (2, N): low and high end of each vehicle's range
+                           [np.array(FRICTION_NORMAL)[:, None], np.array(FRICTION_LOW)[:, None]],
+                           np.array(FRICTION_AFTER)[:, None])
+        return bounds[0] + (bounds[1] - bounds[0]) * self.friction_unit
+
+    # --- Stepping ---
+    def step(self):
+        """
+        Advances every vehicle by one sample interval.
+
+        Returns:
+            tuple: (time in seconds, dict of DBC signal name -> np.ndarray with one value per vehicle)
+        """
+        rng = self.rng
+        dt = self.sample_interval_s
+        n = self.vehicles
+        local_times = self._local_times()
+
+        # --- Driver: steering wheel angle (OU corrections + weaving) ---
+        noise_std, weave_amplitude, weave_frequency = self._scenario_parameters(local_times)
+        reversion = STEERING_REVERSION_PER_S * dt
+        self.steering_noise += (-reversion * self.steering_noise
+                                + noise_std * math.sqrt(2.0 * reversion) * rng.standard_normal(n))
+        self.weave_phase += 2.0 * math.pi * weave_frequency * dt
+        str_angle = np.clip(self.steering_noise + weave_amplitude * np.sin(self.weave_phase), -45.0, 45.0)
+
+        # --- Road: friction and grip limit ---
+        friction = self._friction(local_times)
+        grip_ms2 = friction * GRAVITY_MS2
+
+        # --- Longitudinal: cruise control and light brake presses (Read_Signal pedal pattern) ---
+        cycle = np.mod(local_times, 10.0)
+        brake_pressed = ((cycle >= 2) & (cycle < 4)) | ((cycle >= 7) & (cycle < 8))
+        demand_ax = np.where(brake_pressed, -self.brake_decel_ms2,
+                             np.clip(SPEED_GAIN_PER_S * (self.target_speed_ms - self.speed_ms), -2.0, 2.0))
+        demand_ax += 0.1 * rng.standard_normal(n)
+        lon_g = np.clip(demand_ax, -grip_ms2, grip_ms2)
+        self.speed_ms = np.maximum(self.speed_ms + lon_g * dt, 0.0)
+        speed = self.speed_ms
+
+        # --- Lateral: kinematic bicycle yaw rate, lagged, limited by grip ---
+        road_wheel_angle = np.radians(str_angle / STEERING_RATIO)
+        target_yaw_rate = speed / WHEELBASE_M * np.tan(road_wheel_angle)
+        self.yaw_rate += (target_yaw_rate - self.yaw_rate) * min(1.0, dt / YAW_RESPONSE_TAU_S)
+        demand_ay = speed * self.yaw_rate
+        lat_g = np.clip(demand_ay, -grip_ms2, grip_ms2)
+        lateral_excess = (np.abs(demand_ay) - grip_ms2).clip(min=0.0) / grip_ms2
+        yaw_deg = np.degrees(self.yaw_rate) + np.sign(self.yaw_rate) * SPIN_GAIN_DEGS * lateral_excess # Oversteer past the limit
+
+        # --- Wheel speeds: turning splits inner/outer, excess braking/traction demand slips a wheel ---
+        speed_kmh = speed * 3.6
+        turn_split_kmh = self.yaw_rate * TRACK_WIDTH_M / 2.0 * 3.6 # Left wheels slower in a left (positive) turn
+        longitudinal_excess = (np.abs(demand_ax) - grip_ms2).clip(min=0.0) / grip_ms2
+        slip_kmh = speed_kmh * np.minimum(longitudinal_excess, 1.0) * 0.5
+        wheel_noise = WHEEL_SPEED_NOISE_KMH * rng.standard_normal((4, n))
+        fl = speed_kmh - turn_split_kmh - slip_kmh + wheel_noise[0] # Slip shows on the front-left wheel
+        fr = speed_kmh + turn_split_kmh + wheel_noise[1]
+        rl = speed_kmh - turn_split_kmh + wheel_noise[2]
+        rr = speed_kmh + turn_split_kmh + wheel_noise[3]
+
+        # --- Braking system status and faults (Read_Signal fault windows) ---
+        mc_fault = self._in_window(local_times, Read_Signal.MC_PRESSURE_SENSOR_FAULT_WINDOW)
+        braking_pressure = 5000.0 + 10000.0 * np.clip(-lon_g, 0.0, 1.0) # kPa; 1 m/s^2 of braking -> 15000 kPa
+        mc_pressure = np.where(brake_pressed, braking_pressure, rng.uniform(0.0, 50.0, n))
+        mc_pressure = np.where(mc_fault, rng.uniform(50.0, 150.0, n), mc_pressure)
+
+        signals = {
+            "STR_ANGLE": str_angle,
+            "VSA_LON_G": lon_g,
+            "VSA_LAT_G": lat_g,
+            "VSA_YAW_1": np.clip(yaw_deg, -125.0, 124.75),
+            "VSA_ABS_FL_WHEEL_SPEED_255": np.clip(fl, 0.0, 255.0),
+            "VSA_ABS_FR_WHEEL_SPEED_255": np.clip(fr, 0.0, 255.0),
+            "VSA_ABS_RL_WHEEL_SPEED_255": np.clip(rl, 0.0, 255.0),
+            "VSA_ABS_RR_WHEEL_SPEED_255": np.clip(rr, 0.0, 255.0),
+            "VSA_MAEPS_MYU_VALUE": np.clip(friction + MYU_NOISE * rng.standard_normal(n), -1.28, 1.27),
+            "METER_SW_STATUS_BRAKE_FLUID": self._in_window(local_times, Read_Signal.BRAKE_FLUID_LOW_WINDOW).astype(np.float64),
+            "ENG_SW_STATUS_BRAKE_NO": brake_pressed.astype(np.float64),
+            "VSA_MASTER_CYLINDER_PRESSURE": mc_pressure,
+            "VSA_WARN_STATUS_BRAKE": self._in_window(local_times, Read_Signal.BRAKE_WARNING_WINDOW).astype(np.float64),
+            "VSA_WARN_STATUS_ABS": self._in_window(local_times, Read_Signal.ABS_WARNING_WINDOW).astype(np.float64),
+            "VSA_WARN_STATUS_PUNCTURE": self._in_window(local_times, Read_Signal.TIRE_PUNCTURE_WINDOW).astype(np.float64),
+        }
+        current_time = self.time
+        self.steps += 1
+        self.time = self.steps * self.sample_interval_s # Multiply instead of accumulate to avoid drift
+        return current_time, signals
+
+    def run(self, duration_s):
+        """Yields (time, signals) for every step until duration_s of simulated time has passed."""
+        while self.time < duration_s:
+            yield self.step()
+
+    def vehicle_signals(self, signals, vehicle):
+        """Returns one vehicle's values as a plain dict (the shape pipeline.process() expects)."""
+        return {name: float(signals[name][vehicle]) for name in SIGNAL_NAMES}
+
+
+def generate_fleet_sessions(vehicles, duration_s, sample_interval_s, seed=None, **kwargs):
+    """
+    Simulates a fleet and returns one session per vehicle in the
+    Batch_Processing.session_arrays format ("timestamp" + one array per signal).
+    """
+    simulator = FleetSimulator(vehicles, sample_interval_s, seed=seed, **kwargs)
+    steps = list(simulator.run(duration_s))
+    timestamps = np.array([t for t, _ in steps])
+    columns = {name: np.stack([signals[name] for _, signals in steps], axis=1) for name in SIGNAL_NAMES}
+    return [dict({"timestamp": timestamps}, **{name: columns[name][vehicle] for name in SIGNAL_NAMES})
+            for vehicle in range(vehicles)]
+
+
+# --- Throughput Benchmark ---
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="vehicle_logic fleet",
+                                     description="Benchmark the vectorized fleet simulator.")
+    parser.add_argument("--vehicles", type=int, default=10000, help="Fleet size")
+    parser.add_argument("--rate", type=float, default=100.0, help="Samples per second per vehicle")
+    parser.add_argument("--duration", type=float, default=60.0, help="Simulated duration (s)")
+    parser.add_argument("--urban-share", type=float, default=0.0, help="Fraction of vehicles at town speeds")
+    parser.add_argument("--stagger", type=float, default=0.0, help="Spread of vehicles on the scenario timeline (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    simulator = FleetSimulator(args.vehicles, 1.0 / args.rate, seed=args.seed,
+                               urban_share=args.urban_share, stagger_s=args.stagger)
+    str_angles, yaw_rates = [], []
+    start = time.perf_counter()
+    for _, signals in simulator.run(args.duration):
+        str_angles.append(signals["STR_ANGLE"][:100].copy()) # Keep a small sample for the sanity check
+        yaw_rates.append(signals["VSA_YAW_1"][:100].copy())
+    elapsed = time.perf_counter() - start
+    samples = simulator.steps * args.vehicles
+    correlation = np.corrcoef(np.concatenate(str_angles), np.concatenate(yaw_rates))[0, 1]
+    print(f"--- {args.vehicles} vehicles x {simulator.steps} steps ({samples} samples) in {elapsed:.2f}s: "
+          f"{samples / elapsed:,.0f} samples/s, {args.duration / elapsed:.1f}x real time ---")
+    print(f"STR_ANGLE / VSA_YAW_1 correlation: {correlation:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,18 @@
 # simulation_runner.py
 
 import collections
-import time
-import numpy as np # For STD calculation
 
 from .vehicle_stability_monitor import VehicleStabilityMonitor
+from .speed_gate import SpeedGate
+from Signal_Processing.window_state import snapshot_window, restore_window
+from Signal_Processing.rolling_quantiles import RollingQuantiles
+from Signal_Processing.ewm_statistics import FEATURE_MODES
 # IMPORTING FROM YOUR PROVIDED Read_Signal.py
 import Read_Signal # Changed to import the module directly
 
 from .Threeholds import *
 from Simulation_Config import *
-
-
-# --- Rolling Window Data Storage ---
-# Store (value, timestamp) tuples for each signal that needs history
-str_angle_window = collections.deque()
-vsa_lon_g_window = collections.deque()
-vsa_lat_g_window = collections.deque()
-vsa_yaw_1_window = collections.deque()
-fl_speed_window = collections.deque()
-fr_speed_window = collections.deque()
-rl_speed_window = collections.deque()
-rr_speed_window = collections.deque()
-maeps_myu_value_window = collections.deque() # New window for MYU value
+from Simulation_Clock import RealTimeClock
 
 
 # --- Functions for Window Management ---
@@ -34,84 +24,243 @@ def manage_rolling_window(deque_obj, value, current_timestamp, window_duration):
 
 def calculate_std(deque_obj):
     """Calculates sample standard deviation from deque values."""
+    import numpy as np # For STD calculation (imported lazily to keep startup fast)
     values = [item[0] for item in deque_obj]
     if len(values) < 2: # Ensure there are at least 2 data points for ddof=1
         return 0.0 # Return 0.0 if not enough data
     return np.std(values, ddof=1)
 
-# --- Encapsulated Simulation Logic ---
-def run_simulation():
+
+# --- Per-Tick Pipeline (signal intake -> windows -> features -> rules) ---
+class StabilityPipeline:
     """
-    Runs the vehicle stability detection simulation.
-    This function simulates real-time data reception and processing,
-    with processing occurring every CAN_SAMPLE_INTERVAL_S.
+    Runs the vehicle stability rules for one tick at a time and owns the
+    rolling windows, so several pipelines (e.g. one per vehicle) can coexist.
     """
-    print(f"--- Simulating Vehicle Stability Monitoring for {SIMULATION_DURATION_S}s ---")
-    print(f"CAN data simulated to arrive every {CAN_SAMPLE_INTERVAL_S}s.")
-    print(f"Rolling window duration: {WINDOW_DURATION_S}s.")
+    name = "stability"
+    normal_level = ALERT_LEVEL_NONE
+    sketch_features = ("vehicle_speed", "max_axle_speed_diff", "myu_value") # last_features keys worth a fleet-wide distribution
 
-    # Print the name of the module providing simulated signals
-    print(f"Simulated signals generated from module: {Read_Signal.__name__}\n")
+    def __init__(self, window_duration=WINDOW_DURATION_S, speed_gate=True, feature_mode="window"):
+        if feature_mode not in FEATURE_MODES:
+            raise ValueError(f"Unknown feature mode: {feature_mode}")
+        # Initialize the stability monitor
+        self.monitor = VehicleStabilityMonitor()
+        self.window_duration = window_duration
+        # The rules only use instantaneous (or short-window rule_inputs) values, so the
+        # constant-memory ewm mode does not keep the signal history windows at all
+        self.keep_windows = feature_mode == "window"
+        self._has_history = False # Windows / rule inputs hold samples (cleared when the speed gate suspends)
+        # Below highway speed check_stability() cannot fire, so the gate skips all per-tick work
+        self.speed_gate = SpeedGate() if speed_gate else None
 
-    # Initialize the stability monitor
-    stability_monitor = VehicleStabilityMonitor()
+        # --- Rolling Window Data Storage ---
+        # Store (value, timestamp) tuples for each signal that needs history
+        self.str_angle_window = collections.deque()
+        self.vsa_lon_g_window = collections.deque()
+        self.vsa_lat_g_window = collections.deque()
+        self.vsa_yaw_1_window = collections.deque()
+        self.fl_speed_window = collections.deque()
+        self.fr_speed_window = collections.deque()
+        self.rl_speed_window = collections.deque()
+        self.rr_speed_window = collections.deque()
+        self.maeps_myu_value_window = collections.deque() # New window for MYU value
 
-    # We will use a simple counter for simulation time, as time.sleep paces the loop
-    current_sim_time = 0.0
+        # Rule inputs that STABILITY_RULE_INPUT_STATISTICS takes as a rolling median / percentile
+        self.rule_inputs = {signal: RollingQuantiles(STABILITY_ROBUST_WINDOW_S, statistic)
+                            for signal, statistic in STABILITY_RULE_INPUT_STATISTICS.items() if statistic != "instant"}
 
-    while current_sim_time < SIMULATION_DURATION_S:
-        # --- Generate simulated CAN signals using YOUR Read_Signal.py functions ---
-        # All signals are generated for the current simulation timestamp
-        simulated_str_angle = Read_Signal.generate_simulated_str_angle(current_sim_time)
-        simulated_vsa_lon_g = Read_Signal.generate_simulated_vsa_lon_g(current_sim_time)
-        simulated_vsa_lat_g = Read_Signal.generate_simulated_vsa_lat_g(current_sim_time)
-        simulated_vsa_yaw_1 = Read_Signal.generate_simulated_vsa_yaw_1(current_sim_time)
-        simulated_fl_speed, simulated_fr_speed, simulated_rl_speed, simulated_rr_speed = Read_Signal.generate_simulated_wheel_speeds(current_sim_time)
-        simulated_maeps_myu_value = Read_Signal.generate_simulated_vsa_maeps_myu_value(current_sim_time) # New signal
+        self.last_features = {} # Derived features of the last tick (for printing)
 
-        # --- Manage rolling windows for all relevant signals ---
-        manage_rolling_window(str_angle_window, simulated_str_angle, current_sim_time, WINDOW_DURATION_S)
-        manage_rolling_window(vsa_lon_g_window, simulated_vsa_lon_g, current_sim_time, WINDOW_DURATION_S)
-        manage_rolling_window(vsa_lat_g_window, simulated_vsa_lat_g, current_sim_time, WINDOW_DURATION_S)
-        manage_rolling_window(vsa_yaw_1_window, simulated_vsa_yaw_1, current_sim_time, WINDOW_DURATION_S)
-        manage_rolling_window(fl_speed_window, simulated_fl_speed, current_sim_time, WINDOW_DURATION_S)
-        manage_rolling_window(fr_speed_window, simulated_fr_speed, current_sim_time, WINDOW_DURATION_S)
-        manage_rolling_window(rl_speed_window, simulated_rl_speed, current_sim_time, WINDOW_DURATION_S)
-        manage_rolling_window(rr_speed_window, simulated_rr_speed, current_sim_time, WINDOW_DURATION_S)
-        manage_rolling_window(maeps_myu_value_window, simulated_maeps_myu_value, current_sim_time, WINDOW_DURATION_S) # New window
+    def _windows(self):
+        return (self.str_angle_window, self.vsa_lon_g_window, self.vsa_lat_g_window, self.vsa_yaw_1_window,
+                self.fl_speed_window, self.fr_speed_window, self.rl_speed_window, self.rr_speed_window,
+                self.maeps_myu_value_window)
 
-        # --- Calculate Derived Features for Rules ---
+    def read_signals(self, current_sim_time):
+        """
+        Generates simulated CAN signals using Read_Signal.py functions.
+        All signals are generated for the current simulation timestamp.
+
+        Returns:
+            dict: DBC signal name -> value
+        """
+        fl, fr, rl, rr = Read_Signal.generate_simulated_wheel_speeds(current_sim_time)
+        return {
+            "STR_ANGLE": Read_Signal.generate_simulated_str_angle(current_sim_time),
+            "VSA_LON_G": Read_Signal.generate_simulated_vsa_lon_g(current_sim_time),
+            "VSA_LAT_G": Read_Signal.generate_simulated_vsa_lat_g(current_sim_time),
+            "VSA_YAW_1": Read_Signal.generate_simulated_vsa_yaw_1(current_sim_time),
+            "VSA_ABS_FL_WHEEL_SPEED_255": fl,
+            "VSA_ABS_FR_WHEEL_SPEED_255": fr,
+            "VSA_ABS_RL_WHEEL_SPEED_255": rl,
+            "VSA_ABS_RR_WHEEL_SPEED_255": rr,
+            "VSA_MAEPS_MYU_VALUE": Read_Signal.generate_simulated_vsa_maeps_myu_value(current_sim_time), # New signal
+        }
+
+    def process(self, current_sim_time, signals):
+        """
+        Updates the rolling windows, derives the rule features and applies the stability rules.
+        While the speed gate is suspended only the vehicle speed is computed; after it
+        resumes, alerts are held for SPEED_GATE_WARMUP_S while the windows refill.
+
+        Returns:
+            tuple: (alert_level, alert_description)
+        """
+        simulated_fl_speed = signals["VSA_ABS_FL_WHEEL_SPEED_255"]
+        simulated_fr_speed = signals["VSA_ABS_FR_WHEEL_SPEED_255"]
+        simulated_rl_speed = signals["VSA_ABS_RL_WHEEL_SPEED_255"]
+        simulated_rr_speed = signals["VSA_ABS_RR_WHEEL_SPEED_255"]
         # Average Vehicle Speed
         current_vehicle_speed = (simulated_fl_speed + simulated_fr_speed + simulated_rl_speed + simulated_rr_speed) / 4.0
 
-        # Absolute values for comparison with thresholds
-        abs_str_angle = abs(simulated_str_angle)
-        abs_yaw_1 = abs(simulated_vsa_yaw_1)
-        abs_lat_g = abs(simulated_vsa_lat_g)
+        # --- Speed Gate ---
+        if self.speed_gate is not None and not self.speed_gate.update(current_vehicle_speed, current_sim_time):
+            if self._has_history: # Just suspended: drop history that will be stale on resume
+                self._has_history = False
+                for window in self._windows():
+                    window.clear()
+                for tracker in self.rule_inputs.values():
+                    tracker.refill(())
+            self.last_features = {"vehicle_speed": current_vehicle_speed}
+            self.monitor.last_triggered_rules = []
+            return ALERT_LEVEL_NONE, VEHICLE_STABILITY_ALERT_BASE_DESCRIPTIONS[ALERT_LEVEL_NONE] # Too slow for highway stability monitoring
+
+        simulated_str_angle = signals["STR_ANGLE"]
+        simulated_vsa_yaw_1 = signals["VSA_YAW_1"]
+        simulated_vsa_lat_g = signals["VSA_LAT_G"]
+        simulated_maeps_myu_value = signals["VSA_MAEPS_MYU_VALUE"]
+
+        # --- Manage rolling windows for all relevant signals ---
+        self._has_history = True
+        if self.keep_windows:
+            manage_rolling_window(self.str_angle_window, simulated_str_angle, current_sim_time, self.window_duration)
+            manage_rolling_window(self.vsa_lon_g_window, signals["VSA_LON_G"], current_sim_time, self.window_duration)
+            manage_rolling_window(self.vsa_lat_g_window, simulated_vsa_lat_g, current_sim_time, self.window_duration)
+            manage_rolling_window(self.vsa_yaw_1_window, simulated_vsa_yaw_1, current_sim_time, self.window_duration)
+            manage_rolling_window(self.fl_speed_window, simulated_fl_speed, current_sim_time, self.window_duration)
+            manage_rolling_window(self.fr_speed_window, simulated_fr_speed, current_sim_time, self.window_duration)
+            manage_rolling_window(self.rl_speed_window, simulated_rl_speed, current_sim_time, self.window_duration)
+            manage_rolling_window(self.rr_speed_window, simulated_rr_speed, current_sim_time, self.window_duration)
+            manage_rolling_window(self.maeps_myu_value_window, simulated_maeps_myu_value, current_sim_time, self.window_duration) # New window
+
+        # --- Calculate Derived Features for Rules ---
+        # Absolute values for comparison with thresholds (of the current sample, or the
+        # rolling statistic STABILITY_RULE_INPUT_STATISTICS selects)
+        abs_str_angle = abs(self._rule_input("STR_ANGLE", simulated_str_angle, current_sim_time))
+        abs_yaw_1 = abs(self._rule_input("VSA_YAW_1", simulated_vsa_yaw_1, current_sim_time))
+        abs_lat_g = abs(self._rule_input("VSA_LAT_G", simulated_vsa_lat_g, current_sim_time))
+        myu_value = self._rule_input("VSA_MAEPS_MYU_VALUE", simulated_maeps_myu_value, current_sim_time)
 
         # Max Axle Speed Difference (for skidding/hydroplaning)
         front_axle_diff = abs(simulated_fl_speed - simulated_fr_speed)
         rear_axle_diff = abs(simulated_rl_speed - simulated_rr_speed)
         max_axle_speed_diff = max(front_axle_diff, rear_axle_diff)
 
+        self.last_features = {
+            "vehicle_speed": current_vehicle_speed,
+            "max_axle_speed_diff": max_axle_speed_diff,
+            "myu_value": myu_value,
+        }
+
         # --- Apply Stability Monitoring Rules ---
-        current_alert_level, current_alert_description = stability_monitor.check_stability(
-            current_vehicle_speed, abs_str_angle, abs_yaw_1, abs_lat_g, max_axle_speed_diff, simulated_maeps_myu_value
+        if self.speed_gate is not None and self.speed_gate.warming_up(current_sim_time):
+            self.monitor.last_triggered_rules = []
+            return ALERT_LEVEL_NONE, VEHICLE_STABILITY_ALERT_BASE_DESCRIPTIONS[ALERT_LEVEL_NONE] # Windows still refilling
+        return self.monitor.check_stability(
+            current_vehicle_speed, abs_str_angle, abs_yaw_1, abs_lat_g, max_axle_speed_diff, myu_value
         )
 
-        # --- Print Simulation Status ---
+    def _rule_input(self, signal, value, current_sim_time):
+        tracker = self.rule_inputs.get(signal)
+        return value if tracker is None else tracker.update(value, current_sim_time)
+
+    def triggered_rules(self):
+        """Returns the detail keys of the rules triggered by the last process() call."""
+        return self.monitor.last_triggered_rules
+
+    # --- Checkpointing (see vehicle_logic/checkpoint.py) ---
+    def snapshot_state(self):
+        """Returns the window contents, speed gate and last results as plain data and arrays."""
+        return {
+            "windows": [snapshot_window(window) for window in self._windows()],
+            "speed_gate": dict(vars(self.speed_gate)) if self.speed_gate is not None else None,
+            "last_triggered_rules": list(self.monitor.last_triggered_rules),
+            "last_features": dict(self.last_features),
+        }
+
+    def restore_state(self, state, current_sim_time):
+        """Restores snapshot_state() output, discarding samples that are stale at current_sim_time."""
+        for window, snapshot in zip(self._windows(), state["windows"]):
+            restore_window(window, snapshot, current_sim_time, self.window_duration)
+        if self.speed_gate is not None and state["speed_gate"] is not None:
+            vars(self.speed_gate).update(state["speed_gate"])
+        signal_windows = {"STR_ANGLE": self.str_angle_window, "VSA_YAW_1": self.vsa_yaw_1_window,
+                          "VSA_LAT_G": self.vsa_lat_g_window, "VSA_MAEPS_MYU_VALUE": self.maeps_myu_value_window}
+        for signal, tracker in self.rule_inputs.items(): # Rebuilt from the restored windows
+            tracker.refill(signal_windows[signal])
+        self._has_history = True
+        self.monitor.last_triggered_rules = list(state["last_triggered_rules"])
+        self.last_features = dict(state["last_features"])
+
+    def alert_message(self, alert_level, alert_description):
+        """Returns the serial alert message for this result, or None if nothing should be sent."""
+        if alert_level != ALERT_LEVEL_NONE:
+            return f"ALERT: {alert_level} - {alert_description}"
+        return None
+
+    def print_status(self, current_sim_time, signals, alert_level, alert_description):
+        """Prints the simulation status for one tick."""
         print(f"Time: {current_sim_time:0.1f}s")
-        print(f"  Speed: {current_vehicle_speed:5.1f} km/h | STR_ANGLE: {simulated_str_angle:5.1f} deg | "
-              f"YAW_1: {simulated_vsa_yaw_1:5.1f} deg/s | LAT_G: {simulated_vsa_lat_g:5.1f} m/s^2")
-        print(f"  Wheel Speeds (FL/FR/RL/RR): {simulated_fl_speed:5.1f}/{simulated_fr_speed:5.1f}/{simulated_rl_speed:5.1f}/{simulated_rr_speed:5.1f} km/h | "
-              f"Max Axle Diff: {max_axle_speed_diff:5.1f} km/h")
-        print(f"  MYU Value: {simulated_maeps_myu_value:.2f}") # Print MYU value
-        print(f"  Alert Level: {current_alert_level} | Description: {current_alert_description}\n")
+        if "max_axle_speed_diff" not in self.last_features:
+            print(f"  Speed: {self.last_features['vehicle_speed']:5.1f} km/h | Stability monitoring suspended (below highway speed)")
+            print(f"  Alert Level: {alert_level} | Description: {alert_description}\n")
+            return
+        print(f"  Speed: {self.last_features['vehicle_speed']:5.1f} km/h | STR_ANGLE: {signals['STR_ANGLE']:5.1f} deg | "
+              f"YAW_1: {signals['VSA_YAW_1']:5.1f} deg/s | LAT_G: {signals['VSA_LAT_G']:5.1f} m/s^2")
+        print(f"  Wheel Speeds (FL/FR/RL/RR): {signals['VSA_ABS_FL_WHEEL_SPEED_255']:5.1f}/{signals['VSA_ABS_FR_WHEEL_SPEED_255']:5.1f}/"
+              f"{signals['VSA_ABS_RL_WHEEL_SPEED_255']:5.1f}/{signals['VSA_ABS_RR_WHEEL_SPEED_255']:5.1f} km/h | "
+              f"Max Axle Diff: {self.last_features['max_axle_speed_diff']:5.1f} km/h")
+        print(f"  MYU Value: {signals['VSA_MAEPS_MYU_VALUE']:.2f}") # Print MYU value
+        print(f"  Alert Level: {alert_level} | Description: {alert_description}\n")
+
+
+# --- Encapsulated Simulation Logic ---
+def run_simulation(clock=None, duration_s=SIMULATION_DURATION_S, sample_interval_s=CAN_SAMPLE_INTERVAL_S):
+    """
+    Runs the vehicle stability detection simulation.
+    This function simulates real-time data reception and processing,
+    with processing occurring every CAN_SAMPLE_INTERVAL_S.
+
+    Args:
+        clock: Simulation_Clock clock pacing the loop (default: RealTimeClock).
+        duration_s (float): Total simulated time in seconds.
+        sample_interval_s (float): Time between CAN samples in seconds.
+    """
+    clock = clock or RealTimeClock()
+    print(f"--- Simulating Vehicle Stability Monitoring for {duration_s}s ---")
+    print(f"CAN data simulated to arrive every {sample_interval_s}s.")
+    print(f"Rolling window duration: {WINDOW_DURATION_S}s.")
+
+    # Print the name of the module providing simulated signals
+    print(f"Simulated signals generated from module: {Read_Signal.__name__}\n")
+
+    pipeline = StabilityPipeline()
+
+    # We will use a simple counter for simulation time, as the clock paces the loop
+    current_sim_time = 0.0
+
+    while current_sim_time < duration_s:
+        signals = pipeline.read_signals(current_sim_time)
+        current_alert_level, current_alert_description = pipeline.process(current_sim_time, signals)
+
+        # --- Print Simulation Status ---
+        pipeline.print_status(current_sim_time, signals, current_alert_level, current_alert_description)
 
         # Advance simulation time for the next iteration
-        current_sim_time += CAN_SAMPLE_INTERVAL_S
-        
+        current_sim_time += sample_interval_s
+
         # Pause for the specified interval to simulate real-time data arrival
-        time.sleep(CAN_SAMPLE_INTERVAL_S)
+        clock.sleep(sample_interval_s)
 
     print("\n--- Simulation Ended ---")
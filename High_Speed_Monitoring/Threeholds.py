@@ -15,6 +15,24 @@ WHEEL_SLIP_THRESHOLD_KMH = 10  # km/h - Difference between wheel speeds indicati
 SMALL_STEERING_WINDOW_DEG = 3  # degrees - Steering angle considered "straight ahead" or minimal input
 SUSTAINED_DURATION_SEC = 0.5   # seconds - For how long a condition must persist (not directly used for instantaneous rules, but conceptually important)
 
+# --- Speed Gating (stability pipeline is suspended below highway speed) ---
+SPEED_GATE_RESUME_KMH = HIGH_SPEED_THRESHOLD_KMH - 10  # km/h - Resume window upkeep a little before the rules can fire
+SPEED_GATE_SUSPEND_KMH = HIGH_SPEED_THRESHOLD_KMH - 15 # km/h - Hysteresis: suspend only once clearly below
+SPEED_GATE_WARMUP_S = SHORT_WINDOW_DURATION_S          # seconds - Alerts are held this long after resuming
+
+# --- Rule Input Statistics ---
+# Signal -> value the stability rules compare with the thresholds above:
+#   "instant" - the current sample (default)
+#   "median"  - rolling median over STABILITY_ROBUST_WINDOW_S, so a single spiking
+#               sample cannot trigger a rule on its own ("pNN" = NN-th percentile)
+STABILITY_RULE_INPUT_STATISTICS = {
+    "STR_ANGLE": "instant",
+    "VSA_YAW_1": "instant",
+    "VSA_LAT_G": "instant",
+    "VSA_MAEPS_MYU_VALUE": "instant",
+}
+STABILITY_ROBUST_WINDOW_S = SHORT_WINDOW_DURATION_S # seconds
+
 # New threshold for friction coefficient
 LOW_FRICTION_THRESHOLD_MYU = 0.3 # Estimated friction coefficient below which grip is considered critically low
 
@@ -0,0 +1,49 @@
+# speed_gate.py
+#
+# Activity gate for monitors that can only fire above a speed. While the gate is
+# suspended the pipeline skips window upkeep and feature computation entirely;
+# hysteresis keeps it from flapping around the threshold, and after resuming the
+# windows get SPEED_GATE_WARMUP_S to refill before alerts are let through.
+
+from .Threeholds import SPEED_GATE_RESUME_KMH, SPEED_GATE_SUSPEND_KMH, SPEED_GATE_WARMUP_S
+
+
+class SpeedGate:
+    """
+    Hysteresis switch on vehicle speed.
+
+    Suspended -> active when speed >= resume_kmh; active -> suspended when
+    speed < suspend_kmh. resume_kmh must not exceed the speed the monitor
+    starts firing at, so a suspended monitor could never have alerted.
+    """
+    def __init__(self, resume_kmh=SPEED_GATE_RESUME_KMH, suspend_kmh=SPEED_GATE_SUSPEND_KMH,
+                 warmup_s=SPEED_GATE_WARMUP_S):
+        if suspend_kmh > resume_kmh:
+            raise ValueError("suspend_kmh must not be above resume_kmh")
+        self.resume_kmh = resume_kmh
+        self.suspend_kmh = suspend_kmh
+        self.warmup_s = warmup_s
+        self.active = False
+        self.active_since = None  # Time the gate last resumed
+        self.suspended_ticks = 0  # Ticks skipped so far (for profiling)
+
+    def update(self, vehicle_speed, current_timestamp):
+        """
+        Feeds one speed sample.
+
+        Returns:
+            bool: True if the pipeline should do its full work this tick.
+        """
+        if self.active:
+            if vehicle_speed < self.suspend_kmh:
+                self.active = False
+        elif not vehicle_speed < self.resume_kmh: # Written so an invalid (NaN) speed keeps the monitor running
+            self.active = True
+            self.active_since = current_timestamp
+        if not self.active:
+            self.suspended_ticks += 1
+        return self.active
+
+    def warming_up(self, current_timestamp):
+        """True while the windows are still refilling after the gate resumed."""
+        return self.active and current_timestamp - self.active_since < self.warmup_s
@@ -7,7 +7,7 @@ class VehicleStabilityMonitor:
     """
     def __init__(self):
         # Thresholds are imported from simulation_config.py
-        pass
+        self.last_triggered_rules = [] # Detail keys of the rules triggered by the last check
 
     def check_stability(self, vehicle_speed, abs_str_angle, abs_yaw_1, abs_lat_g, max_axle_speed_diff, myu_value):
         """
@@ -26,9 +26,11 @@ class VehicleStabilityMonitor:
         """
         current_alert_level = ALERT_LEVEL_NONE
         triggered_details = [] # Collect specific reasons for the alert
+        triggered_rules = [] # VEHICLE_STABILITY_DETAIL_DESCRIPTIONS keys, in rule order
 
         # System only activates under high-speed conditions
         if vehicle_speed < HIGH_SPEED_THRESHOLD_KMH:
+            self.last_triggered_rules = triggered_rules
             return ALERT_LEVEL_NONE, VEHICLE_STABILITY_ALERT_BASE_DESCRIPTIONS[ALERT_LEVEL_NONE] # Too slow for highway stability monitoring
 
            # --- Rule E1: Critically Low Road Friction (New Rule) ---
@@ -40,6 +42,7 @@ class VehicleStabilityMonitor:
                     myu_value=myu_value
                 )
             )
+            triggered_rules.append("LOW_ROAD_FRICTION")
             
         # --- Rule A1: High Yaw, Low Steering (Uncommanded Yaw / Oversteer / Spin) ---
         # This rule detects when the vehicle is rotating significantly (high yaw)
@@ -53,6 +56,7 @@ class VehicleStabilityMonitor:
                     abs_yaw_1=abs_yaw_1, abs_str_angle=abs_str_angle
                 )
             )
+            triggered_rules.append("HIGH_YAW_LOW_STEERING")
 
         # --- Rule C1: Asymmetric Wheel Speeds (Skidding/Hydroplaning) ---
         # This rule detects significant differences in wheel speeds across an axle,
@@ -68,6 +72,7 @@ class VehicleStabilityMonitor:
                     max_axle_speed_diff=max_axle_speed_diff
                 )
             )
+            triggered_rules.append("ASYMMETRIC_WHEEL_SPEEDS")
 
         # --- Additional Rule (Example: High Lateral G with Low Steering - Sliding) ---
         # This rule detects when the vehicle is experiencing significant side forces
@@ -86,11 +91,13 @@ class VehicleStabilityMonitor:
                     abs_lat_g=abs_lat_g
                 )
             )
+            triggered_rules.append("HIGH_LAT_G_LOW_STEERING")
 
         # Construct the final alert description
         current_alert_description = VEHICLE_STABILITY_ALERT_BASE_DESCRIPTIONS[current_alert_level]
         if triggered_details:
             current_alert_description += " Details: " + "; ".join(triggered_details)
 
+        self.last_triggered_rules = triggered_rules
         return current_alert_level, current_alert_description
 
@@ -16,6 +16,20 @@ SCENARIO_BOUNDARIES = [
     (120, float('inf'), SCENARIO_POST_FATIGUE_DRIVING) # From 120s onwards
 ]
 
+# --- Fault windows (start_s, end_s) used by the signal generators below ---
+# Faults are active strictly between start and end. These are the ground truth
+# for detection evaluation, so generators must read them from here.
+LOW_FRICTION_WINDOW = (60, 110)              # VSA_MAEPS_MYU_VALUE low (active from start_s)
+BRAKE_FLUID_LOW_WINDOW = (70, 150)           # METER_SW_STATUS_BRAKE_FLUID = 1
+MC_PRESSURE_SENSOR_FAULT_WINDOW = (100, 130) # VSA_MASTER_CYLINDER_PRESSURE stuck low
+BRAKE_WARNING_WINDOW = (70, 170)             # VSA_WARN_STATUS_BRAKE = 1
+ABS_WARNING_WINDOW = (100, 170)              # VSA_WARN_STATUS_ABS = 1
+TIRE_PUNCTURE_WINDOW = (80, 100)             # VSA_WARN_STATUS_PUNCTURE = 1
+
+def _in_fault_window(current_sim_time, window):
+    """True if the time lies strictly inside a (start_s, end_s) fault window."""
+    return window[0] < current_sim_time < window[1]
+
 def _get_current_scenario(current_sim_time):
     """
     Determines the current driving scenario based on simulation time.
@@ -160,10 +174,10 @@ def generate_simulated_vsa_maeps_myu_value(current_sim_time):
     Range: [-1.28|1.2799609375]. Typical values are 0.0 to 1.0+.
     Simulates varying road conditions.
     """
-    if current_sim_time < 60:
+    if current_sim_time < LOW_FRICTION_WINDOW[0]:
         # Normal dry road conditions
         return random.uniform(0.7, 0.9)
-    elif current_sim_time < 110:
+    elif current_sim_time < LOW_FRICTION_WINDOW[1]:
         # Simulate a patch of low friction (e.g., wet road, black ice)
         return random.uniform(0.2, 0.4)
     else:
@@ -177,7 +191,7 @@ def generate_simulated_meter_sw_status_brake_fluid(current_sim_time):
     SG_ METER_SW_STATUS_BRAKE_FLUID: 0=Normal, 1=Low
     Simulates low brake fluid after a certain time.
     """
-    if current_sim_time > 70 and current_sim_time < 150:
+    if _in_fault_window(current_sim_time, BRAKE_FLUID_LOW_WINDOW):
         return 1 # Simulate low brake fluid
     return 0 # Normal
 
@@ -197,7 +211,7 @@ def generate_simulated_vsa_master_cylinder_pressure(current_sim_time, brake_peda
     SG_ VSA_MASTER_CYLINDER_PRESSURE: kPa
     Simulates master cylinder pressure based on pedal input and introduces faults.
     """
-    if current_sim_time > 100 and current_sim_time < 130:
+    if _in_fault_window(current_sim_time, MC_PRESSURE_SENSOR_FAULT_WINDOW):
         # Simulate a pressure sensor fault (stuck at low value)
         return random.uniform(50, 150) # Very low pressure despite pedal
     
@@ -213,7 +227,7 @@ def generate_simulated_vsa_warn_status_brake(current_sim_time):
     SG_ VSA_WARN_STATUS_BRAKE: 0=Normal, 1=Warning
     Simulates general brake system warning.
     """
-    if current_sim_time > 70 and current_sim_time < 170: # Active during fluid low, MC fault, etc.
+    if _in_fault_window(current_sim_time, BRAKE_WARNING_WINDOW): # Active during fluid low, MC fault, etc.
         return 1
     return 0
 
@@ -224,7 +238,7 @@ def generate_simulated_vsa_warn_status_abs(current_sim_time):
     SG_ VSA_WARN_STATUS_ABS: 0=Normal, 1=Warning
     Simulates ABS (Anti-lock Brake System) warning.
     """
-    if current_sim_time > 100 and current_sim_time < 170: # Active during MC fault, etc.
+    if _in_fault_window(current_sim_time, ABS_WARNING_WINDOW): # Active during MC fault, etc.
         return 1
     return 0
 
@@ -234,6 +248,55 @@ def generate_simulated_vsa_warn_status_puncture(current_sim_time):
     SG_ VSA_WARN_STATUS_PUNCTURE: 0=Normal, 1=Puncture Warning
     Simulates a tire puncture warning.
     """
-    if current_sim_time > 80 and current_sim_time < 100:
+    if _in_fault_window(current_sim_time, TIRE_PUNCTURE_WINDOW):
         return 1 # Simulate a puncture
     return 0
+
+
+# --- Combined signal snapshot (used by recorders and batch tools) ---
+
+# DBC signal names in the order they are stored in recorded sessions
+SIGNAL_NAMES = [
+    "STR_ANGLE",
+    "VSA_LON_G",
+    "VSA_LAT_G",
+    "VSA_YAW_1",
+    "VSA_ABS_FL_WHEEL_SPEED_255",
+    "VSA_ABS_FR_WHEEL_SPEED_255",
+    "VSA_ABS_RL_WHEEL_SPEED_255",
+    "VSA_ABS_RR_WHEEL_SPEED_255",
+    "VSA_MAEPS_MYU_VALUE",
+    "METER_SW_STATUS_BRAKE_FLUID",
+    "ENG_SW_STATUS_BRAKE_NO",
+    "VSA_MASTER_CYLINDER_PRESSURE",
+    "VSA_WARN_STATUS_BRAKE",
+    "VSA_WARN_STATUS_ABS",
+    "VSA_WARN_STATUS_PUNCTURE",
+]
+
+def generate_all_signals(current_sim_time):
+    """
+    Generates one value for every signal in SIGNAL_NAMES at the given simulation time.
+
+    Returns:
+        dict: signal name -> simulated value
+    """
+    fl, fr, rl, rr = generate_simulated_wheel_speeds(current_sim_time)
+    brake_pedal = generate_simulated_eng_sw_status_brake_no(current_sim_time)
+    return {
+        "STR_ANGLE": generate_simulated_str_angle(current_sim_time),
+        "VSA_LON_G": generate_simulated_vsa_lon_g(current_sim_time),
+        "VSA_LAT_G": generate_simulated_vsa_lat_g(current_sim_time),
+        "VSA_YAW_1": generate_simulated_vsa_yaw_1(current_sim_time),
+        "VSA_ABS_FL_WHEEL_SPEED_255": fl,
+        "VSA_ABS_FR_WHEEL_SPEED_255": fr,
+        "VSA_ABS_RL_WHEEL_SPEED_255": rl,
+        "VSA_ABS_RR_WHEEL_SPEED_255": rr,
+        "VSA_MAEPS_MYU_VALUE": generate_simulated_vsa_maeps_myu_value(current_sim_time),
+        "METER_SW_STATUS_BRAKE_FLUID": generate_simulated_meter_sw_status_brake_fluid(current_sim_time),
+        "ENG_SW_STATUS_BRAKE_NO": brake_pedal,
+        "VSA_MASTER_CYLINDER_PRESSURE": generate_simulated_vsa_master_cylinder_pressure(current_sim_time, brake_pedal),
+        "VSA_WARN_STATUS_BRAKE": generate_simulated_vsa_warn_status_brake(current_sim_time),
+        "VSA_WARN_STATUS_ABS": generate_simulated_vsa_warn_status_abs(current_sim_time),
+        "VSA_WARN_STATUS_PUNCTURE": generate_simulated_vsa_warn_status_puncture(current_sim_time),
+    }
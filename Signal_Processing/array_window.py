@@ -0,0 +1,113 @@
+# array_window.py
+
+import numpy as np
+
+# --- Array-Backed Rolling Window ---
+class ArrayWindow:
+    """
+    Time-based rolling window for micro-batched samples.
+
+    Same retention rule as manage_rolling_window() (keep samples with
+    newest_timestamp - timestamp <= window_duration), but samples are appended a
+    whole batch at a time into preallocated arrays. Running prefix sums of the
+    values are kept next to them, so the STD of every new sample's window costs
+    O(batch) instead of O(window). The live region is moved back to the front of
+    the buffer (and the prefix sums rebuilt around its mean) only when the buffer
+    fills up, which keeps both the copy cost and floating-point drift bounded.
+
+    With an encoding (a signal_encoding.SignalEncoding) the values are stored as
+    DBC raw codes (int16 / uint8 instead of float64); the sums run on the codes
+    and only the resulting STD is scaled by the encoding's factor.
+    """
+    def __init__(self, window_duration, initial_capacity=1024, encoding=None):
+        self.window_duration = window_duration
+        self.encoding = encoding
+        self._allocate(initial_capacity)
+        self._start = 0 # Index of the oldest retained sample
+        self._end = 0   # One past the newest sample
+        self._shift = 0.0 # Values are centred on this before summing
+
+    def _allocate(self, capacity):
+        self._values = np.empty(capacity, dtype=self.encoding.dtype if self.encoding else np.float64)
+        self._timestamps = np.empty(capacity)
+        self._sum_1 = np.zeros(capacity + 1) # _sum_1[i] = sum of centred values[0:i]
+        self._sum_2 = np.zeros(capacity + 1) # _sum_2[i] = sum of squared centred values[0:i]
+
+    def __len__(self):
+        return self._end - self._start
+
+    def values(self):
+        """Returns a view of the retained values (oldest first; raw codes if the window has an encoding)."""
+        return self._values[self._start:self._end]
+
+    def timestamps(self):
+        """Returns a view of the retained timestamps (oldest first)."""
+        return self._timestamps[self._start:self._end]
+
+    def _make_room(self, count):
+        """Moves the live region to the front (growing the buffer if needed) and rebuilds the sums."""
+        live_values = self.values().copy()
+        live_timestamps = self.timestamps().copy()
+        live = live_values.size
+        capacity = self._values.size
+        if live + count > capacity // 2:
+            self._allocate(max(2 * capacity, 2 * (live + count)))
+        self._values[:live] = live_values
+        self._timestamps[:live] = live_timestamps
+        self._shift = float(live_values.mean()) if live else 0.0
+        centred = live_values.astype(np.float64, copy=False) - self._shift
+        self._sum_1[0] = self._sum_2[0] = 0.0
+        np.cumsum(centred, out=self._sum_1[1:live + 1])
+        np.cumsum(centred * centred, out=self._sum_2[1:live + 1])
+        self._start, self._end = 0, live
+
+    def extend(self, values, timestamps):
+        """
+        Appends a batch of samples and prunes samples that left the window.
+
+        Args:
+            values (np.ndarray): New values (oldest first). With an encoding, physical
+                                 values are encoded; integer arrays are taken as raw codes.
+            timestamps (np.ndarray): Their timestamps (sorted, not older than the newest retained sample).
+
+        Returns:
+            np.ndarray: sample STD (ddof=1) of the window as seen by each new sample
+                        (0.0 while fewer than 2 points), like calculate_std() per tick.
+        """
+        if self.encoding is None:
+            values = np.asarray(values, dtype=np.float64)
+        else:
+            values = np.asarray(values)
+            if not np.issubdtype(values.dtype, np.integer):
+                values = self.encoding.encode(values)
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        count = values.size
+        if count == 0:
+            return np.zeros(0)
+        if self._end + count > self._values.size:
+            self._make_room(count)
+
+        first, last = self._end, self._end + count
+        self._values[first:last] = values
+        self._timestamps[first:last] = timestamps
+        centred = values.astype(np.float64, copy=False) - self._shift
+        self._sum_1[first + 1:last + 1] = self._sum_1[first] + np.cumsum(centred)
+        self._sum_2[first + 1:last + 1] = self._sum_2[first] + np.cumsum(centred * centred)
+        self._end = last
+
+        # Window start of every new sample (timestamps are sorted, so starts are too)
+        starts = self._start + np.searchsorted(self._timestamps[self._start:last],
+                                               timestamps - self.window_duration, side="left")
+        ends = np.arange(first + 1, last + 1)
+        counts = ends - starts
+        window_sum = self._sum_1[ends] - self._sum_1[starts]
+        window_sum_sq = self._sum_2[ends] - self._sum_2[starts]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = (window_sum_sq - window_sum * window_sum / counts) / (counts - 1)
+        std = np.sqrt(np.clip(variance, 0.0, None))
+        std[counts < 2] = 0.0
+        if self.encoding is not None:
+            std *= self.encoding.factor # STD of raw codes -> physical units (the offset cancels)
+
+        self._start = int(starts[-1]) # Prune everything the newest sample no longer sees
+        return std
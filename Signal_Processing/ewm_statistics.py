@@ -0,0 +1,81 @@
+# ewm_statistics.py
+#
+# Constant-memory alternative to the (value, timestamp) windows: an
+# exponentially weighted moving mean and variance per signal. Each sample
+# is weighted by exp(-age / time_constant), so irregular timestamps are
+# handled by decaying the old estimate by the actual time since the last
+# sample. Memory is a few floats per signal regardless of the sample rate.
+
+import math
+
+FEATURE_MODES = ("window", "ewm") # Exact rolling windows / exponentially weighted statistics
+
+
+def matched_time_constant(window_duration):
+    """
+    Returns the time constant whose weighting has the same mean sample age
+    (window_duration / 2) as a uniform window, so features lag changes alike.
+    """
+    return window_duration / 2.0
+
+
+class EwmStatistics:
+    """
+    Exponentially weighted mean, variance and STD of one signal.
+
+    For a sample arriving dt after the previous one the update is
+        alpha = 1 - exp(-dt / time_constant)
+        mean += alpha * (x - mean)
+        variance = (1 - alpha) * (variance + alpha * (x - mean_old)^2)
+    (the incremental form of an exponentially weighted variance). NaN samples
+    (missing data) are skipped.
+
+    Args:
+        time_constant_s (float): Time for a sample's weight to fall to 1/e.
+    """
+    def __init__(self, time_constant_s):
+        self.time_constant_s = time_constant_s
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0 # Samples seen (STD is reported once there are 2, like calculate_std())
+        self.last_timestamp = None
+
+    def update(self, value, current_timestamp):
+        """
+        Adds one sample.
+
+        Returns:
+            float: exponentially weighted STD after the sample.
+        """
+        if value != value: # Skip NaN
+            return self.std()
+        if self.count == 0:
+            self.mean = value
+            self.variance = 0.0
+        else:
+            dt = max(0.0, current_timestamp - self.last_timestamp)
+            alpha = -math.expm1(-dt / self.time_constant_s)
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1.0 - alpha) * (self.variance + diff * increment)
+        self.count += 1
+        self.last_timestamp = current_timestamp
+        return self.std()
+
+    def update_many(self, values, timestamps):
+        """
+        Feeds a block of samples in order.
+
+        Returns:
+            np.ndarray: STD after each sample.
+        """
+        import numpy as np # Imported lazily, like calculate_std(), to keep startup fast
+        return np.array([self.update(value, timestamp) for value, timestamp in
+                         zip(np.asarray(values, dtype=np.float64).tolist(), np.asarray(timestamps).tolist())],
+                        dtype=np.float64)
+
+    def std(self):
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.variance)
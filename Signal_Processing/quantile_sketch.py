@@ -0,0 +1,333 @@
+# quantile_sketch.py
+#
+# Mergeable quantile sketches (DDSketch) for fleet-wide feature distributions.
+# Every value lands in a logarithmic bucket, so any quantile is returned within
+# a fixed relative error (1% by default) while memory stays bounded by the
+# number of buckets, not the number of values. Two sketches with the same
+# accuracy merge by adding their bucket counts, so per-vehicle or per-worker
+# sketches can be serialized, shipped and combined into fleet percentiles.
+
+import math
+import struct
+
+import numpy as np
+
+DEFAULT_RELATIVE_ACCURACY = 0.01
+DEFAULT_MAX_BUCKETS = 2048      # Per sign; beyond this the lowest buckets are collapsed
+MIN_INDEXABLE_VALUE = 1e-9      # |values| below this are counted as zero
+_GROWTH_MARGIN = 32             # Extra buckets allocated when a store has to grow
+
+_HEADER = struct.Struct("<4sdqdddqqqq") # magic, accuracy, zero count, min, max, sum, pos/neg offset and length
+_MAGIC = b"DDS1"
+
+
+# --- Bucket Store ---
+class _DenseStore:
+    """Contiguous bucket counts for one sign; counts[i] belongs to bucket offset + i."""
+    def __init__(self, max_buckets):
+        self.max_buckets = max_buckets
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.offset = 0
+
+    def _extend(self, low, high):
+        """Makes room for buckets low..high (inclusive), collapsing the lowest ones past max_buckets."""
+        if self.counts.size:
+            low = min(low, self.offset)
+            high = max(high, self.offset + self.counts.size - 1)
+        span = high - low + 1
+        if span > self.max_buckets:
+            new_low, new_high = high - self.max_buckets + 1, high # Keep the upper buckets (DDSketch's lowest-bucket collapse)
+        else:
+            margin = min(_GROWTH_MARGIN, (self.max_buckets - span) // 2) # Headroom so a drifting range rarely reallocates
+            new_low, new_high = low - margin, high + margin
+        counts = np.zeros(new_high - new_low + 1, dtype=np.int64)
+        if self.counts.size:
+            old_low, old_high = self.offset, self.offset + self.counts.size - 1
+            kept_low = max(old_low, new_low)
+            if old_high < kept_low: # Every old bucket is below the kept range: all collapse
+                counts[0] += self.counts.sum()
+            else:
+                if kept_low > old_low: # Collapsed buckets go into the lowest kept one
+                    counts[0] += self.counts[:kept_low - old_low].sum()
+                counts[kept_low - new_low:old_high - new_low + 1] += self.counts[kept_low - old_low:]
+        self.counts, self.offset = counts, new_low
+
+    def add(self, index, count=1):
+        position = index - self.offset
+        if position < 0 or position >= self.counts.size:
+            self._extend(index, index)
+            position = max(0, index - self.offset)
+        self.counts[position] += count
+
+    def add_counts(self, low, counts):
+        """Adds a contiguous run of bucket counts starting at bucket low."""
+        if counts.size == 0:
+            return
+        high = low + counts.size - 1
+        if self.counts.size == 0 or low < self.offset or high >= self.offset + self.counts.size:
+            self._extend(low, high)
+        start = low - self.offset
+        if start < 0: # Part of the run falls in collapsed buckets
+            self.counts[0] += counts[:-start].sum()
+            counts, start = counts[-start:], 0
+        self.counts[start:start + counts.size] += counts
+
+    def trimmed(self):
+        """Returns (offset, counts) without leading/trailing empty buckets."""
+        nonzero = np.flatnonzero(self.counts)
+        if nonzero.size == 0:
+            return 0, np.zeros(0, dtype=np.int64)
+        return self.offset + int(nonzero[0]), self.counts[nonzero[0]:nonzero[-1] + 1]
+
+
+# --- Sketch ---
+class DDSketch:
+    """
+    Quantile sketch with relative accuracy guarantees.
+
+    Args:
+        relative_accuracy (float): Quantiles are within this relative error of an exact value.
+        max_buckets (int): Bucket limit per sign (bounds memory; past it the lowest
+                           buckets merge, which only affects the lowest quantiles).
+    """
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, max_buckets=DEFAULT_MAX_BUCKETS):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1.0 + relative_accuracy) / (1.0 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.max_buckets = max_buckets
+        self.positive = _DenseStore(max_buckets)
+        self.negative = _DenseStore(max_buckets) # Buckets of -value
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.sum = 0.0
+
+    def _index(self, magnitude):
+        return math.ceil(math.log(magnitude) / self._log_gamma)
+
+    def _value(self, index):
+        return 2.0 * self.gamma ** index / (self.gamma + 1.0) # Midpoint (in relative terms) of the bucket
+
+    def add(self, value):
+        """Adds one value (NaN is ignored)."""
+        if value != value:
+            return
+        if value > MIN_INDEXABLE_VALUE:
+            self.positive.add(self._index(value))
+        elif value < -MIN_INDEXABLE_VALUE:
+            self.negative.add(self._index(-value))
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def add_many(self, values):
+        """Adds an array of values in one vectorized pass (NaNs are ignored)."""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        for store, magnitudes in ((self.positive, values[values > MIN_INDEXABLE_VALUE]),
+                                  (self.negative, -values[values < -MIN_INDEXABLE_VALUE])):
+            if magnitudes.size:
+                indices = np.ceil(np.log(magnitudes) / self._log_gamma).astype(np.int64)
+                low = int(indices.min())
+                store.add_counts(low, np.bincount(indices - low))
+        self.zero_count += int(np.count_nonzero(np.abs(values) <= MIN_INDEXABLE_VALUE))
+        self.count += int(values.size)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        """Adds another sketch's values into this one (both must have the same accuracy)."""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        if other.count == 0:
+            return self
+        self.positive.add_counts(*other.positive.trimmed())
+        self.negative.add_counts(*other.negative.trimmed())
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """
+        Returns the estimated q-quantile (0 <= q <= 1), or None for an empty sketch.
+        """
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        negative_offset, negative_counts = self.negative.trimmed()
+        negative_total = int(negative_counts.sum())
+        if rank < negative_total: # Negative buckets run from the most negative value up
+            cumulative = np.cumsum(negative_counts[::-1])
+            position = int(np.searchsorted(cumulative, rank, side="right"))
+            value = -self._value(negative_offset + negative_counts.size - 1 - position)
+        elif rank < negative_total + self.zero_count:
+            value = 0.0
+        else:
+            positive_offset, positive_counts = self.positive.trimmed()
+            cumulative = np.cumsum(positive_counts)
+            position = int(np.searchsorted(cumulative, rank - negative_total - self.zero_count, side="right"))
+            value = self._value(positive_offset + min(position, positive_counts.size - 1))
+        return min(max(value, self.min), self.max)
+
+    def quantiles(self, qs):
+        return [self.quantile(q) for q in qs]
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    # --- Serialization ---
+    def to_bytes(self):
+        """Compact binary form (header + non-empty bucket range of each sign)."""
+        positive_offset, positive_counts = self.positive.trimmed()
+        negative_offset, negative_counts = self.negative.trimmed()
+        header = _HEADER.pack(_MAGIC, self.relative_accuracy, self.zero_count, self.min, self.max, self.sum,
+                              positive_offset, positive_counts.size, negative_offset, negative_counts.size)
+        return header + positive_counts.astype("<i8").tobytes() + negative_counts.astype("<i8").tobytes()
+
+    @classmethod
+    def from_bytes(cls, data, max_buckets=DEFAULT_MAX_BUCKETS):
+        (magic, accuracy, zero_count, minimum, maximum, total,
+         positive_offset, positive_size, negative_offset, negative_size) = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("Not a serialized DDSketch")
+        sketch = cls(accuracy, max_buckets)
+        counts = np.frombuffer(data, dtype="<i8", count=positive_size + negative_size, offset=_HEADER.size)
+        sketch.positive.add_counts(positive_offset, counts[:positive_size].astype(np.int64))
+        sketch.negative.add_counts(negative_offset, counts[positive_size:].astype(np.int64))
+        sketch.zero_count = zero_count
+        sketch.count = zero_count + int(counts.sum())
+        sketch.min, sketch.max, sketch.sum = minimum, maximum, total
+        return sketch
+
+
+def merge_sketches(sketches):
+    """
+    Merges many sketches into a new one in a single pass: the bucket range of the
+    result is sized once and every input's counts are added as one array slice.
+
+    Returns:
+        DDSketch: the combined sketch (empty if no sketches are given).
+    """
+    sketches = list(sketches)
+    if not sketches:
+        return DDSketch()
+    result = DDSketch(sketches[0].relative_accuracy, sketches[0].max_buckets)
+    for sign in ("positive", "negative"):
+        runs = [getattr(sketch, sign).trimmed() for sketch in sketches]
+        runs = [(low, counts) for low, counts in runs if counts.size]
+        if not runs:
+            continue
+        low = min(offset for offset, _ in runs)
+        high = max(offset + counts.size - 1 for offset, counts in runs)
+        combined = np.zeros(high - low + 1, dtype=np.int64)
+        for offset, counts in runs:
+            combined[offset - low:offset - low + counts.size] += counts
+        getattr(result, sign).add_counts(low, combined)
+    for sketch in sketches:
+        if sketch.gamma != result.gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        result.zero_count += sketch.zero_count
+        result.count += sketch.count
+        result.sum += sketch.sum
+        result.min = min(result.min, sketch.min)
+        result.max = max(result.max, sketch.max)
+    return result
+
+
+# --- Per-Monitor Feature Sketches ---
+class FeatureSketches:
+    """
+    One DDSketch per "monitor.feature" key.
+
+    Pipelines list the features worth sketching in sketch_features and expose their
+    latest values in last_features; update(pipeline) adds those values after a tick.
+    """
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.sketches = {}
+
+    def sketch(self, key):
+        sketch = self.sketches.get(key)
+        if sketch is None:
+            sketch = self.sketches[key] = DDSketch(self.relative_accuracy)
+        return sketch
+
+    def update(self, pipeline):
+        """Adds the pipeline's sketched features from its last tick (missing ones are skipped)."""
+        features = pipeline.last_features
+        for feature in pipeline.sketch_features:
+            value = features.get(feature)
+            if value is not None:
+                self.sketch(f"{pipeline.name}.{feature}").add(value)
+
+    def merge(self, other):
+        for key, sketch in other.sketches.items():
+            self.sketch(key).merge(sketch)
+        return self
+
+    def summary(self, qs=(0.5, 0.9, 0.95, 0.99)):
+        """
+        Returns:
+            dict: key -> {"count", "min", "max", "mean", "p50", ...} for every sketch.
+        """
+        return {key: dict({"count": sketch.count, "min": sketch.min, "max": sketch.max, "mean": sketch.mean},
+                          **{f"p{q * 100:g}": value for q, value in zip(qs, sketch.quantiles(qs))})
+                for key, sketch in sorted(self.sketches.items())}
+
+    def to_bytes(self):
+        parts = [struct.pack("<I", len(self.sketches))]
+        for key, sketch in sorted(self.sketches.items()):
+            name, data = key.encode("utf-8"), sketch.to_bytes()
+            parts.append(struct.pack("<II", len(name), len(data)) + name + data)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        sketches = cls()
+        (entries,) = struct.unpack_from("<I", data)
+        position = 4
+        for _ in range(entries):
+            name_size, data_size = struct.unpack_from("<II", data, position)
+            position += 8
+            key = bytes(data[position:position + name_size]).decode("utf-8")
+            position += name_size
+            sketch = DDSketch.from_bytes(bytes(data[position:position + data_size]))
+            position += data_size
+            sketches.relative_accuracy = sketch.relative_accuracy
+            sketches.sketches[key] = sketch
+        return sketches
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def merge_feature_sketches(collections):
+    """Merges FeatureSketches (e.g. one per vehicle) key by key with merge_sketches()."""
+    by_key = {}
+    for sketches in collections:
+        for key, sketch in sketches.sketches.items():
+            by_key.setdefault(key, []).append(sketch)
+    merged = FeatureSketches()
+    merged.sketches = {key: merge_sketches(group) for key, group in by_key.items()}
+    if merged.sketches:
+        merged.relative_accuracy = next(iter(merged.sketches.values())).relative_accuracy
+    return merged
@@ -0,0 +1,55 @@
+# rolling_features.py
+
+import numpy as np
+
+# --- Vectorized Time-Based Window Features ---
+# These reproduce manage_rolling_window()/calculate_std() from the runners for a
+# whole array of samples at once: the window of sample i holds every sample j <= i
+# with timestamps[i] - timestamps[j] <= window_duration.
+
+def window_start_indices(timestamps, window_duration):
+    """
+    Returns, for every sample, the index of the oldest sample still inside its window.
+
+    Args:
+        timestamps (np.ndarray): Sorted sample timestamps in seconds.
+        window_duration (float): Rolling window duration in seconds.
+
+    Returns:
+        np.ndarray: int64 start index for each sample.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    return np.searchsorted(timestamps, timestamps - window_duration, side="left")
+
+
+def rolling_std(values, timestamps, window_duration):
+    """
+    Calculates the rolling sample standard deviation (ddof=1) for every sample.
+
+    Uses prefix sums of the mean-centred values, so the cost is O(n) for the whole
+    array regardless of how many samples each window holds.
+
+    Args:
+        values (np.ndarray): Signal values.
+        timestamps (np.ndarray): Sorted sample timestamps in seconds.
+        window_duration (float): Rolling window duration in seconds.
+
+    Returns:
+        np.ndarray: STD of each sample's window (0.0 while fewer than 2 points).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return np.zeros(0)
+    starts = window_start_indices(timestamps, window_duration)
+    ends = np.arange(1, values.size + 1)
+    centred = values - values.mean() # Centring keeps the prefix sums well conditioned
+    sum_1 = np.concatenate(([0.0], np.cumsum(centred)))
+    sum_2 = np.concatenate(([0.0], np.cumsum(centred * centred)))
+    counts = ends - starts
+    window_sum = sum_1[ends] - sum_1[starts]
+    window_sum_sq = sum_2[ends] - sum_2[starts]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (window_sum_sq - window_sum * window_sum / counts) / (counts - 1)
+    std = np.sqrt(np.clip(variance, 0.0, None))
+    std[counts < 2] = 0.0 # Same fallback as calculate_std()
+    return std
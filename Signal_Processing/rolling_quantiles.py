@@ -0,0 +1,280 @@
+# rolling_quantiles.py
+#
+# Rolling median, MAD and percentiles over the same time-based windows as
+# manage_rolling_window(). The window's values are kept in order in an
+# indexable skiplist, so adding / expiring a sample and reading any order
+# statistic cost O(log n); the MAD is a k-th smallest selection over the
+# deviations on either side of the median, O(log^2 n). Nothing is sorted per tick.
+
+import collections
+import math
+import random
+
+# Statistics that estimate the standard deviation of normally distributed data,
+# so the STD threshold tables keep their meaning when a robust one is selected
+ROBUST_SIGMA_SCALES = {
+    "mad": 1.482602218505602, # 1 / Phi^-1(0.75)
+    "iqr": 0.741301109252801, # 1 / (2 * Phi^-1(0.75))
+}
+
+
+# --- Indexable Skiplist ---
+class _End:
+    """Sentinel value that sorts after every sample."""
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return False
+
+
+class _Node:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value, next_nodes, widths):
+        self.value = value
+        self.next = next_nodes
+        self.width = widths # width[level] = positions skipped by next[level]
+
+
+_NIL = _Node(_End(), [], [])
+
+
+class IndexableSkiplist:
+    """
+    Sorted multiset with O(log n) insert, remove and access by rank.
+
+    Each link stores how many positions it skips, so the i-th smallest value is
+    found by walking down the levels like a binary search. Node heights are drawn
+    from a private random generator, so the simulators' global random state is
+    never touched.
+
+    Args:
+        max_levels (int): Number of levels; O(log n) holds up to about 2 ** max_levels values.
+    """
+    def __init__(self, max_levels=16, seed=0):
+        self.max_levels = max_levels
+        self.size = 0
+        self._head = _Node(None, [_NIL] * max_levels, [1] * max_levels)
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError("skiplist index out of range")
+        node = self._head
+        index += 1
+        for level in range(self.max_levels - 1, -1, -1):
+            width = node.width[level]
+            while width <= index:
+                index -= width
+                node = node.next[level]
+                width = node.width[level]
+        return node.value
+
+    def __iter__(self):
+        node = self._head.next[0]
+        while node is not _NIL:
+            yield node.value
+            node = node.next[0]
+
+    def insert(self, value):
+        chain = [None] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        height = min(self.max_levels, 1 - int(math.log(1.0 - self._random.random(), 2.0)))
+        new_node = _Node(value, [None] * height, [None] * height)
+        steps = 0
+        for level in range(height):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, self.max_levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value):
+        """Removes one occurrence of value (KeyError if it is not present)."""
+        chain = [None] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        if target is _NIL or target.value != value:
+            raise KeyError(value)
+
+        for level in range(len(target.next)):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(len(target.next), self.max_levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+def _kth_smallest_of_two(k, a, a_len, b, b_len):
+    """
+    Returns the k-th and (k+1)-th smallest (0-based) elements of two ascending
+    sequences given as index -> value functions, with O(log n) element accesses
+    (the (k+1)-th is None if there are only k+1 elements).
+    """
+    low, high = max(0, k + 1 - b_len), min(k + 1, a_len) # Elements taken from a
+    while low < high:
+        taken = (low + high) // 2
+        if a(taken) < b(k - taken): # a's next element is below b's last taken one: take more of a
+            low = taken + 1
+        else:
+            high = taken
+    taken_b = k + 1 - low
+    candidates = []
+    if low > 0:
+        candidates.append(a(low - 1))
+    if taken_b > 0:
+        candidates.append(b(taken_b - 1))
+    following = []
+    if low < a_len:
+        following.append(a(low))
+    if taken_b < b_len:
+        following.append(b(taken_b))
+    return max(candidates), min(following) if following else None
+
+
+# --- Rolling Order Statistics ---
+class RollingQuantiles:
+    """
+    Median, MAD and percentiles of a time-based rolling window.
+
+    Same retention rule as manage_rolling_window() (keep samples with
+    current_timestamp - timestamp <= window_duration). NaN samples (missing
+    data) are not added to the window. Results match np.median / np.percentile
+    (linear interpolation) over the window's values.
+
+    Args:
+        window_duration (float): Rolling window duration in seconds.
+        statistic (str): What update() returns; see window_statistic().
+    """
+    def __init__(self, window_duration, statistic="median"):
+        self.window_duration = window_duration
+        self.statistic = statistic
+        self._compute = self._statistic_function(statistic)
+        self._window = collections.deque() # (value, timestamp), oldest first
+        self._sorted = IndexableSkiplist()
+
+    def _statistic_function(self, statistic):
+        if statistic == "median":
+            return self.median
+        if statistic == "mad":
+            return lambda: self.mad() * ROBUST_SIGMA_SCALES["mad"]
+        if statistic == "iqr":
+            return lambda: (self.quantile(0.75) - self.quantile(0.25)) * ROBUST_SIGMA_SCALES["iqr"]
+        if statistic.startswith("p"):
+            q = float(statistic[1:]) / 100.0
+            if 0.0 <= q <= 1.0:
+                return lambda: self.quantile(q)
+        raise ValueError(f"Unknown window statistic: {statistic}")
+
+    def __len__(self):
+        return len(self._window)
+
+    def update(self, value, current_timestamp):
+        """
+        Adds one sample and drops samples that left the window.
+
+        Returns:
+            float: the configured statistic of the window (0.0 while it is empty).
+        """
+        if value == value: # Skip NaN
+            self._window.append((value, current_timestamp))
+            self._sorted.insert(value)
+        window = self._window
+        while window and current_timestamp - window[0][1] > self.window_duration:
+            self._sorted.remove(window.popleft()[0])
+        return self._compute()
+
+    def extend(self, values, timestamps):
+        """
+        Feeds a block of samples in order (same interface as ArrayWindow.extend()).
+
+        Returns:
+            np.ndarray: the configured statistic as seen by each new sample.
+        """
+        import numpy as np # Imported lazily, like calculate_std(), to keep startup fast
+        return np.array([self.update(value, timestamp) for value, timestamp in
+                         zip(np.asarray(values, dtype=np.float64).tolist(), np.asarray(timestamps).tolist())],
+                        dtype=np.float64)
+
+    def value(self):
+        """Returns the configured statistic of the current window."""
+        return self._compute()
+
+    def quantile(self, q):
+        """Returns the q-quantile (0.0-1.0) of the window, linearly interpolated (0.0 while empty)."""
+        count = len(self._sorted)
+        if count == 0:
+            return 0.0
+        position = q * (count - 1)
+        lower = int(position)
+        fraction = position - lower
+        low_value = self._sorted[lower]
+        if fraction == 0.0:
+            return low_value
+        return low_value + fraction * (self._sorted[lower + 1] - low_value)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def mad(self):
+        """
+        Returns the median absolute deviation from the median (unscaled; multiply by
+        ROBUST_SIGMA_SCALES["mad"] for a normal-consistent STD estimate).
+        """
+        count = len(self._sorted)
+        if count < 2:
+            return 0.0
+        values = self._sorted
+        median = self.median()
+        half = count // 2
+        # Deviations below the median, ascending: median - values[half - 1 - i]
+        # Deviations above the median, ascending: values[half + i] - median
+        below = lambda i: median - values[half - 1 - i]
+        above = lambda i: values[half + i] - median
+        lower, upper = _kth_smallest_of_two((count - 1) // 2, below, half, above, count - half)
+        if count % 2:
+            return lower
+        return (lower + upper) / 2.0
+
+    def refill(self, window):
+        """Replaces the contents with the samples of a manage_rolling_window() deque (e.g. after a restore)."""
+        self._window.clear()
+        self._sorted = IndexableSkiplist()
+        if not window:
+            return
+        newest = window[-1][1]
+        for value, timestamp in window:
+            if value == value and newest - timestamp <= self.window_duration:
+                self._window.append((value, timestamp))
+                self._sorted.insert(value)
+
+
+def window_statistic(table, default="std"):
+    """
+    Returns the window statistic a threshold table selects with its optional
+    "STATISTIC" key: "std" (calculate_std), "mad" or "iqr" (robust STD estimates,
+    scaled to match the STD of normal data), "median", or "pNN" (NN-th percentile).
+    """
+    return table.get("STATISTIC", default)
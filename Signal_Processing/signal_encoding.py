@@ -0,0 +1,139 @@
+# signal_encoding.py
+#
+# Compact fixed-point storage of CAN signals using their DBC raw encoding:
+#     physical = raw * factor + offset
+# Raw codes are kept in the smallest integer dtype that holds the DBC range
+# (int16 / uint16 / uint8 instead of float64), and are scaled back to physical
+# units only inside vectorized reductions or when a caller asks for floats.
+#
+# Where the encodings apply: ArrayWindow(encoding=...) (the STD windows of
+# MicroBatchPipeline(compact=True)) and save_session(..., compact=True)
+# recordings. The per-tick runners (braking, stability, alertness, and the
+# process pipeline's workers) still keep their windows as deques of Python
+# floats: a Python int object is no smaller than a float, so raw codes would not
+# save memory there, and those windows stay in full float precision.
+#
+# Values outside a signal's DBC range saturate at the range ends (a wheel speed
+# above 255 km/h is stored as 255), as the ECU would transmit them; use
+# count_saturated() to check how many values a column loses that way.
+
+import numpy as np
+
+
+class SignalEncoding:
+    """
+    DBC scaling of one signal.
+
+    Args:
+        factor (float): Physical units per raw count (the DBC resolution).
+        offset (float): Physical value of raw code 0.
+        dtype: NumPy integer dtype of the raw code.
+        raw_min (int): Smallest raw code the DBC range allows.
+        raw_max (int): Largest raw code the DBC range allows.
+    """
+    def __init__(self, factor, offset, dtype, raw_min, raw_max):
+        self.factor = factor
+        self.offset = offset
+        self.dtype = np.dtype(dtype)
+        self.raw_min = raw_min
+        self.raw_max = raw_max
+
+    @property
+    def physical_range(self):
+        return (self.raw_min * self.factor + self.offset, self.raw_max * self.factor + self.offset)
+
+    def _raw_counts(self, values):
+        """Physical values -> unclamped raw counts (float64, rounded to the nearest count)."""
+        return np.rint((np.asarray(values, dtype=np.float64) - self.offset) / self.factor)
+
+    def encode(self, values):
+        """
+        Converts physical values to raw codes, rounded to the nearest count.
+
+        Values outside the DBC range saturate at raw_min / raw_max. NaN has no raw
+        code (and would otherwise cast to an arbitrary integer), so it is rejected.
+
+        Returns:
+            np.ndarray: raw codes in self.dtype.
+
+        Raises:
+            ValueError: if any value is NaN.
+        """
+        raw = self._raw_counts(values)
+        if np.isnan(raw).any():
+            raise ValueError("NaN cannot be stored as a DBC raw code")
+        return np.clip(raw, self.raw_min, self.raw_max).astype(self.dtype)
+
+    def count_saturated(self, values):
+        """Number of values that encode() saturates at the ends of the DBC range."""
+        raw = self._raw_counts(values)
+        return int(np.count_nonzero((raw < self.raw_min) | (raw > self.raw_max)))
+
+    def decode(self, raw):
+        """Converts raw codes back to physical float64 values."""
+        return np.asarray(raw, dtype=np.float64) * self.factor + self.offset
+
+
+# --- DBC Encodings (ranges from the Read_Signal generator docstrings) ---
+# 10-bit signed signals (LAT/LON G, YAW) have factor = |min| / 512, MYU is a
+# 16-bit signed value with factor 1/25600. Signals whose DBC range is not
+# documented use the smallest dtype holding what the vehicle can report.
+_G_ENCODING = SignalEncoding(24.5 / 512, 0.0, np.int16, -512, 511)           # [-24.5|24.452148949] m/s^2
+_WHEEL_SPEED_ENCODING = SignalEncoding(1.0, 0.0, np.uint8, 0, 255)           # [0|255] km/h
+_STATUS_BIT_ENCODING = SignalEncoding(1.0, 0.0, np.uint8, 0, 1)
+
+SIGNAL_ENCODINGS = {
+    "STR_ANGLE": SignalEncoding(0.1, 0.0, np.int16, -32768, 32767),          # [-3276.8|3276.7] deg
+    "VSA_LON_G": _G_ENCODING,
+    "VSA_LAT_G": _G_ENCODING,
+    "VSA_YAW_1": SignalEncoding(125.0 / 512, 0.0, np.int16, -512, 511),      # [-125|124.75585938] deg/s
+    "VSA_ABS_FL_WHEEL_SPEED_255": _WHEEL_SPEED_ENCODING,
+    "VSA_ABS_FR_WHEEL_SPEED_255": _WHEEL_SPEED_ENCODING,
+    "VSA_ABS_RL_WHEEL_SPEED_255": _WHEEL_SPEED_ENCODING,
+    "VSA_ABS_RR_WHEEL_SPEED_255": _WHEEL_SPEED_ENCODING,
+    "VSA_MAEPS_MYU_VALUE": SignalEncoding(1.0 / 25600, 0.0, np.int16, -32768, 32767), # [-1.28|1.2799609375]
+    "METER_SW_STATUS_BRAKE_FLUID": _STATUS_BIT_ENCODING,
+    "ENG_SW_STATUS_BRAKE_NO": _STATUS_BIT_ENCODING,
+    "VSA_MASTER_CYLINDER_PRESSURE": SignalEncoding(1.0, 0.0, np.uint16, 0, 65535), # kPa (range not documented)
+    "VSA_WARN_STATUS_BRAKE": _STATUS_BIT_ENCODING,
+    "VSA_WARN_STATUS_ABS": _STATUS_BIT_ENCODING,
+    "VSA_WARN_STATUS_PUNCTURE": _STATUS_BIT_ENCODING,
+}
+
+
+def is_encoded(array):
+    """True if an array holds raw integer codes rather than physical floats."""
+    return np.issubdtype(np.asarray(array).dtype, np.integer)
+
+
+def encode_columns(columns):
+    """
+    Encodes every known signal column of a session-style dict (other keys, such
+    as "timestamp", are kept as they are).
+
+    Returns:
+        dict: same keys, signal columns as raw integer codes.
+    """
+    return {name: SIGNAL_ENCODINGS[name].encode(values) if name in SIGNAL_ENCODINGS and not is_encoded(values)
+            else values
+            for name, values in columns.items()}
+
+
+def saturated_counts(columns):
+    """
+    Counts the values of each known signal column that encode_columns() would
+    saturate at the DBC range.
+
+    Returns:
+        dict: signal name -> number of saturated values (only columns with any).
+    """
+    counts = {name: SIGNAL_ENCODINGS[name].count_saturated(values)
+              for name, values in columns.items() if name in SIGNAL_ENCODINGS and not is_encoded(values)}
+    return {name: count for name, count in counts.items() if count}
+
+
+def decode_columns(columns):
+    """Inverse of encode_columns(): raw signal columns back to physical float64."""
+    return {name: SIGNAL_ENCODINGS[name].decode(values) if name in SIGNAL_ENCODINGS and is_encoded(values)
+            else values
+            for name, values in columns.items()}
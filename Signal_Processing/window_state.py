@@ -0,0 +1,32 @@
+# window_state.py
+#
+# Snapshot / restore helpers for the (value, timestamp) deques the runners keep
+# with manage_rolling_window(). A snapshot is a pair of float64 arrays, which
+# a checkpoint stores as raw bytes (16 bytes per sample) instead of one object per tuple.
+
+
+def snapshot_window(deque_obj):
+    """
+    Returns:
+        tuple: (values, timestamps) as float64 np.ndarrays, oldest first.
+    """
+    import numpy as np # Imported lazily, like calculate_std(), to keep startup fast
+    if not deque_obj:
+        return np.zeros(0), np.zeros(0)
+    values, timestamps = zip(*deque_obj)
+    return np.array(values, dtype=np.float64), np.array(timestamps, dtype=np.float64)
+
+
+def restore_window(deque_obj, snapshot, current_timestamp, window_duration):
+    """
+    Refills a deque from snapshot_window() output, dropping samples that are
+    stale at current_timestamp (same retention rule as manage_rolling_window()).
+
+    Returns:
+        int: number of samples restored.
+    """
+    values, timestamps = snapshot
+    keep = (current_timestamp - timestamps <= window_duration) & (timestamps <= current_timestamp)
+    deque_obj.clear()
+    deque_obj.extend(zip(values[keep].tolist(), timestamps[keep].tolist()))
+    return len(deque_obj)
@@ -0,0 +1,48 @@
+# --- Simulation Clocks ---
+# The runners pace themselves through a clock object instead of calling time.sleep()
+# directly, so the same loop can run in real time or as fast as possible (virtual time).
+
+import time
+
+class RealTimeClock:
+    """Wall-clock time measured from clock creation; waiting really sleeps."""
+    def __init__(self):
+        self._start = time.monotonic()
+
+    def now(self):
+        """Returns seconds elapsed since the clock was created."""
+        return time.monotonic() - self._start
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def wait_until(self, target_time):
+        """Sleeps until now() reaches target_time (returns immediately if already late)."""
+        remaining = target_time - self.now()
+        if remaining > 0:
+            time.sleep(remaining)
+
+
+class VirtualClock:
+    """Simulated time that only advances when the loop waits; nothing actually sleeps."""
+    def __init__(self, start_time=0.0):
+        self._now = start_time
+
+    def now(self):
+        return self._now
+
+    def sleep(self, seconds):
+        self._now += seconds
+
+    def wait_until(self, target_time):
+        self._now = max(self._now, target_time)
+
+
+CLOCKS = {
+    "real": RealTimeClock,
+    "virtual": VirtualClock,
+}
+
+def make_clock(name):
+    """Creates a clock by name ("real" or "virtual")."""
+    return CLOCKS[name]()
@@ -1,12 +1,15 @@
 # main.py
 
-from Driver_Alertness_Module import Alertness_Runner
-from High_Speed_Monitoring import Simulation_Runner
-from Critical_Health_Monitoring import simulation_runner
+import sys
+
+from vehicle_logic.cli import main
+
+# Default run: braking health monitor in real time with serial alerts on COM4.
+# Pass CLI arguments to choose another monitor, e.g. `python main.py run --monitor all`.
+DEFAULT_ARGS = ["run", "--monitor", "braking", "--serial-port", "COM4"]
+
 if __name__ == "__main__":
     print("Starting the Driver Alertness Detection Application...")
-    # Alertness_Runner.run_simulation()
-    
-    # Simulation_Runner.run_simulation()
-    simulation_runner.run_simulation()
+    exit_code = main(sys.argv[1:] or DEFAULT_ARGS)
     print("Application finished.")
+    sys.exit(exit_code)
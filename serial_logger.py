@@ -1,7 +1,5 @@
 # serial_logger.py
 
-import serial
-
 class SerialLogger:
     """
     A class to manage serial port communication for logging alerts.
@@ -18,12 +16,16 @@ class SerialLogger:
         self.baudrate = baudrate
         self.ser = None
         self._is_active = False # Flag to indicate if serial port is successfully open
+        self._serial_error = OSError # Replaced by serial.SerialException once pyserial is loaded
+        self.bytes_written = 0 # Total bytes sent this session
 
         try:
+            import serial # Imported lazily: pyserial is only needed when a port is actually opened
+            self._serial_error = serial.SerialException
             self.ser = serial.Serial(self.port, self.baudrate, timeout=1)
             self._is_active = True
             print(f"SerialLogger: Successfully opened serial port {self.port} at {self.baudrate} baud.")
-        except serial.SerialException as e:
+        except self._serial_error as e:
             print(f"SerialLogger Error: Could not open serial port {self.port}: {e}")
             print("Serial output will be disabled.")
         except Exception as e:
@@ -36,15 +38,21 @@ class SerialLogger:
 
         Args:
             message (str): The string message to send. A newline character will be added.
+
+        Returns:
+            int: number of bytes written (0 if the port is not active or the write failed).
         """
         if self._is_active and self.ser:
             try:
                 # Ensure message ends with a newline and encode to bytes
                 if not message.endswith('\n'):
                     message += '\n'
-                self.ser.write(message.encode('utf-8'))
+                data = message.encode('utf-8')
+                self.ser.write(data)
+                self.bytes_written += len(data)
                 # print(f"SerialLogger: Sent: {message.strip()}") # Uncomment for debug
-            except serial.SerialException as e:
+                return len(data)
+            except self._serial_error as e:
                 print(f"SerialLogger Error: Failed to write to serial port: {e}")
                 print("Serial output disabled for remaining session.")
                 self.close() # Attempt to close on write error
@@ -52,6 +60,7 @@ class SerialLogger:
                 print(f"SerialLogger Unexpected Error during write: {e}")
                 print("Serial output disabled for remaining session.")
                 self.close()
+        return 0
 
     def close(self):
         """
@@ -62,7 +71,7 @@ class SerialLogger:
                 self.ser.close()
                 self._is_active = False
                 print(f"SerialLogger: Serial port {self.port} closed.")
-            except serial.SerialException as e:
+            except self._serial_error as e:
                 print(f"SerialLogger Error: Failed to close serial port: {e}")
             except Exception as e:
                 print(f"SerialLogger Unexpected Error during close: {e}")
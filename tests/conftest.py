@@ -0,0 +1,9 @@
+# conftest.py
+#
+# The monitor packages import each other as top-level modules (Read_Signal,
+# Simulation_Config, ...), so the tests run with the repository root on sys.path.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,74 @@
+# test_alert_store.py
+
+import sqlite3
+
+import numpy as np
+import pytest
+
+from vehicle_logic import alert_store
+from vehicle_logic.alert_store import AlertStore, AlertReader, level_name
+
+
+def test_level_name_accepts_numpy_levels():
+    assert level_name(np.int64(3)) == "HIGH"
+    assert level_name(np.int8(1)) == level_name(1)
+    assert level_name("MODERATE") == "MODERATE"
+
+
+def test_two_writers_share_one_database(tmp_path):
+    path = str(tmp_path / "alerts.db")
+    first = AlertStore(path, vehicle_id="a")
+    second = AlertStore(path, vehicle_id="b") # Opened before either has written
+    try:
+        for i in range(5):
+            first.record("braking", i, "HIGH", "first", rules=["LOW_BRAKE_FLUID"])
+            second.record("stability", i, "HIGH", "second", rules=["HIGH_YAW_LOW_STEERING", "LOW_ROAD_FRICTION"])
+            first.flush()
+            second.flush()
+    finally:
+        first.close()
+        second.close()
+
+    reader = AlertReader(path)
+    try:
+        alerts = reader.recent_alerts(10.0)
+        assert len(alerts) == 10 and len({alert["id"] for alert in alerts}) == 10
+        for alert in alerts: # Every alert kept its own rules
+            expected = ["LOW_BRAKE_FLUID"] if alert["vehicle_id"] == "a" else ["HIGH_YAW_LOW_STEERING", "LOW_ROAD_FRICTION"]
+            assert sorted(alert["rules"]) == expected
+    finally:
+        reader.close()
+
+
+def test_write_error_keeps_writer_alive(tmp_path, monkeypatch):
+    monkeypatch.setattr(alert_store, "WRITE_RETRY_DELAY_S", 0.0)
+    path = str(tmp_path / "alerts.db")
+    store = AlertStore(path)
+    blocker = sqlite3.connect(path, timeout=0.0)
+    try:
+        store._writer.execute("PRAGMA busy_timeout = 0")
+        blocker.execute("BEGIN EXCLUSIVE") # "database is locked" for the store's writer
+        store.record("braking", 0.0, "HIGH", "lost")
+        with pytest.raises(sqlite3.OperationalError):
+            store.flush(timeout=10.0)
+        assert store.rows_dropped == 1
+        blocker.rollback()
+
+        store.record("braking", 1.0, "HIGH", "kept")
+        assert store.flush(timeout=10.0)
+        assert store.rows_written == 1
+    finally:
+        blocker.close()
+        store.close()
+
+
+def test_reader_is_read_only(tmp_path):
+    path = str(tmp_path / "alerts.db")
+    AlertStore(path).close()
+    reader = AlertReader(path)
+    try:
+        assert reader.recent_alerts(10.0) == []
+        with pytest.raises(sqlite3.OperationalError):
+            reader._query("INSERT INTO alerts (vehicle_id, timestamp, monitor, level) VALUES ('x', 0, 'm', 'HIGH')", [])
+    finally:
+        reader.close()
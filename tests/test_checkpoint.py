@@ -0,0 +1,77 @@
+# test_checkpoint.py
+
+import io
+import os
+import pickle
+import zlib
+
+import numpy as np
+
+import Read_Signal
+from Simulation_Config import CAN_SAMPLE_INTERVAL_S
+from vehicle_logic.checkpoint import (
+    CHECKPOINT_MAGIC, CHECKPOINT_VERSION, HEADER, decode_checkpoint, encode_checkpoint, restore_checkpoint, write_atomic,
+)
+from vehicle_logic.runtime import ALL_MONITORS, create_pipeline, resolve_monitor_names
+
+
+def _pipelines():
+    return [create_pipeline(name) for name in resolve_monitor_names(ALL_MONITORS)]
+
+
+def _run(pipelines, ticks, signals):
+    results = []
+    for tick in ticks:
+        t = tick * CAN_SAMPLE_INTERVAL_S
+        for pipeline in pipelines:
+            results.append((pipeline.process(t, signals[tick]), dict(pipeline.last_features)))
+    return results
+
+
+def test_warm_restart_continues_like_an_uninterrupted_run(tmp_path):
+    # read_signals() draws random noise, so both runs are fed one recorded stream
+    recorded = [Read_Signal.generate_all_signals(tick * CAN_SAMPLE_INTERVAL_S) for tick in range(400)]
+    continuous = _pipelines()
+    _run(continuous, range(300), recorded)
+    path = str(tmp_path / "monitors.ckpt")
+    write_atomic(path, encode_checkpoint({p.name: p.snapshot_state() for p in continuous}, 299 * CAN_SAMPLE_INTERVAL_S))
+
+    restarted = _pipelines()
+    resume_time = restore_checkpoint(path, restarted, CAN_SAMPLE_INTERVAL_S)
+    assert resume_time == 300 * CAN_SAMPLE_INTERVAL_S
+    assert _run(restarted, range(300, 400), recorded) == _run(continuous, range(300, 400), recorded)
+
+
+def test_state_round_trip_keeps_arrays_and_scalars():
+    states = {"m": {"window": (np.arange(3.0), np.arange(3.0) + 0.5), "count": np.int64(7), "gate": None,
+                    "rules": ["A"], "level": np.float64(1.5), "flag": True}}
+    decoded, sim_time, wall_time = decode_checkpoint(encode_checkpoint(states, 12.5, wall_time=100.0))
+    assert (sim_time, wall_time) == (12.5, 100.0)
+    values, timestamps = decoded["m"]["window"]
+    assert values.dtype == np.float64 and values.tolist() == [0.0, 1.0, 2.0]
+    assert timestamps.tolist() == [0.5, 1.5, 2.5]
+    assert decoded["m"]["count"] == 7 and decoded["m"]["level"] == 1.5
+    assert decoded["m"]["gate"] is None and decoded["m"]["rules"] == ["A"] and decoded["m"]["flag"] is True
+
+
+class _Planted:
+    def __reduce__(self):
+        return os.system, ("echo planted",)
+
+
+def _with_header(payload):
+    return HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, zlib.crc32(payload), 1.0, 1.0) + payload
+
+
+def test_pickled_or_malformed_payloads_are_rejected(tmp_path):
+    # A valid header with a CRC does not make a pickle (or a pickled object array) loadable
+    object_array = io.BytesIO()
+    np.savez(object_array, state=np.array([_Planted()], dtype=object))
+    for payload in (pickle.dumps(_Planted()), object_array.getvalue(), b"PK\x03\x04garbage", b""):
+        assert decode_checkpoint(_with_header(payload)) is None
+
+    path = str(tmp_path / "planted.ckpt")
+    with open(path, "wb") as f:
+        f.write(_with_header(pickle.dumps(_Planted())))
+    assert restore_checkpoint(path, _pipelines(), CAN_SAMPLE_INTERVAL_S) is None
+    assert restore_checkpoint(str(tmp_path / "missing.ckpt"), _pipelines(), CAN_SAMPLE_INTERVAL_S) is None
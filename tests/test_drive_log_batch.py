@@ -0,0 +1,35 @@
+# test_drive_log_batch.py
+
+import os
+
+from Batch_Processing.drive_log_batch import process_log, run_batch
+from Batch_Processing.session_arrays import generate_session, save_session
+
+
+def test_corrupt_logs_are_reported_not_fatal(tmp_path):
+    good = str(tmp_path / "good.npz")
+    save_session(good, generate_session(30.0, 0.1, seed=0))
+    with open(good, "rb") as f:
+        data = f.read()
+    with open(tmp_path / "truncated.npz", "wb") as f:
+        f.write(data[:len(data) // 2])
+    (tmp_path / "empty.npz").write_bytes(b"")
+    (tmp_path / "empty.csv").write_text("")
+    (tmp_path / "garbage.npz").write_bytes(b"PK\x03\x04" + os.urandom(256))
+
+    report = run_batch(str(tmp_path), workers=1, verbose=False)
+    assert report["files"] == 1
+    assert report["samples"] == 300
+    failed = {os.path.basename(entry["file"]): entry["error"] for entry in report["failed"]}
+    assert sorted(failed) == ["empty.csv", "empty.npz", "garbage.npz", "truncated.npz"]
+    assert failed["empty.csv"] == f"ValueError: Empty session file: {tmp_path / 'empty.csv'}"
+    assert all(failed.values())
+
+
+def test_process_log_returns_error_summary(tmp_path):
+    path = str(tmp_path / "truncated.npz")
+    save_session(path, generate_session(10.0, 0.1, seed=1))
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 100)
+    summary = process_log(path, "alertness")
+    assert set(summary) == {"file", "error"} and summary["file"] == path
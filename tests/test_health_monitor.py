@@ -0,0 +1,32 @@
+# test_health_monitor.py
+
+import math
+import random
+
+from Critical_Health_Monitoring.simulation_runner import BrakingHealthPipeline
+from Critical_Health_Monitoring.Threeholds import (
+    MAX_MASTER_CYLINDER_PRESSURE_NO_BRAKE_KPA, MIN_MASTER_CYLINDER_PRESSURE_ACTIVE_BRAKE_KPA,
+)
+
+STATUS_SIGNALS = ("METER_SW_STATUS_BRAKE_FLUID", "ENG_SW_STATUS_BRAKE_NO", "VSA_WARN_STATUS_BRAKE",
+                  "VSA_WARN_STATUS_ABS", "VSA_WARN_STATUS_PUNCTURE")
+PRESSURES = (0.0, 50.0, MAX_MASTER_CYLINDER_PRESSURE_NO_BRAKE_KPA, 101.0, 500.0,
+             MIN_MASTER_CYLINDER_PRESSURE_ACTIVE_BRAKE_KPA, 999.0, 1500.0, math.nan)
+
+
+def test_incremental_monitor_matches_full_evaluation():
+    rng = random.Random(0)
+    full = BrakingHealthPipeline(incremental=False)
+    incremental = BrakingHealthPipeline()
+    signals = {name: 0 for name in STATUS_SIGNALS}
+    signals["VSA_MASTER_CYLINDER_PRESSURE"] = 0.0
+    for tick in range(20000):
+        # Mostly steady status bits with occasional flips, like a real drive
+        if rng.random() < 0.05:
+            signals[rng.choice(STATUS_SIGNALS)] ^= 1
+        if rng.random() < 0.3:
+            signals["VSA_MASTER_CYLINDER_PRESSURE"] = rng.choice(PRESSURES)
+        expected = full.process(tick, signals)
+        assert incremental.process(tick, signals) == expected
+        assert incremental.triggered_rules() == full.triggered_rules()
+        assert incremental.last_features == full.last_features
@@ -0,0 +1,51 @@
+# test_load_test.py
+
+import pytest
+
+from vehicle_logic import load_test
+from vehicle_logic.cli import build_arg_parser
+
+
+def test_pty_falls_back_to_no_serial_output_without_openpty(monkeypatch, capsys):
+    monkeypatch.setattr(load_test, "PTY_AVAILABLE", False)
+    assert load_test.open_serial_output("pty") == (None, None)
+    assert "not available" in capsys.readouterr().out
+
+
+def test_monitor_targets_are_parsed_by_argparse():
+    args = build_arg_parser().parse_args(["loadtest", "--monitor", "braking,all"])
+    assert args.monitor == [("braking", ["braking"]), ("all", ["braking", "stability", "alertness"])]
+    assert args.serial == load_test.DEFAULT_SERIAL
+    with pytest.raises(SystemExit):
+        build_arg_parser().parse_args(["loadtest", "--monitor", "braking,bogus"])
+
+
+def test_traffic_is_generated_before_the_timed_step(monkeypatch):
+    import Fleet_Simulator
+
+    timed = []
+    real_step = Fleet_Simulator.FleetSimulator.step
+    real_process = load_test._process_vehicle
+    state = {"in_step": False}
+
+    def step(self):
+        timed.append(state["in_step"])
+        return real_step(self)
+
+    def process_vehicle(*args):
+        state["in_step"] = True # Any simulator step after the first processed tick would be timed
+        return real_process(*args)
+
+    monkeypatch.setattr(Fleet_Simulator.FleetSimulator, "step", step)
+    monkeypatch.setattr(load_test, "_process_vehicle", process_vehicle)
+    result = load_test.run_step(["braking"], 2, 2000.0, step_s=0.1, warmup_s=0)
+    assert len(timed) == 200 and not any(timed)
+    assert result["achieved_per_s"] > 0
+
+
+def test_traffic_pool_is_bounded():
+    from Fleet_Simulator import FleetSimulator
+
+    traffic = load_test._prepare_traffic(FleetSimulator(2, 0.001, seed=0), 1000, pool_rows=64)
+    assert len(traffic) == 32 and len(traffic[0]) == 2 # 64 vehicle-ticks, replayed cyclically
+    assert sorted(traffic[0][1]) == sorted(load_test.SIGNAL_NAMES)
@@ -0,0 +1,38 @@
+# test_microbatch.py
+
+import time
+
+import numpy as np
+
+from Read_Signal import SIGNAL_NAMES
+from vehicle_logic.microbatch import MicroBatchPipeline
+
+RATE_HZ = 1000.0
+BATCH_SAMPLES = 50 # 50 ms batches, the default batch interval
+# Throughput floor for the alertness path once the 60 s window is full. It ran at
+# ~50k samples/s when written; band power rebuilt over the whole window every
+# batch had dropped it to a few hundred, which this must catch on any machine.
+MIN_SAMPLES_PER_S = 5000.0
+
+
+def _session(duration_s, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(0.0, duration_s, 1.0 / RATE_HZ)
+    batch = {name: np.zeros(timestamps.size) for name in SIGNAL_NAMES}
+    batch["STR_ANGLE"] = 5.0 * np.sin(2.0 * np.pi * 0.2 * timestamps) + rng.standard_normal(timestamps.size)
+    for name in ("VSA_LON_G", "VSA_LAT_G", "VSA_YAW_1"):
+        batch[name] = 0.5 * rng.standard_normal(timestamps.size)
+    return timestamps, batch
+
+
+def test_alertness_throughput_with_full_window():
+    timestamps, batch = _session(75.0)
+    pipeline = MicroBatchPipeline("alertness")
+    full_window_from = int(65.0 * RATE_HZ)
+    for first in range(0, timestamps.size, BATCH_SAMPLES):
+        if first == full_window_from:
+            start = time.perf_counter()
+        block = slice(first, first + BATCH_SAMPLES)
+        pipeline.evaluate(timestamps[block], {name: column[block] for name, column in batch.items()})
+    samples_per_s = (timestamps.size - full_window_from) / (time.perf_counter() - start)
+    assert samples_per_s > MIN_SAMPLES_PER_S
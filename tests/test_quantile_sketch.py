@@ -0,0 +1,52 @@
+# test_quantile_sketch.py
+
+import numpy as np
+import pytest
+
+from Signal_Processing.quantile_sketch import DDSketch, merge_sketches
+
+
+def _bucket_total(sketch):
+    return int(sketch.positive.counts.sum() + sketch.negative.counts.sum()) + sketch.zero_count
+
+
+def _check_bounded(sketch, count, max_value):
+    assert sketch.count == count == _bucket_total(sketch) # Collapsed values are kept, not dropped
+    assert sketch.positive.counts.size <= sketch.max_buckets and sketch.negative.counts.size <= sketch.max_buckets
+    assert sketch.quantile(1.0) == pytest.approx(max_value, rel=sketch.relative_accuracy)
+
+
+@pytest.mark.parametrize("low, high, max_buckets", [(0.5, 15000.0, 256), (1e-8, 1e12, 2048)])
+def test_add_past_max_buckets_collapses_lowest_buckets(low, high, max_buckets):
+    sketch = DDSketch(max_buckets=max_buckets)
+    sketch.add(low)
+    sketch.add(high)
+    _check_bounded(sketch, 2, high)
+    sketch.add(-low)
+    sketch.add(-high)
+    assert sketch.quantile(0.0) == pytest.approx(-high, rel=sketch.relative_accuracy)
+
+    vectorized = DDSketch(max_buckets=max_buckets)
+    vectorized.add_many([low])
+    vectorized.add_many([high])
+    _check_bounded(vectorized, 2, high)
+
+
+def test_merge_past_max_buckets():
+    low, high = DDSketch(max_buckets=256), DDSketch(max_buckets=256)
+    low.add_many(np.linspace(0.5, 2.0, 100))
+    high.add_many(np.linspace(10000.0, 15000.0, 100))
+    for merged in (DDSketch(max_buckets=256).merge(low).merge(high), merge_sketches([low, high])):
+        _check_bounded(merged, 200, 15000.0)
+        assert merged.quantile(0.75) == pytest.approx(12500.0, rel=0.02)
+
+    merged = DDSketch(max_buckets=256).merge(high).merge(low) # Lower range arriving second
+    _check_bounded(merged, 200, 15000.0)
+
+
+def test_serialized_collapsed_sketch_round_trips():
+    sketch = DDSketch(max_buckets=256)
+    sketch.add_many([0.5, 3.0, 15000.0, 14000.0])
+    restored = DDSketch.from_bytes(sketch.to_bytes(), max_buckets=256)
+    assert restored.count == 4
+    assert restored.quantiles([0.0, 0.5, 1.0]) == sketch.quantiles([0.0, 0.5, 1.0])
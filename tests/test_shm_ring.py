@@ -0,0 +1,65 @@
+# test_shm_ring.py
+
+import pytest
+
+from vehicle_logic.shm_ring import SharedRingBuffer, RowSignals
+
+FIELDS = ["A", "B"]
+
+
+@pytest.fixture
+def make_ring():
+    rings = []
+
+    def make(**kwargs):
+        ring = SharedRingBuffer.create(FIELDS, consumers=1, capacity=4, **kwargs)
+        rings.append(ring)
+        return ring
+    yield make
+    for ring in rings:
+        ring.close()
+        ring.unlink()
+
+
+def _read_timestamps(segments):
+    return [row[0] for segment in segments for row in segment.tolist()]
+
+
+def test_read_returns_views_in_stream_order(make_ring):
+    ring = make_ring()
+    for t in range(3):
+        ring.write(float(t), [t * 10.0, t * 100.0])
+    segments, next_seq, dropped = ring.read(0, 0)
+    assert _read_timestamps(segments) == [0.0, 1.0, 2.0]
+    assert (next_seq, dropped) == (3, 0)
+    assert segments[0].base is not None # A view into shared memory, not a copy
+
+
+def test_overwrite_drops_the_row_being_reused(make_ring):
+    ring = make_ring(overwrite=True)
+    for t in range(6): # Rows 0 and 1 are overwritten; the producer writes row 2's slot next
+        ring.write(float(t), [0.0, 0.0])
+    segments, next_seq, dropped = ring.read(0, 0)
+    assert _read_timestamps(segments) == [3.0, 4.0, 5.0]
+    assert (next_seq, dropped) == (6, 3)
+
+
+def test_overwrite_read_advances_when_every_row_is_torn(make_ring):
+    ring = make_ring(overwrite=True)
+    for t in range(8):
+        ring.write(float(t), [0.0, 0.0])
+    segments, next_seq, dropped = ring.read(0, 4, max_rows=1)
+    assert segments == [] and next_seq == 5 and dropped == 1
+
+
+def test_row_signals_reads_fields_by_name(make_ring):
+    ring = make_ring()
+    ring.write(1.5, [2.0, 3.0])
+    segments, _, _ = ring.read(0, 0)
+    signals = RowSignals(FIELDS)
+    with memoryview(segments[0]) as rows:
+        signals.rows = rows
+        assert dict(signals) == {"A": 2.0, "B": 3.0}
+        assert rows[0, 0] == 1.5
+        signals.rows = None
+    del segments
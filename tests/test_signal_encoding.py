@@ -0,0 +1,37 @@
+# test_signal_encoding.py
+
+import math
+
+import numpy as np
+import pytest
+
+from Batch_Processing.session_arrays import load_session, save_session
+from Signal_Processing.signal_encoding import SIGNAL_ENCODINGS, saturated_counts
+
+WHEEL = "VSA_ABS_FL_WHEEL_SPEED_255"
+
+
+def test_wheel_speed_saturates_at_255_kmh():
+    encoding = SIGNAL_ENCODINGS[WHEEL]
+    speeds = np.array([-3.0, 0.0, 120.4, 254.6, 255.0, 260.0, 400.0, math.inf])
+    raw = encoding.encode(speeds)
+    assert raw.dtype == np.uint8
+    assert raw.tolist() == [0, 0, 120, 255, 255, 255, 255, 255] # No wrap-around past the uint8 range
+    assert encoding.count_saturated(speeds) == 4
+
+
+def test_encode_rejects_nan():
+    with pytest.raises(ValueError):
+        SIGNAL_ENCODINGS[WHEEL].encode([100.0, math.nan])
+
+
+def test_compact_session_reports_saturation(tmp_path, capsys):
+    session = {"timestamp": np.arange(4, dtype=np.float64)}
+    session.update({name: np.zeros(4) for name in SIGNAL_ENCODINGS})
+    session[WHEEL] = np.array([100.0, 250.0, 300.0, 500.0])
+    assert saturated_counts(session) == {WHEEL: 2}
+
+    path = str(tmp_path / "session.npz")
+    save_session(path, session, compact=True)
+    assert WHEEL in capsys.readouterr().out
+    assert load_session(path)[WHEEL].tolist() == [100.0, 250.0, 255.0, 255.0]
@@ -0,0 +1,59 @@
+# test_steering_features.py
+
+import numpy as np
+import pytest
+
+from Driver_Alertness_Module.steering_features import SlidingBandPower, SteeringReversalCounter
+
+WEAVE_HZ = 0.2 # Two reversals per period: 24 reversals per minute
+
+
+def _weave(rate_hz, duration_s=300.0, noise_deg=1.0, seed=0):
+    """0.2 Hz, 5 deg steering weave plus white sensor noise sampled at rate_hz."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(0.0, duration_s, 1.0 / rate_hz)
+    return t, 5.0 * np.sin(2.0 * np.pi * WEAVE_HZ * t) + noise_deg * rng.standard_normal(t.size)
+
+
+def _steady_rate(counter, t, angles):
+    rates = [counter.update(angle, timestamp) for angle, timestamp in zip(angles.tolist(), t.tolist())]
+    return float(np.mean(rates[len(rates) // 4:])) # After the 60 s window has filled
+
+
+@pytest.mark.parametrize("rate_hz", [1.0, 10.0, 100.0])
+def test_reversal_rate_does_not_depend_on_sample_rate(rate_hz):
+    rate = _steady_rate(SteeringReversalCounter(60.0), *_weave(rate_hz))
+    assert rate == pytest.approx(2 * WEAVE_HZ * 60.0, rel=0.1)
+
+
+def test_raw_angle_counts_noise_as_reversals():
+    # Without the low-pass filter and minimum interval, 100 Hz noise alone adds hundreds of reversals
+    raw = SteeringReversalCounter(60.0, lowpass_hz=None, min_interval_s=0.0)
+    assert _steady_rate(raw, *_weave(100.0)) > 5 * 2 * WEAVE_HZ * 60.0
+
+
+def test_restore_keeps_filter_state():
+    t, angles = _weave(10.0, duration_s=120.0)
+    continuous = SteeringReversalCounter(60.0)
+    restored = SteeringReversalCounter(60.0)
+    half = t.size // 2
+    for angle, timestamp in zip(angles[:half].tolist(), t[:half].tolist()):
+        continuous.update(angle, timestamp)
+        restored.update(angle, timestamp)
+    fresh = SteeringReversalCounter(60.0)
+    fresh.restore_state(restored.snapshot_state(), t[half])
+    for angle, timestamp in zip(angles[half:].tolist(), t[half:].tolist()):
+        assert fresh.update(angle, timestamp) == continuous.update(angle, timestamp)
+
+
+@pytest.mark.parametrize("rate_hz, block", [(10.0, 3), (10.0, 40), (50.0, 500), (50.0, 5000)])
+def test_band_power_blocks_match_per_sample_updates(rate_hz, block):
+    t, angles = _weave(rate_hz, duration_s=150.0)
+    t = t + np.random.default_rng(1).random(t.size) * 0.5 / rate_hz # Irregular sampling
+    per_sample = SlidingBandPower()
+    expected = np.array([per_sample.update(angle, timestamp) for angle, timestamp in zip(angles.tolist(), t.tolist())])
+    blocked = SlidingBandPower()
+    ratios = np.concatenate([blocked.update_many(angles[first:first + block], t[first:first + block])
+                             for first in range(0, t.size, block)])
+    assert expected.max() > 0.5
+    np.testing.assert_allclose(ratios, expected, atol=1e-9)
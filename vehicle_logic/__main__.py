@@ -0,0 +1,6 @@
+import sys
+
+from .cli import main
+
+if __name__ == "__main__": # Guard so spawned worker processes do not re-run the CLI
+    sys.exit(main())
@@ -0,0 +1,301 @@
+# alert_store.py
+#
+# Alert history on local SQLite (WAL mode). Monitor loops hand alerts to
+# AlertStore.record(), which only puts them on a queue; a background thread
+# writes them with executemany() and commits every batch_size rows or every
+# commit_interval_s, whichever comes first. Queries run on their own
+# connection, so they never wait for the writer; AlertReader runs the same
+# queries on a read-only connection without a writer.
+
+import numbers
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+
+from High_Speed_Monitoring.Threeholds import ALERT_LEVEL_NONE, ALERT_LEVEL_LOW, ALERT_LEVEL_MODERATE, ALERT_LEVEL_HIGH
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_COMMIT_INTERVAL_S = 1.0
+DEFAULT_VEHICLE_ID = "vehicle-0"
+WRITE_RETRIES = 3          # Retries of a batch whose write failed with a transient error ("database is locked")
+WRITE_RETRY_DELAY_S = 0.2  # Doubled after every retry
+
+# Numeric alert levels (driver alertness 0-3) -> the level names the other monitors use
+LEVEL_NAMES = (ALERT_LEVEL_NONE, ALERT_LEVEL_LOW, ALERT_LEVEL_MODERATE, ALERT_LEVEL_HIGH)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id          INTEGER PRIMARY KEY,
+    vehicle_id  TEXT NOT NULL,
+    timestamp   REAL NOT NULL,  -- Unix time the alert was recorded
+    sim_time    REAL,           -- Simulation / bus time of the sample
+    monitor     TEXT NOT NULL,
+    level       TEXT NOT NULL,
+    description TEXT
+);
+-- One row per triggered rule; copies the alert's filter columns so per-rule
+-- counts are answered from the covering indexes without touching alerts
+CREATE TABLE IF NOT EXISTS alert_rules (
+    alert_id    INTEGER NOT NULL REFERENCES alerts(id),
+    vehicle_id  TEXT NOT NULL,
+    timestamp   REAL NOT NULL,
+    monitor     TEXT NOT NULL,
+    level       TEXT NOT NULL,
+    rule        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_vehicle_time ON alerts (vehicle_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_alerts_level_time ON alerts (level, timestamp);
+CREATE INDEX IF NOT EXISTS idx_alert_rules_alert ON alert_rules (alert_id);
+CREATE INDEX IF NOT EXISTS idx_alert_rules_rule ON alert_rules (monitor, rule, level, timestamp);
+CREATE INDEX IF NOT EXISTS idx_alert_rules_time ON alert_rules (timestamp, monitor, rule, level);
+"""
+
+_STOP = object() # Queue sentinel that ends the writer thread
+
+
+def level_name(level):
+    """Returns the level name for a level name or a numeric (0-3) level."""
+    return LEVEL_NAMES[level] if isinstance(level, numbers.Integral) else str(level) # Also np.int8/np.int64 levels
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL") # WAL + NORMAL stays consistent; a crash loses at most the last commits
+    return connection
+
+
+def _connect_read_only(path):
+    uri = pathlib.Path(path).absolute().as_uri() + "?mode=ro"
+    return sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+
+# --- Queries ---
+class AlertReader:
+    """
+    Read-only queries on an alert history (opens no writer and changes nothing).
+
+    Args:
+        path (str): SQLite database file written by AlertStore.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._reader = None
+        self._reader_lock = threading.Lock()
+
+    def _open_reader(self):
+        return _connect_read_only(self.path)
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    def _query(self, sql, params):
+        with self._reader_lock:
+            if self._reader is None:
+                self._reader = self._open_reader()
+            return self._reader.execute(sql, params).fetchall()
+
+    def recent_alerts(self, minutes, level=ALERT_LEVEL_HIGH, vehicle_id=None, now=None):
+        """
+        Returns alerts of one level recorded in the last `minutes` minutes (newest first).
+
+        Returns:
+            list: dicts with id, vehicle_id, timestamp, sim_time, monitor, level, description, rules
+        """
+        since = (time.time() if now is None else now) - minutes * 60.0
+        sql = ("SELECT id, vehicle_id, timestamp, sim_time, monitor, level, description FROM alerts "
+               "WHERE level = ? AND timestamp >= ?")
+        params = [level_name(level), since]
+        if vehicle_id is not None:
+            sql += " AND vehicle_id = ?"
+            params.append(vehicle_id)
+        rows = self._query(sql + " ORDER BY timestamp DESC", params)
+        columns = ("id", "vehicle_id", "timestamp", "sim_time", "monitor", "level", "description")
+        alerts = [dict(zip(columns, row)) for row in rows]
+        if alerts:
+            ids = [alert["id"] for alert in alerts]
+            rules = {}
+            for start in range(0, len(ids), 500): # Stay under SQLite's bound-parameter limit
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for alert_id, rule in self._query(f"SELECT alert_id, rule FROM alert_rules WHERE alert_id IN ({placeholders})", chunk):
+                    rules.setdefault(alert_id, []).append(rule)
+            for alert in alerts:
+                alert["rules"] = rules.get(alert["id"], [])
+        return alerts
+
+    def rule_counts(self, since=None, vehicle_id=None, level=None):
+        """
+        Counts triggers per (monitor, rule).
+
+        Args:
+            since (float): Only alerts recorded at or after this Unix time.
+            vehicle_id (str): Only this vehicle.
+            level: Only this level.
+
+        Returns:
+            dict: (monitor, rule) -> count, most frequent first
+        """
+        sql = "SELECT monitor, rule, COUNT(*) FROM alert_rules"
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if vehicle_id is not None:
+            conditions.append("vehicle_id = ?")
+            params.append(vehicle_id)
+        if level is not None:
+            conditions.append("level = ?")
+            params.append(level_name(level))
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        rows = self._query(sql + " GROUP BY monitor, rule ORDER BY COUNT(*) DESC", params)
+        return {(monitor, rule): count for monitor, rule, count in rows}
+
+
+# --- Writing ---
+class AlertStore(AlertReader):
+    """
+    Batched, indexed alert history (with the AlertReader queries).
+
+    A batch whose write fails is retried WRITE_RETRIES times (another process may
+    hold the write lock) and then dropped with an error message; the writer thread
+    keeps running and flush() raises the error.
+
+    Args:
+        path (str): SQLite database file (created if missing).
+        vehicle_id (str): Default vehicle id for record().
+        batch_size (int): Rows per executemany()/commit.
+        commit_interval_s (float): Longest time a recorded alert waits before it is committed.
+    """
+    def __init__(self, path, vehicle_id=DEFAULT_VEHICLE_ID, batch_size=DEFAULT_BATCH_SIZE,
+                 commit_interval_s=DEFAULT_COMMIT_INTERVAL_S):
+        super().__init__(path)
+        self.vehicle_id = vehicle_id
+        self.batch_size = batch_size
+        self.commit_interval_s = commit_interval_s
+        self.rows_written = 0
+        self.rows_dropped = 0 # Alerts lost to write errors
+        self._error = None    # Last write error, raised by the next flush()
+
+        writer = _connect(path)
+        writer.executescript(SCHEMA)
+        writer.commit()
+        self._writer = writer
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._write_loop, name="alert-store", daemon=True)
+        self._thread.start()
+
+    def _open_reader(self):
+        return _connect(self.path)
+
+    def record(self, monitor, sim_time, level, description, rules=(), vehicle_id=None, timestamp=None):
+        """
+        Queues one alert for writing (returns immediately).
+
+        Args:
+            monitor (str): Monitor name ("braking", "stability", "alertness").
+            sim_time (float): Bus / simulation time of the sample that raised it.
+            level: Level name ("HIGH") or numeric level (0-3).
+            description (str): Alert description.
+            rules (list): Detail keys of the rules that triggered.
+            vehicle_id (str): Vehicle id (default: the store's vehicle_id).
+            timestamp (float): Unix time of the alert (default: now).
+        """
+        self._queue.put((vehicle_id or self.vehicle_id, time.time() if timestamp is None else timestamp,
+                         sim_time, monitor, level_name(level), description, tuple(rules)))
+
+    def _write_loop(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None # Oldest queued alert has waited commit_interval_s
+            if item is not None and item is not _STOP and not isinstance(item, threading.Event):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.commit_interval_s
+                if len(batch) < self.batch_size and time.monotonic() < deadline:
+                    continue
+            self._write_with_retries(batch)
+            batch = []
+            deadline = None
+            if isinstance(item, threading.Event):
+                item.set() # flush() is waiting for this
+            elif item is _STOP:
+                return
+
+    def _write_with_retries(self, batch):
+        """Writes a batch; on failure retries, then drops it so the writer thread never dies."""
+        if not batch:
+            return
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                self._write_batch(batch)
+                return
+            except sqlite3.OperationalError as e: # Locked / busy: another writer holds the database
+                error = e
+                if attempt < WRITE_RETRIES:
+                    time.sleep(WRITE_RETRY_DELAY_S * 2 ** attempt)
+            except Exception as e: # Not transient: retrying would fail the same way
+                error = e
+                break
+        print(f"AlertStore Error: could not write {len(batch)} alerts to {self.path}: {error}")
+        self.rows_dropped += len(batch)
+        self._error = error
+
+    def _write_batch(self, batch):
+        alert_rows = []
+        for vehicle_id, timestamp, sim_time, monitor, level, description, rules in batch:
+            alert_rows.append((vehicle_id, timestamp, sim_time, monitor, level, description))
+        with self._writer: # One transaction per batch
+            self._writer.executemany("INSERT INTO alerts (vehicle_id, timestamp, sim_time, monitor, level, description) "
+                                     "VALUES (?, ?, ?, ?, ?, ?)", alert_rows)
+            # SQLite assigns max(id) + 1 to each row, and the transaction holds the write lock until
+            # commit, so the batch got consecutive ids ending at the last inserted rowid
+            first_id = self._writer.execute("SELECT last_insert_rowid()").fetchone()[0] - len(alert_rows) + 1
+            rule_rows = [(alert_id, vehicle_id, timestamp, monitor, level, rule)
+                         for alert_id, (vehicle_id, timestamp, _, monitor, level, _, rules) in enumerate(batch, first_id)
+                         for rule in rules]
+            self._writer.executemany("INSERT INTO alert_rules (alert_id, vehicle_id, timestamp, monitor, level, rule) "
+                                     "VALUES (?, ?, ?, ?, ?, ?)", rule_rows)
+        self.rows_written += len(alert_rows)
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every alert recorded so far is committed (or dropped after a write error).
+
+        Args:
+            timeout (float): Longest wait in seconds (None = no limit).
+
+        Returns:
+            bool: False if the timeout expired first.
+
+        Raises:
+            sqlite3.Error: the last write error since the previous flush().
+        """
+        if not self._thread.is_alive():
+            raise RuntimeError("AlertStore is closed")
+        done = threading.Event()
+        self._queue.put(done)
+        if not done.wait(timeout):
+            return False
+        error, self._error = self._error, None
+        if error is not None:
+            raise error
+        return True
+
+    def close(self):
+        """Writes the remaining alerts and closes the database."""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+        self._writer.close()
+        super().close()
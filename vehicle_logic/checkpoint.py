@@ -0,0 +1,226 @@
+# checkpoint.py
+#
+# Periodic snapshots of monitor state for fast warm restarts. Every
+# interval_s of simulated time the loop asks each pipeline for
+# snapshot_state() (window contents as float64 arrays, scorer / tracker
+# fields), and a background thread serialises it, prefixes a small header and
+# replaces the checkpoint file atomically. On startup restore_checkpoint()
+# hands each pipeline its state back; samples that are older than the
+# window at the resume time are dropped, so a restarted monitor continues
+# with full windows instead of re-filling them for window_duration.
+#
+# File layout: header (magic, version, CRC32 of the payload, sim time,
+# wall time) followed by an uncompressed .npz archive. Its "state" entry is the
+# {monitor name: state} tree as UTF-8 JSON, in which every array is replaced by
+# {"__ndarray__": n}, a reference to archive entry "a<n>". The archive is read
+# with allow_pickle=False, so a planted checkpoint file cannot run code: at
+# worst it is rejected, which restore_checkpoint() treats as no checkpoint.
+#
+# States may hold dicts with str keys, lists, tuples (restored as lists),
+# str / int / float / bool / None, NumPy scalars and numeric NumPy arrays.
+
+import io
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+CHECKPOINT_MAGIC = b"VLCK"
+CHECKPOINT_VERSION = 2 # 1 = pickled payload, no longer read
+HEADER = struct.Struct("<4sHIdd") # magic, version, crc32, sim_time, wall_time
+DEFAULT_CHECKPOINT_INTERVAL_S = 30.0
+ARRAY_REF_KEY = "__ndarray__"
+
+
+# --- File Format ---
+def _split_arrays(value, arrays):
+    """Returns value with every ndarray moved to arrays and replaced by a reference."""
+    if isinstance(value, dict):
+        return {str(key): _split_arrays(item, arrays) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_split_arrays(item, arrays) for item in value]
+    if isinstance(value, np.ndarray):
+        arrays.append(value)
+        return {ARRAY_REF_KEY: len(arrays) - 1}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _join_arrays(value, archive):
+    """Inverse of _split_arrays(): resolves array references against the loaded archive."""
+    if isinstance(value, dict):
+        if ARRAY_REF_KEY in value:
+            return archive[f"a{int(value[ARRAY_REF_KEY])}"]
+        return {key: _join_arrays(item, archive) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_join_arrays(item, archive) for item in value]
+    return value
+
+
+def encode_checkpoint(states, sim_time, wall_time=None):
+    """
+    Args:
+        states (dict): Monitor name -> snapshot_state() output.
+        sim_time (float): Simulation time of the last processed tick.
+        wall_time (float): Unix time of the snapshot (default: now).
+
+    Returns:
+        bytes: header + .npz payload.
+    """
+    arrays = []
+    tree = json.dumps(_split_arrays(states, arrays)).encode("utf-8")
+    buffer = io.BytesIO()
+    np.savez(buffer, state=np.frombuffer(tree, dtype=np.uint8),
+             **{f"a{index}": array for index, array in enumerate(arrays)})
+    payload = buffer.getvalue()
+    wall_time = time.time() if wall_time is None else wall_time
+    return HEADER.pack(CHECKPOINT_MAGIC, CHECKPOINT_VERSION, zlib.crc32(payload), sim_time, wall_time) + payload
+
+
+def decode_checkpoint(data):
+    """
+    Returns:
+        tuple: (states, sim_time, wall_time), or None if data is not a valid checkpoint.
+    """
+    if len(data) < HEADER.size:
+        return None
+    magic, version, crc, sim_time, wall_time = HEADER.unpack_from(data)
+    payload = memoryview(data)[HEADER.size:]
+    if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION or zlib.crc32(payload) != crc:
+        return None
+    try:
+        with np.load(io.BytesIO(payload), allow_pickle=False) as archive:
+            states = _join_arrays(json.loads(archive["state"].tobytes().decode("utf-8")), archive)
+    except Exception: # Anything malformed (bad zip, object arrays, bad JSON, missing entries) = no checkpoint
+        return None
+    if not isinstance(states, dict):
+        return None
+    return states, sim_time, wall_time
+
+
+def write_atomic(path, data):
+    """Writes data to path so that readers only ever see the old or the new file, even after a power loss."""
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError: # Directories cannot be opened on Windows; os.replace() is still atomic there
+        return
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+# --- Periodic Checkpointing ---
+class Checkpointer:
+    """
+    Takes a snapshot every interval_s of simulated time and writes it off the
+    monitor loop. Only the newest pending snapshot is kept: if the disk is
+    slower than interval_s, older snapshots are skipped rather than queued.
+
+    Args:
+        path (str): Checkpoint file (replaced on every write).
+        interval_s (float): Simulated time between snapshots.
+    """
+    def __init__(self, path, interval_s=DEFAULT_CHECKPOINT_INTERVAL_S):
+        self.path = path
+        self.interval_s = interval_s
+        self.checkpoints_written = 0
+        self.last_size = 0
+        self._next_checkpoint = None
+        self._pending = queue.Queue(maxsize=1)
+        self._writer = threading.Thread(target=self._write_loop, name="checkpoint-writer", daemon=True)
+        self._writer.start()
+
+    def maybe_checkpoint(self, pipelines, current_sim_time):
+        """Called after every tick; snapshots the pipelines when interval_s has passed."""
+        if self._next_checkpoint is None:
+            self._next_checkpoint = current_sim_time + self.interval_s
+        elif current_sim_time >= self._next_checkpoint:
+            self._next_checkpoint = current_sim_time + self.interval_s
+            self._submit(pipelines, current_sim_time)
+
+    def _submit(self, pipelines, current_sim_time):
+        # Capturing the state is the only work done on the loop thread: the
+        # snapshots are new arrays and dicts, so the loop can keep mutating its windows
+        snapshot = ({pipeline.name: pipeline.snapshot_state() for pipeline in pipelines}, current_sim_time, time.time())
+        try:
+            self._pending.get_nowait() # Drop a snapshot the writer has not picked up yet
+        except queue.Empty:
+            pass
+        self._pending.put_nowait(snapshot)
+
+    def _write_loop(self):
+        while True:
+            snapshot = self._pending.get()
+            if snapshot is None:
+                return
+            data = encode_checkpoint(*snapshot)
+            try:
+                write_atomic(self.path, data)
+            except OSError as e:
+                print(f"Checkpoint write failed: {e}")
+                continue
+            self.checkpoints_written += 1
+            self.last_size = len(data)
+
+    def close(self, pipelines=None, current_sim_time=None):
+        """Writes a final snapshot (if pipelines are given) and stops the writer thread."""
+        if pipelines is not None and current_sim_time is not None:
+            self._submit(pipelines, current_sim_time)
+        self._pending.put(None) # Blocks until the writer has taken the final snapshot
+        self._writer.join()
+
+
+# --- Warm Restart ---
+def restore_checkpoint(path, pipelines, sample_interval_s, real_time=False):
+    """
+    Restores the pipelines from a checkpoint file.
+
+    The run resumes at the tick after the checkpoint. With a real-time clock the
+    time the process was down is added as well, so samples that went stale
+    while it was down are dropped from the windows.
+
+    Args:
+        path (str): Checkpoint file written by Checkpointer.
+        pipelines (list): Pipelines created with create_pipeline(); matched by name.
+        sample_interval_s (float): Time between CAN samples in seconds.
+        real_time (bool): The run is paced by the wall clock.
+
+    Returns:
+        float: simulation time to resume at, or None if there is no usable checkpoint.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        print(f"Ignoring unreadable checkpoint: {path} ({e})")
+        return None
+    decoded = decode_checkpoint(data)
+    if decoded is None:
+        print(f"Ignoring corrupt or incompatible checkpoint: {path}")
+        return None
+    states, sim_time, wall_time = decoded
+
+    resume_time = sim_time + sample_interval_s
+    if real_time:
+        downtime = max(0.0, time.time() - wall_time)
+        resume_time += round(downtime / sample_interval_s) * sample_interval_s # Stay on the tick grid
+    for pipeline in pipelines:
+        if pipeline.name in states:
+            pipeline.restore_state(states[pipeline.name], resume_time)
+    return resume_time
@@ -0,0 +1,240 @@
+# cli.py
+#
+# Command line entry point:
+#     python -m vehicle_logic run --monitor braking|stability|alertness|all --clock real|virtual
+#     python -m vehicle_logic run --monitor all --checkpoint monitors.ckpt
+#     python -m vehicle_logic soak --monitor all --duration 72h --rate 100
+#     python -m vehicle_logic loadtest --monitor braking,all --vehicles 1,10
+#     python -m vehicle_logic microbatch --rate 1000 --batch-ms 50
+#     python -m vehicle_logic fleet --vehicles 10000 --rate 100
+#     python -m vehicle_logic alerts --db alerts.db --level HIGH --minutes 10
+#     python -m vehicle_logic sketches vehicle-*.sketch --output fleet.sketch
+#     python -m vehicle_logic sweep ...      (Batch_Processing.threshold_sweep)
+#     python -m vehicle_logic evaluate ...   (Batch_Processing.detection_evaluation)
+#     python -m vehicle_logic calibrate-ewm ...  (Batch_Processing.ewm_calibration)
+#     python -m vehicle_logic batch logs/ --output report.json  (Batch_Processing.drive_log_batch)
+#
+# Only argparse and the runtime registry are imported up front; monitor packages,
+# NumPy and pyserial are imported when a command actually needs them.
+
+import argparse
+import importlib
+import sys
+import time
+
+from Simulation_Config import SIMULATION_DURATION_S, CAN_SAMPLE_INTERVAL_S
+from .runtime import MONITOR_PIPELINES, ALL_MONITORS
+
+# Sub-commands implemented by another module's main(argv); their options are
+# parsed by that module so its imports stay out of the startup path.
+DELEGATED_COMMANDS = {
+    "sweep": ("Batch_Processing.threshold_sweep", "Sweep monitor thresholds over recorded or generated sessions"),
+    "evaluate": ("Batch_Processing.detection_evaluation", "Measure detection latency and accuracy against ground truth"),
+    "batch": ("Batch_Processing.drive_log_batch", "Re-run the monitors over a directory of recorded drive logs"),
+    "calibrate-ewm": ("Batch_Processing.ewm_calibration", "Fit the ewm feature mode's STD scales against the window STD"),
+    "microbatch": ("vehicle_logic.microbatch", "Benchmark micro-batched high-rate ingestion"),
+    "fleet": ("Fleet_Simulator", "Benchmark the vectorized fleet signal simulator"),
+}
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="vehicle_logic", description="Vehicle logic monitors.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run one or all monitors")
+    run.add_argument("--monitor", default="braking", choices=list(MONITOR_PIPELINES) + [ALL_MONITORS],
+                     help="Monitor pipeline(s) to run")
+    run.add_argument("--clock", default="real", choices=["real", "virtual"],
+                     help="real = paced like the vehicle bus, virtual = as fast as possible")
+    run.add_argument("--duration", type=float, default=SIMULATION_DURATION_S, help="Simulated duration (s)")
+    run.add_argument("--interval", type=float, default=CAN_SAMPLE_INTERVAL_S, help="CAN sample interval (s)")
+    run.add_argument("--serial-port", default=None, help="Serial port for alerts (e.g. COM4, /dev/ttyUSB0)")
+    run.add_argument("--baud", type=int, default=9600, help="Serial baud rate")
+    run.add_argument("--quiet", action="store_true", help="Do not print per-tick status")
+    run.add_argument("--metrics-port", type=int, default=None,
+                     help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    run.add_argument("--alert-db", default=None, help="Record alerts in this SQLite alert history")
+    run.add_argument("--vehicle-id", default="vehicle-0", help="Vehicle id stored with each alert")
+    run.add_argument("--processes", action="store_true",
+                     help="Run each monitor in its own process, fed through a shared-memory ring buffer")
+    run.add_argument("--sketch-out", default=None,
+                     help="Write quantile sketches of the monitors' key features to this file")
+    run.add_argument("--features", default="window", choices=["window", "ewm"],
+                     help="Exact rolling windows, or constant-memory exponentially weighted statistics")
+    run.add_argument("--checkpoint", default=None,
+                     help="Snapshot monitor state to this file and warm-restart from it on startup")
+    run.add_argument("--checkpoint-interval", type=float, default=None,
+                     help="Simulated time between checkpoints (s, default 30)")
+
+    alerts = commands.add_parser("alerts", help="Query the SQLite alert history")
+    alerts.add_argument("--db", required=True, help="Alert history database (see run --alert-db)")
+    alerts.add_argument("--level", default="HIGH", help="Alert level to list")
+    alerts.add_argument("--minutes", type=float, default=60.0, help="How far back to look")
+    alerts.add_argument("--vehicle-id", default=None, help="Only this vehicle")
+    alerts.add_argument("--rule-counts", action="store_true", help="Print trigger counts per rule instead")
+
+    sketches = commands.add_parser("sketches", help="Merge feature sketch files and print fleet percentiles")
+    sketches.add_argument("files", nargs="+", help="Sketch files written by run --sketch-out")
+    sketches.add_argument("--quantiles", default="0.5,0.9,0.95,0.99", help="Comma-separated quantiles to print")
+    sketches.add_argument("--output", default=None, help="Also write the merged sketches to this file")
+
+    soak = commands.add_parser("soak", help="Long-run soak test with memory and latency drift checks")
+    from .soak import add_arguments as add_soak_arguments
+    add_soak_arguments(soak)
+
+    loadtest = commands.add_parser("loadtest", help="Step the input rate to find each pipeline's saturation point")
+    from .load_test import add_arguments as add_loadtest_arguments
+    add_loadtest_arguments(loadtest)
+
+    for name, (_, help_text) in DELEGATED_COMMANDS.items():
+        delegated = commands.add_parser(name, help=help_text, add_help=False)
+        delegated.add_argument("args", nargs=argparse.REMAINDER)
+    return parser
+
+
+def run_command(args):
+    """Runs the selected monitor pipeline(s) from one loop."""
+    from Simulation_Clock import make_clock
+    from .runtime import resolve_monitor_names, create_pipeline, pipeline_options, run_monitors
+
+    serial_logger = None
+    if args.serial_port:
+        from serial_logger import SerialLogger
+        serial_logger = SerialLogger(args.serial_port, args.baud)
+    metrics = None
+    if args.metrics_port is not None:
+        from .metrics import MonitorMetrics, start_http_server
+        metrics = MonitorMetrics()
+        start_http_server(metrics.registry, args.metrics_port)
+        print(f"Metrics: http://127.0.0.1:{args.metrics_port}/metrics")
+    alert_store = None
+    if args.alert_db:
+        from .alert_store import AlertStore
+        alert_store = AlertStore(args.alert_db, vehicle_id=args.vehicle_id)
+    sketches = None
+    if args.sketch_out:
+        from Signal_Processing.quantile_sketch import FeatureSketches
+        sketches = FeatureSketches()
+    if args.processes:
+        if args.checkpoint:
+            raise SystemExit("--checkpoint is not supported with --processes")
+        return process_command(args, serial_logger, metrics, alert_store, sketches)
+
+    pipelines = [create_pipeline(name, **pipeline_options(name, args.features)) for name in resolve_monitor_names(args.monitor)]
+
+    start_time = 0.0
+    checkpointer = None
+    if args.checkpoint:
+        from .checkpoint import Checkpointer, restore_checkpoint, DEFAULT_CHECKPOINT_INTERVAL_S
+        restore_start = time.perf_counter()
+        resume_time = restore_checkpoint(args.checkpoint, pipelines, args.interval, real_time=args.clock == "real")
+        if resume_time is not None:
+            start_time = resume_time
+            print(f"Restored checkpoint {args.checkpoint} in {(time.perf_counter() - restore_start) * 1000:.1f} ms, "
+                  f"resuming at t={start_time:.1f}s")
+        checkpointer = Checkpointer(args.checkpoint, args.checkpoint_interval or DEFAULT_CHECKPOINT_INTERVAL_S)
+
+    start = time.perf_counter()
+    ticks = 0
+    try:
+        ticks = run_monitors(pipelines, make_clock(args.clock), args.duration, args.interval,
+                             serial_logger=serial_logger, verbose=not args.quiet, metrics=metrics,
+                             alert_store=alert_store, sketches=sketches, start_time=start_time,
+                             checkpointer=checkpointer)
+    finally:
+        if checkpointer is not None:
+            checkpointer.close(pipelines, start_time + (ticks - 1) * args.interval if ticks else None)
+        if serial_logger is not None:
+            serial_logger.close()
+        if alert_store is not None:
+            alert_store.close()
+        if sketches is not None:
+            sketches.save(args.sketch_out)
+    elapsed = time.perf_counter() - start
+    print(f"--- {', '.join(p.name for p in pipelines)}: {ticks} ticks in {elapsed:.2f}s ({args.clock} clock) ---")
+    return 0
+
+
+def process_command(args, serial_logger, metrics=None, alert_store=None, sketches=None):
+    """Runs the selected monitors in worker processes (see process_pipeline.py)."""
+    from .process_pipeline import run_process_pipeline
+
+    start = time.perf_counter()
+    try:
+        summary = run_process_pipeline(args.monitor, args.clock, args.duration, args.interval,
+                                       serial_logger=serial_logger, verbose=not args.quiet, metrics=metrics,
+                                       alert_store=alert_store, sketches=sketches, feature_mode=args.features)
+    finally:
+        if serial_logger is not None:
+            serial_logger.close()
+        if alert_store is not None:
+            alert_store.close()
+        if sketches is not None:
+            sketches.save(args.sketch_out)
+    elapsed = time.perf_counter() - start
+    for name, counts in summary.items():
+        print(f"--- {name}: {counts['ticks']} ticks, {counts['alerts']} alerts, "
+              f"{counts['dropped']} dropped in {elapsed:.2f}s ({args.clock} clock, own process) ---")
+    return 0
+
+
+def alerts_command(args):
+    """Prints recent alerts of one level, or trigger counts per rule, from the alert history."""
+    import os
+    from .alert_store import AlertReader
+
+    if not os.path.exists(args.db):
+        raise SystemExit(f"No alert history at {args.db}")
+    store = AlertReader(args.db)
+    try:
+        since = time.time() - args.minutes * 60.0
+        if args.rule_counts:
+            counts = store.rule_counts(since=since, vehicle_id=args.vehicle_id)
+            for (monitor, rule), count in counts.items():
+                print(f"{count:8d}  {monitor:9s} {rule}")
+            return 0
+        alerts = store.recent_alerts(args.minutes, level=args.level, vehicle_id=args.vehicle_id)
+        for alert in alerts:
+            recorded = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(alert["timestamp"]))
+            print(f"{recorded} | {alert['vehicle_id']} | {alert['monitor']:9s} | t={alert['sim_time']:0.2f}s | "
+                  f"{alert['level']} - {alert['description']} ({', '.join(alert['rules'])})")
+        print(f"--- {len(alerts)} {args.level} alerts in the last {args.minutes:g} minutes ---")
+    finally:
+        store.close()
+    return 0
+
+
+def sketches_command(args):
+    """Merges per-vehicle / per-worker sketch files and prints the percentiles of every feature."""
+    from Signal_Processing.quantile_sketch import FeatureSketches, merge_feature_sketches
+
+    quantiles = [float(q) for q in args.quantiles.split(",")]
+    merged = merge_feature_sketches(FeatureSketches.load(path) for path in args.files)
+    for key, stats in merged.summary(quantiles).items():
+        percentiles = " ".join(f"{name}={value:.4g}" for name, value in stats.items() if name.startswith("p"))
+        print(f"{key:36s} n={stats['count']:<9d} min={stats['min']:.4g} max={stats['max']:.4g} {percentiles}")
+    if args.output:
+        merged.save(args.output)
+    print(f"--- {len(args.files)} sketch file(s), {len(merged.sketches)} features ---")
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in DELEGATED_COMMANDS:
+        # Hand every remaining argument (including --help) to the delegated module
+        module_name, _ = DELEGATED_COMMANDS[argv[0]]
+        importlib.import_module(module_name).main(argv[1:])
+        return 0
+    args = build_arg_parser().parse_args(argv)
+    if args.command == "alerts":
+        return alerts_command(args)
+    if args.command == "sketches":
+        return sketches_command(args)
+    if args.command == "soak":
+        from .soak import soak_command
+        return soak_command(args)
+    if args.command == "loadtest":
+        from .load_test import loadtest_command
+        return loadtest_command(args)
+    return run_command(args)
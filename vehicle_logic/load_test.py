@@ -0,0 +1,348 @@
+# load_test.py
+#
+# Saturation load test: drives each monitor pipeline (and all of them together)
+# with synthetic fleet traffic at stepped rates, from decoded signals through
+# SerialLogger, and finds the highest per-vehicle sample rate each target
+# sustains in real time:
+#     python -m vehicle_logic loadtest --monitor braking,stability,alertness,all --vehicles 1,10
+#
+# Every step is open loop: tick k of every vehicle is due at start + k / rate,
+# whether or not the previous tick has finished, and its lag is the time from
+# that due time until the vehicle's pipelines (and serial write) are done. A
+# step is saturated when the achieved rate falls short of the offered rate or
+# the p99 lag exceeds the lag budget. Alerts go to a pseudo-terminal standing
+# in for the serial port (drained by a thread), or nowhere with --serial none.
+# Each step's fleet traffic is generated before the step (a bounded pool, replayed
+# cyclically on the tick grid), so only the pipelines and the serial write are
+# timed: the simulator costs far more per tick than the cheaper pipelines.
+# Pseudo-terminals are POSIX only: elsewhere the default is --serial none.
+
+import argparse
+import os
+import threading
+import time
+
+from Read_Signal import SIGNAL_NAMES
+from Simulation_Config import WINDOW_DURATION_S
+from .runtime import MONITOR_PIPELINES, ALL_MONITORS, WINDOWED_MONITORS, resolve_monitor_names, create_pipeline, pipeline_options
+from .soak import parse_duration, _percentile
+
+# --- Load Test Defaults ---
+DEFAULT_RATES_HZ = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 50000, 100000, 200000,
+                    500000) # Per vehicle, every signal
+DEFAULT_VEHICLES = (1, 10)
+DEFAULT_STEP_S = 2.0               # Wall time each rate step is offered for
+MIN_STEP_TICKS = 5                 # Low rates run longer than DEFAULT_STEP_S to get this many ticks
+DEFAULT_MAX_LAG_S = 0.1            # p99 lag budget of a sustainable step
+DEFAULT_THROUGHPUT_TOLERANCE = 0.05
+STEP_DEADLINE_FACTOR = 2.0         # A step falling this far behind is cut short (already saturated)
+WARMUP_GRACE_S = 1.0               # Warm-up may trail real time by this much before the step counts as saturated
+DEFAULT_BAUD = 115200
+PTY_AVAILABLE = hasattr(os, "openpty") # os.openpty / os.ttyname do not exist on Windows
+DEFAULT_SERIAL = "pty" if PTY_AVAILABLE else "none"
+TRAFFIC_POOL_ROWS = 16384          # Vehicle-ticks of traffic generated per step (replayed cyclically)
+
+
+# --- Serial Port Stand-in ---
+class PtySerialPort:
+    """
+    Pseudo-terminal that a SerialLogger can open like a real port. A thread reads
+    (and discards) everything written, so writes never block on a full buffer.
+    POSIX only (see PTY_AVAILABLE).
+    """
+    def __init__(self):
+        self._master, self._slave = os.openpty()
+        self.path = os.ttyname(self._slave)
+        self.bytes_received = 0
+        self._thread = threading.Thread(target=self._drain, name="pty-drain", daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            try:
+                data = os.read(self._master, 65536)
+            except OSError: # EIO once every slave end is closed
+                return
+            if not data:
+                return
+            self.bytes_received += len(data)
+
+    def close(self):
+        os.close(self._slave) # Last slave end (the logger closed its own): the drain thread sees EIO
+        self._thread.join(timeout=1.0)
+        os.close(self._master)
+
+
+def open_serial_output(serial, baud=DEFAULT_BAUD):
+    """
+    Opens the alert output of a load test.
+
+    Args:
+        serial (str): "pty" (pseudo-terminal), "none" (no serial output) or a real port name.
+                      "pty" falls back to "none" where pseudo-terminals are not available.
+
+    Returns:
+        tuple: (SerialLogger or None, PtySerialPort or None)
+    """
+    if serial == "pty" and not PTY_AVAILABLE:
+        print("Pseudo-terminals are not available on this platform; running without serial output.")
+        serial = "none"
+    if serial == "none":
+        return None, None
+    from serial_logger import SerialLogger
+    pty = PtySerialPort() if serial == "pty" else None
+    return SerialLogger(pty.path if pty else serial, baud), pty
+
+
+# --- One Rate Step ---
+def _process_vehicle(pipelines, current_sim_time, signals, serial_logger):
+    """Same per-pipeline work as run_monitors() without status printing."""
+    for pipeline in pipelines:
+        alert_level, alert_description = pipeline.process(current_sim_time, signals)
+        if serial_logger is not None and serial_logger.is_active():
+            message = pipeline.alert_message(alert_level, alert_description)
+            if message:
+                serial_logger.log_alert(message)
+
+
+def _prepare_traffic(simulator, ticks, pool_rows=TRAFFIC_POOL_ROWS):
+    """
+    Generates a step's fleet traffic before anything is timed: the simulator costs
+    far more per tick than the cheaper pipelines, so it must not run inside a timed
+    tick. At most pool_rows vehicle-ticks are generated; longer runs replay them
+    cyclically (tick k uses traffic[k % len(traffic)], timestamped k * interval),
+    which bounds memory and setup time at high rates.
+
+    Returns:
+        list: per tick, one signal dict per vehicle (what pipeline.process() takes).
+    """
+    import numpy as np # Imported lazily: the CLI imports this module to build its parser
+    pool_ticks = max(1, min(ticks, pool_rows // simulator.vehicles))
+    steps = [simulator.step()[1] for _ in range(pool_ticks)]
+    values = np.stack([np.stack([signals[name] for name in SIGNAL_NAMES], axis=1) for signals in steps])
+    return [[dict(zip(SIGNAL_NAMES, vehicle_values)) for vehicle_values in tick_values]
+            for tick_values in values.tolist()] # (tick, vehicle) -> signals
+
+
+def _warm_up(fleet, traffic, ticks, interval):
+    """
+    Feeds ticks of traffic as fast as possible so rolling windows hold a full
+    window at the step's rate (a half-empty window would flatter the result).
+
+    Returns:
+        bool: False if even the unpaced warm-up fell behind real time.
+    """
+    perf_counter = time.perf_counter
+    pool = len(traffic)
+    start = perf_counter()
+    for tick in range(ticks):
+        current_sim_time = tick * interval
+        for pipelines, signals in zip(fleet, traffic[tick % pool]):
+            _process_vehicle(pipelines, current_sim_time, signals, None)
+        if perf_counter() - start > current_sim_time + WARMUP_GRACE_S:
+            return False
+    return True
+
+
+def run_step(monitor_names, vehicles, rate_hz, step_s=DEFAULT_STEP_S, warmup_s=WINDOW_DURATION_S, serial_logger=None,
+             feature_mode="window", max_lag_s=DEFAULT_MAX_LAG_S, throughput_tolerance=DEFAULT_THROUGHPUT_TOLERANCE,
+             seed=0):
+    """
+    Offers one rate to fresh pipelines for a fleet of vehicles and measures the lag.
+
+    Args:
+        monitor_names (list): Monitors run for every vehicle.
+        vehicles (int): Fleet size (each vehicle has its own pipelines).
+        rate_hz (float): Samples per second per vehicle (every signal is sampled each tick).
+        step_s (float): Wall time the rate is offered for.
+        warmup_s (float): Traffic fed unpaced before the step (0 = start with empty windows).
+        serial_logger (SerialLogger): Alert output (None = no serial output).
+
+    Returns:
+        dict: rate, offered/achieved samples per second, lag percentiles (ms),
+              busy fraction, "saturated" and the reason.
+    """
+    from Fleet_Simulator import FleetSimulator
+
+    interval = 1.0 / rate_hz
+    simulator = FleetSimulator(vehicles, interval, seed=seed)
+    fleet = [[create_pipeline(name, **pipeline_options(name, feature_mode)) for name in monitor_names]
+             for _ in range(vehicles)]
+    result = {"rate_hz": rate_hz, "vehicles": vehicles, "offered_per_s": rate_hz * vehicles}
+    ticks = max(MIN_STEP_TICKS, round(step_s * rate_hz))
+    warmup_ticks = 0
+    if warmup_s and any(name in WINDOWED_MONITORS for name in monitor_names):
+        warmup_ticks = int(warmup_s / interval)
+    traffic = _prepare_traffic(simulator, warmup_ticks + ticks)
+    pool = len(traffic)
+    if warmup_ticks and not _warm_up(fleet, traffic, warmup_ticks, interval):
+        result.update(achieved_per_s=None, lag_p50_ms=None, lag_p99_ms=None, lag_max_ms=None, busy=1.0,
+                      saturated=True, reason="warm-up slower than real time")
+        return result
+
+    deadline_s = max(step_s, MIN_STEP_TICKS * interval) * STEP_DEADLINE_FACTOR
+    perf_counter = time.perf_counter
+    sleep = time.sleep
+    lags = []
+    busy = 0.0
+    processed = 0
+    start = perf_counter()
+    for tick in range(ticks):
+        due = start + tick * interval
+        now = perf_counter()
+        if now < due:
+            sleep(due - now)
+        tick_start = perf_counter()
+        current_sim_time = (warmup_ticks + tick) * interval
+        for pipelines, signals in zip(fleet, traffic[(warmup_ticks + tick) % pool]):
+            _process_vehicle(pipelines, current_sim_time, signals, serial_logger)
+            lags.append(perf_counter() - due)
+        tick_end = perf_counter()
+        busy += tick_end - tick_start
+        processed += 1
+        if tick_end - start > deadline_s:
+            break
+    elapsed = max(perf_counter() - start, processed * interval) # A step that kept up lasts processed ticks
+
+    lags.sort()
+    achieved = processed * vehicles / elapsed
+    result.update(
+        achieved_per_s=achieved,
+        lag_p50_ms=_percentile(lags, 0.50) * 1000.0,
+        lag_p99_ms=_percentile(lags, 0.99) * 1000.0,
+        lag_max_ms=lags[-1] * 1000.0,
+        busy=busy / elapsed,
+    )
+    if processed < ticks or achieved < result["offered_per_s"] * (1.0 - throughput_tolerance):
+        result.update(saturated=True, reason="throughput below offered rate")
+    elif result["lag_p99_ms"] > max_lag_s * 1000.0:
+        result.update(saturated=True, reason=f"p99 lag above {max_lag_s * 1000.0:g} ms")
+    else:
+        result.update(saturated=False, reason=None)
+    return result
+
+
+# --- Saturation Search ---
+def parse_targets(text):
+    """
+    Parses "braking,stability,alertness,all" into (label, monitor names) pairs;
+    "all" runs the three monitors together for each vehicle.
+    """
+    targets = []
+    for token in (part.strip() for part in text.split(",")):
+        if token:
+            targets.append((token, resolve_monitor_names(token)))
+    if not targets:
+        raise ValueError("No load test targets given")
+    return targets
+
+
+def _targets_argument(text):
+    """argparse type for --monitor: a bad target is a usage error, not a traceback."""
+    try:
+        return parse_targets(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def run_load_test(targets, vehicle_counts=DEFAULT_VEHICLES, rates_hz=DEFAULT_RATES_HZ, step_s=DEFAULT_STEP_S,
+                  warmup_s=WINDOW_DURATION_S, serial_logger=None, feature_mode="window", max_lag_s=DEFAULT_MAX_LAG_S,
+                  throughput_tolerance=DEFAULT_THROUGHPUT_TOLERANCE, verbose=True):
+    """
+    Steps the rate up for every target and fleet size until the target saturates.
+
+    Rates above the first saturated one are not run: they only take longer to fail.
+
+    Returns:
+        list: one dict per (target, fleet size) with the latency curve ("steps"),
+              the highest sustained rate and the first saturated rate.
+    """
+    rows = []
+    for label, monitor_names in targets:
+        for vehicles in vehicle_counts:
+            steps = []
+            for rate_hz in sorted(rates_hz):
+                step = run_step(monitor_names, vehicles, rate_hz, step_s, warmup_s, serial_logger, feature_mode,
+                                max_lag_s, throughput_tolerance)
+                steps.append(step)
+                if verbose:
+                    print(_format_step(label, step))
+                if step["saturated"]:
+                    break
+            sustained = [step for step in steps if not step["saturated"]]
+            saturated = [step for step in steps if step["saturated"]]
+            rows.append({
+                "target": label, "monitors": monitor_names, "vehicles": vehicles,
+                "max_sustained_rate_hz": sustained[-1]["rate_hz"] if sustained else None,
+                "max_sustained_per_s": sustained[-1]["achieved_per_s"] if sustained else None,
+                "saturation_rate_hz": saturated[0]["rate_hz"] if saturated else None,
+                "steps": steps,
+            })
+    return rows
+
+
+def _format_step(label, step):
+    if step["achieved_per_s"] is None:
+        return (f"{label:9s} x{step['vehicles']:<4d} {step['rate_hz']:>7g} Hz | offered {step['offered_per_s']:>9.0f}/s | "
+                f"SATURATED ({step['reason']})")
+    status = f"SATURATED ({step['reason']})" if step["saturated"] else "ok"
+    return (f"{label:9s} x{step['vehicles']:<4d} {step['rate_hz']:>7g} Hz | offered {step['offered_per_s']:>9.0f}/s | "
+            f"achieved {step['achieved_per_s']:>9.0f}/s | lag p50={step['lag_p50_ms']:8.2f} p99={step['lag_p99_ms']:8.2f} "
+            f"max={step['lag_max_ms']:8.2f} ms | busy {step['busy']:4.0%} | {status}")
+
+
+# --- Command Line ---
+def add_arguments(parser):
+    parser.add_argument("--monitor", type=_targets_argument, default=f"{','.join(MONITOR_PIPELINES)},{ALL_MONITORS}",
+                        help="Comma-separated targets; 'all' runs every monitor together")
+    parser.add_argument("--rates", default=",".join(str(rate) for rate in DEFAULT_RATES_HZ),
+                        help="Comma-separated samples per second per vehicle, stepped in increasing order")
+    parser.add_argument("--vehicles", default=",".join(str(count) for count in DEFAULT_VEHICLES),
+                        help="Comma-separated fleet sizes")
+    parser.add_argument("--step", default=str(DEFAULT_STEP_S), help="Wall time per rate step, e.g. 2, 10s")
+    parser.add_argument("--warmup", default=str(WINDOW_DURATION_S),
+                        help="Traffic fed unpaced before each step to fill the rolling windows (0 = none)")
+    parser.add_argument("--max-lag", type=float, default=DEFAULT_MAX_LAG_S, help="p99 lag budget (s)")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_THROUGHPUT_TOLERANCE,
+                        help="Allowed shortfall of the achieved rate")
+    parser.add_argument("--serial", default=DEFAULT_SERIAL,
+                        help=f"pty (pseudo-terminal, POSIX only), none, or a real serial port (default: {DEFAULT_SERIAL})")
+    parser.add_argument("--baud", type=int, default=DEFAULT_BAUD, help="Serial baud rate")
+    parser.add_argument("--features", default="window", choices=["window", "ewm"],
+                        help="Feature mode of the windowed monitors")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    parser.add_argument("--quiet", action="store_true", help="Only print the summary")
+
+
+def loadtest_command(args):
+    targets = args.monitor # (label, monitor names) pairs from parse_targets()
+    rates_hz = [float(rate) for rate in args.rates.split(",")]
+    vehicle_counts = [int(count) for count in args.vehicles.split(",")]
+    serial_logger, pty = open_serial_output(args.serial, args.baud)
+    start = time.perf_counter()
+    try:
+        rows = run_load_test(targets, vehicle_counts, rates_hz, parse_duration(args.step), parse_duration(args.warmup),
+                             serial_logger, args.features, args.max_lag, args.tolerance, verbose=not args.quiet)
+    finally:
+        if serial_logger is not None:
+            serial_logger.close()
+        if pty is not None:
+            pty.close()
+    if args.output:
+        import json
+        report = {
+            "settings": {"rates_hz": rates_hz, "vehicles": vehicle_counts, "step_s": parse_duration(args.step),
+                         "warmup_s": parse_duration(args.warmup), "max_lag_s": args.max_lag,
+                         "tolerance": args.tolerance, "serial": args.serial, "features": args.features},
+            "serial_bytes": serial_logger.bytes_written if serial_logger is not None else 0,
+            "results": rows,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"--- Load test in {time.perf_counter() - start:.1f}s: highest sustained rate per vehicle ---")
+    for row in rows:
+        sustained = (f"{row['max_sustained_rate_hz']:g} Hz ({row['max_sustained_per_s']:.0f} samples/s)"
+                     if row["max_sustained_rate_hz"] is not None else "none")
+        limit = f"saturates at {row['saturation_rate_hz']:g} Hz" if row["saturation_rate_hz"] is not None else "never saturated"
+        print(f"  {row['target']:9s} x{row['vehicles']:<4d} {sustained}, {limit}")
+    return 0
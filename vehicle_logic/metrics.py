@@ -0,0 +1,272 @@
+# metrics.py
+#
+# Minimal metrics registry (counters, gauges, histograms) rendered in the
+# Prometheus text exposition format and served from a small HTTP thread:
+#     python -m vehicle_logic run --monitor all --metrics-port 9108
+#     curl http://127.0.0.1:9108/metrics
+#
+# Updates are plain attribute arithmetic on pre-resolved label children, so the
+# monitor loop pays well under a microsecond per update. The HTTP thread only
+# reads; a scrape may see a histogram's sum one observation ahead of its buckets.
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; covers a sub-10 us rule check up to a 50 ms stall
+DEFAULT_LATENCY_BUCKETS_S = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                             0.001, 0.0025, 0.005, 0.01, 0.025, 0.05)
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+# --- Metric Children (one per label combination) ---
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("upper_bounds", "bucket_counts", "sum")
+
+    def __init__(self, upper_bounds):
+        self.upper_bounds = upper_bounds
+        self.bucket_counts = [0] * (len(upper_bounds) + 1) # Last bucket is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.bucket_counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+
+# --- Metric Families ---
+class _Metric:
+    metric_type = None
+    child_class = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock() # Guards creation of children only, never updates
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        return self.child_class()
+
+    def labels(self, *values):
+        """
+        Returns the child for one label combination (create it once, outside the hot loop).
+
+        Args:
+            values: One value per label name, in labelnames order.
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for key, child in list(self._children.items()):
+            lines.extend(self._render_child(key, child))
+        return lines
+
+    def _render_child(self, key, child):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (e.g. ticks processed, bytes written)."""
+    metric_type = "counter"
+    child_class = _CounterChild
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (e.g. queue depth)."""
+    metric_type = "gauge"
+    child_class = _GaugeChild
+
+    def set(self, value):
+        self._default.set(value)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets (e.g. stage latency in seconds)."""
+    metric_type = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS_S):
+        self.upper_bounds = sorted(buckets)
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def _render_child(self, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.upper_bounds + [float("inf")], list(child.bucket_counts)):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# --- Registry ---
+class MetricsRegistry:
+    """Holds metric families and renders them for a scrape."""
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_LATENCY_BUCKETS_S):
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Keep scrapes out of the monitor console output
+
+
+def start_http_server(registry, port, host="127.0.0.1"):
+    """
+    Serves registry.render() at http://host:port/metrics from a daemon thread.
+
+    Returns:
+        ThreadingHTTPServer: call shutdown() to stop it.
+    """
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    return server
+
+
+# --- Monitor Metrics ---
+class MonitorMetrics:
+    """The metric families the monitor loops update."""
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        self.ticks = self.registry.counter(
+            "vehicle_logic_ticks_total", "Samples processed by each monitor", ["monitor"])
+        self.stage_latency = self.registry.histogram(
+            "vehicle_logic_stage_latency_seconds", "Time spent per tick in each pipeline stage", ["monitor", "stage"])
+        self.alerts = self.registry.counter(
+            "vehicle_logic_alerts_total", "Ticks that ended at each alert level", ["monitor", "level"])
+        self.rule_triggers = self.registry.counter(
+            "vehicle_logic_rule_triggers_total", "Rule triggers by rule and resulting alert level",
+            ["monitor", "rule", "level"])
+        self.serial_bytes = self.registry.counter(
+            "vehicle_logic_serial_bytes_total", "Bytes written to the serial alert port")
+        self.queue_depth = self.registry.gauge(
+            "vehicle_logic_queue_depth", "Samples waiting to be processed", ["queue"])
+
+    def for_monitor(self, monitor_name):
+        """Pre-resolves the children one monitor updates every tick."""
+        return PipelineMetrics(self, monitor_name)
+
+
+class PipelineMetrics:
+    """Label children of MonitorMetrics for one monitor (no label lookups in the loop)."""
+    def __init__(self, metrics, monitor_name):
+        self._metrics = metrics
+        self.monitor_name = monitor_name
+        self.ticks = metrics.ticks.labels(monitor_name)
+        self.read_latency = metrics.stage_latency.labels(monitor_name, "read")
+        self.process_latency = metrics.stage_latency.labels(monitor_name, "process")
+        self.output_latency = metrics.stage_latency.labels(monitor_name, "output")
+        self._levels = {}
+        self._rules = {}
+
+    def record_result(self, alert_level, triggered_rules=()):
+        """Counts one tick's alert level and the rules behind it."""
+        level_child = self._levels.get(alert_level)
+        if level_child is None:
+            level_child = self._levels[alert_level] = self._metrics.alerts.labels(self.monitor_name, alert_level)
+        level_child.inc()
+        for rule in triggered_rules:
+            key = (rule, alert_level)
+            rule_child = self._rules.get(key)
+            if rule_child is None:
+                rule_child = self._rules[key] = self._metrics.rule_triggers.labels(self.monitor_name, rule, alert_level)
+            rule_child.inc()
@@ -0,0 +1,186 @@
+# microbatch.py
+#
+# High-rate ingestion: samples arriving every 1-20 ms are buffered for a short
+# batch interval and then pushed through windows, features and rules as arrays,
+# instead of running the per-tick Python call chain for every sample.
+
+import argparse
+import time
+
+import numpy as np
+
+from Read_Signal import SIGNAL_NAMES
+from Simulation_Config import WINDOW_DURATION_S
+from Signal_Processing.array_window import ArrayWindow
+from Signal_Processing.rolling_quantiles import RollingQuantiles
+from Signal_Processing.signal_encoding import SIGNAL_ENCODINGS
+from Driver_Alertness_Module.steering_features import SteeringFrequencyFeatures
+from Batch_Processing import vectorized_rules
+from .runtime import MONITOR_PIPELINES, ALL_MONITORS, resolve_monitor_names
+
+DEFAULT_BATCH_INTERVAL_S = 0.05 # 50 ms
+
+# Monitor name -> vectorized level function (K=1 config)
+MONITOR_LEVEL_FUNCTIONS = {
+    "braking": vectorized_rules.braking_levels,
+    "stability": vectorized_rules.stability_levels,
+    "alertness": vectorized_rules.alertness_levels,
+}
+
+
+class MicroBatchResult:
+    """Per-sample results of one flushed batch."""
+    def __init__(self, timestamps, levels):
+        self.timestamps = timestamps # np.ndarray of sample timestamps
+        self.levels = levels         # monitor name -> np.ndarray of level codes (0-3) per sample
+
+    def alerts(self):
+        """Returns (timestamp, monitor, level name) for every sample whose level is not normal."""
+        found = []
+        for monitor, levels in self.levels.items():
+            for i in np.flatnonzero(levels):
+                found.append((float(self.timestamps[i]), monitor, vectorized_rules.ALERT_LEVEL_NAMES[levels[i]]))
+        found.sort()
+        return found
+
+
+class MicroBatchPipeline:
+    """
+    Accumulates incoming samples for batch_interval_s, then evaluates the selected
+    monitors over the whole batch in one vectorized call per monitor.
+
+    Results keep one level per sample, so alert timestamps are exactly those of the
+    samples that raised them; only the moment they are reported is delayed by at
+    most one batch interval.
+
+    With compact=True the STD windows hold DBC raw codes instead of float64
+    (values are quantized to the DBC resolution and saturated at its range, as
+    they are on the bus). Only these windows are compact; see signal_encoding.py.
+    """
+    def __init__(self, monitor_names="all", batch_interval_s=DEFAULT_BATCH_INTERVAL_S,
+                 window_duration=WINDOW_DURATION_S, config=None, compact=False):
+        self.monitors = resolve_monitor_names(monitor_names)
+        self.batch_interval_s = batch_interval_s
+        self.configs = [config or vectorized_rules.default_threshold_config()]
+        self.windows = {}
+        self.steering_features = None
+        if "alertness" in self.monitors:
+            statistics = vectorized_rules.std_feature_statistics()
+            for feature, signal in vectorized_rules.STD_FEATURE_SIGNALS.items():
+                if statistics[feature] == "std":
+                    self.windows[feature] = ArrayWindow(window_duration, encoding=SIGNAL_ENCODINGS[signal] if compact else None)
+                else: # Robust statistic selected by the threshold table (same extend() interface)
+                    self.windows[feature] = RollingQuantiles(window_duration, statistics[feature])
+            self.steering_features = SteeringFrequencyFeatures(window_duration)
+        self.rule_inputs = vectorized_rules.rule_input_trackers() if "stability" in self.monitors else {}
+        self._pending_timestamps = []
+        self._pending = {name: [] for name in SIGNAL_NAMES}
+        self.samples_processed = 0
+
+    def pending_count(self):
+        """Number of samples waiting for the next flush."""
+        return len(self._pending_timestamps)
+
+    def ingest(self, timestamp, signals):
+        """
+        Buffers one decoded sample and flushes once the batch interval has elapsed.
+
+        Args:
+            timestamp (float): Sample time in seconds.
+            signals (dict): DBC signal name -> value.
+
+        Returns:
+            MicroBatchResult or None: the flushed batch, if this sample completed one.
+        """
+        self._pending_timestamps.append(timestamp)
+        for name, column in self._pending.items():
+            column.append(signals[name])
+        if timestamp - self._pending_timestamps[0] >= self.batch_interval_s:
+            return self.flush()
+        return None
+
+    def ingest_arrays(self, timestamps, columns):
+        """Buffers an already-decoded block of samples (arrays keyed by signal name)."""
+        self._pending_timestamps.extend(np.asarray(timestamps).tolist())
+        for name, column in self._pending.items():
+            column.extend(np.asarray(columns[name]).tolist())
+        if self._pending_timestamps and self._pending_timestamps[-1] - self._pending_timestamps[0] >= self.batch_interval_s:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """Evaluates every pending sample. Returns a MicroBatchResult (None if nothing was pending)."""
+        if not self._pending_timestamps:
+            return None
+        timestamps = np.array(self._pending_timestamps)
+        batch = {name: np.array(column, dtype=np.float64) for name, column in self._pending.items()}
+        self._pending_timestamps = []
+        self._pending = {name: [] for name in SIGNAL_NAMES}
+        return self.evaluate(timestamps, batch)
+
+    def evaluate(self, timestamps, batch):
+        """Runs windows, features and rules over one batch of arrays."""
+        features = vectorized_rules.instantaneous_features(batch)
+        vectorized_rules.apply_rule_input_trackers(features, batch, timestamps, self.rule_inputs)
+        for feature_name, window in self.windows.items():
+            signal_name = vectorized_rules.STD_FEATURE_SIGNALS[feature_name]
+            features[feature_name] = window.extend(batch[signal_name], timestamps)
+        if self.steering_features is not None:
+            features["str_reversal_rate"], features["str_lf_power_ratio"] = \
+                self.steering_features.update_many(batch["STR_ANGLE"], timestamps)
+        levels = {monitor: MONITOR_LEVEL_FUNCTIONS[monitor](features, self.configs)[0]
+                  for monitor in self.monitors}
+        self.samples_processed += timestamps.size
+        return MicroBatchResult(timestamps, levels)
+
+
+# --- Throughput Benchmark ---
+def run_benchmark(monitor_names, rate_hz, duration_s, batch_interval_s, seed=0, verbose=True):
+    """
+    Feeds a generated session sample by sample through a MicroBatchPipeline and
+    reports the sustained ingestion rate.
+
+    Returns:
+        dict: samples, alerts, elapsed time and achieved samples per second.
+    """
+    from Batch_Processing.session_arrays import generate_session
+
+    session = generate_session(duration_s, 1.0 / rate_hz, seed=seed)
+    timestamps = session["timestamp"].tolist()
+    rows = [dict(zip(SIGNAL_NAMES, values)) for values in zip(*(session[name].tolist() for name in SIGNAL_NAMES))]
+
+    pipeline = MicroBatchPipeline(monitor_names, batch_interval_s)
+    alerts = 0
+    start = time.perf_counter()
+    for timestamp, signals in zip(timestamps, rows):
+        result = pipeline.ingest(timestamp, signals)
+        if result is not None:
+            alerts += len(result.alerts())
+    result = pipeline.flush()
+    if result is not None:
+        alerts += len(result.alerts())
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "monitors": pipeline.monitors, "rate_hz": rate_hz, "batch_interval_s": batch_interval_s,
+        "samples": pipeline.samples_processed, "alerts": alerts, "elapsed_s": elapsed,
+        "samples_per_s": pipeline.samples_processed / elapsed if elapsed else float("inf"),
+    }
+    if verbose:
+        print(f"--- Micro-batch ({', '.join(pipeline.monitors)}): {report['samples']} samples at {rate_hz:.0f} Hz "
+              f"in {elapsed:.2f}s -> {report['samples_per_s']:.0f} samples/s "
+              f"({report['samples_per_s'] / rate_hz:.1f}x real time), {alerts} alert samples ---")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vehicle_logic microbatch", description="Micro-batched ingestion throughput benchmark.")
+    parser.add_argument("--monitor", default=ALL_MONITORS, choices=list(MONITOR_PIPELINES) + [ALL_MONITORS],
+                        help="Monitor pipeline(s) to run")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Samples per second per signal")
+    parser.add_argument("--duration", type=float, default=60.0, help="Simulated seconds of input")
+    parser.add_argument("--batch-ms", type=float, default=DEFAULT_BATCH_INTERVAL_S * 1000.0, help="Batch interval (ms)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    run_benchmark(args.monitor, args.rate, args.duration, args.batch_ms / 1000.0, seed=args.seed)
+    return 0
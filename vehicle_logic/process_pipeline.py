@@ -0,0 +1,186 @@
+# process_pipeline.py
+#
+# Multi-process monitor pipeline: one acquisition process generates (or decodes)
+# samples into a SharedRingBuffer, and every selected monitor runs in its own
+# process, reading the ring directly (signal values are looked up in shared
+# memory, see RowSignals). Only alerts travel back through a queue, so the
+# per-sample path never pickles anything and each monitor gets its own core.
+
+import multiprocessing
+import queue
+import time
+
+from Read_Signal import SIGNAL_NAMES
+from Simulation_Config import SIMULATION_DURATION_S, CAN_SAMPLE_INTERVAL_S
+from .runtime import resolve_monitor_names, create_pipeline, pipeline_options
+from .shm_ring import SharedRingBuffer, RowSignals, DEFAULT_CAPACITY, POLL_INTERVAL_S
+
+MAX_ROWS_PER_READ = 256 # Rows a monitor takes from the ring before releasing them
+RESULT_POLL_S = 0.5     # How often the parent checks that its workers are still alive
+PROGRESS_INTERVAL_S = 0.25 # Shortest time between a worker's progress reports (alerts share the queue)
+
+
+# --- Worker Processes ---
+def acquisition_worker(ring_args, clock_name, duration_s, sample_interval_s):
+    """Publishes one row per CAN sample into the ring, paced by the named clock."""
+    import Read_Signal
+    from Simulation_Clock import make_clock
+
+    ring = SharedRingBuffer.attach(*ring_args)
+    clock = make_clock(clock_name)
+    try:
+        ticks = 0
+        current_sim_time = 0.0
+        while current_sim_time < duration_s:
+            clock.wait_until(current_sim_time)
+            signals = Read_Signal.generate_all_signals(current_sim_time)
+            ring.write(current_sim_time, [signals[name] for name in ring.fields])
+            ticks += 1
+            current_sim_time = ticks * sample_interval_s
+    finally:
+        ring.close_writer()
+        ring.close()
+
+
+def monitor_worker(monitor_name, consumer, ring_args, results, sketch=False, feature_mode="window"):
+    """
+    Runs one monitor pipeline over every row in the ring.
+
+    Puts ("alert", monitor, timestamp, (message, level, description, rules)) on the results queue
+    for every alert, ("progress", monitor, ticks, dropped) at most every PROGRESS_INTERVAL_S
+    and ("done", monitor, ticks, dropped) when the producer has finished. With sketch=True
+    the worker sketches its features and sends ("sketches", monitor, serialized FeatureSketches, None)
+    just before "done".
+    """
+    ring = SharedRingBuffer.attach(*ring_args)
+    pipeline = create_pipeline(monitor_name, **pipeline_options(monitor_name, feature_mode))
+    sketches = None
+    if sketch:
+        from Signal_Processing.quantile_sketch import FeatureSketches
+        sketches = FeatureSketches()
+    signals = RowSignals(ring.fields)
+    seq = ticks = dropped = 0
+    next_progress = time.monotonic() + PROGRESS_INTERVAL_S
+    try:
+        while True:
+            segments, next_seq, lost = ring.read(consumer, seq, MAX_ROWS_PER_READ)
+            if next_seq == seq: # Nothing new (an overwritten read still advances, with no segments)
+                if ring.writer_closed() and ring.write_seq() == seq:
+                    break
+                time.sleep(POLL_INTERVAL_S)
+                continue
+            dropped += lost
+            for segment in segments:
+                with memoryview(segment) as rows: # Released before the ring is closed
+                    signals.rows = rows
+                    for row in range(len(segment)):
+                        signals.row = row
+                        current_sim_time = rows[row, 0]
+                        alert_level, alert_description = pipeline.process(current_sim_time, signals)
+                        if sketches is not None:
+                            sketches.update(pipeline)
+                        message = pipeline.alert_message(alert_level, alert_description)
+                        if message:
+                            alert = (message, alert_level, alert_description, pipeline.triggered_rules())
+                            results.put(("alert", monitor_name, current_sim_time, alert))
+                    signals.rows = None
+                ticks += len(segment)
+            seq = next_seq
+            ring.release(consumer, seq)
+            now = time.monotonic()
+            if now >= next_progress:
+                results.put(("progress", monitor_name, ticks, dropped))
+                next_progress = now + PROGRESS_INTERVAL_S
+    finally:
+        ring.close()
+    if sketches is not None:
+        results.put(("sketches", monitor_name, sketches.to_bytes(), None))
+    results.put(("done", monitor_name, ticks, dropped))
+
+
+# --- Parent Process ---
+def run_process_pipeline(monitor_names, clock_name="virtual", duration_s=SIMULATION_DURATION_S,
+                         sample_interval_s=CAN_SAMPLE_INTERVAL_S, serial_logger=None, verbose=True,
+                         capacity=DEFAULT_CAPACITY, overwrite=False, metrics=None,
+                         alert_store=None, sketches=None, feature_mode="window"):
+    """
+    Runs the selected monitors in separate processes fed from one shared-memory ring.
+
+    Args:
+        monitor_names: Monitor name, list of names, or "all".
+        clock_name (str): "real" paces acquisition like the vehicle bus, "virtual" runs flat out.
+        duration_s (float): Total simulated time in seconds.
+        sample_interval_s (float): Time between CAN samples in seconds.
+        serial_logger (SerialLogger): Alert output (None = no serial output).
+        verbose (bool): Print every alert as it arrives.
+        capacity (int): Ring size in rows.
+        overwrite (bool): Let acquisition overwrite rows a slow monitor has not read
+                          (real bus behaviour) instead of waiting for it.
+        metrics (MonitorMetrics): Metrics to update from worker reports (None = not instrumented).
+        alert_store (AlertStore): Alert history to record alerts in (None = not stored).
+        sketches (FeatureSketches): Merged with every worker's feature sketches at the end (None = off).
+        feature_mode (str): "window" or "ewm" (constant-memory statistics) for the windowed monitors.
+
+    Returns:
+        dict: monitor name -> {"ticks": rows processed, "dropped": rows lost, "alerts": alerts raised}
+    """
+    names = resolve_monitor_names(monitor_names)
+    context = multiprocessing.get_context("spawn") # Same behaviour on Linux and Windows
+    ring = SharedRingBuffer.create(SIGNAL_NAMES, consumers=len(names), capacity=capacity, overwrite=overwrite,
+                                   context=context)
+    results = context.Queue()
+    monitors = [context.Process(target=monitor_worker, args=(name, i, ring.attach_args(), results, sketches is not None,
+                                                                feature_mode),
+                                name=f"monitor-{name}", daemon=True)
+                for i, name in enumerate(names)]
+    acquisition = context.Process(target=acquisition_worker, name="acquisition", daemon=True,
+                                  args=(ring.attach_args(), clock_name, duration_s, sample_interval_s))
+
+    summary = {name: {"ticks": 0, "dropped": 0, "alerts": 0} for name in names}
+    if metrics is not None:
+        tick_counters = {name: metrics.ticks.labels(name) for name in names}
+        backlog_gauges = [metrics.queue_depth.labels(f"ring_{name}") for name in names]
+        result_stats = {name: metrics.for_monitor(name) for name in names}
+    finished = set()
+    try:
+        for process in monitors + [acquisition]:
+            process.start()
+        while len(finished) < len(names):
+            try:
+                kind, name, first, second = results.get(timeout=RESULT_POLL_S)
+            except queue.Empty:
+                failed = [p.name for p in monitors + [acquisition] if p.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError(f"Worker process(es) failed: {', '.join(failed)}")
+                continue
+            if kind == "alert":
+                message, alert_level, alert_description, rules = second
+                summary[name]["alerts"] += 1
+                if verbose:
+                    print(f"[{name}] Time: {first:0.2f}s | {message}")
+                written = 0
+                if serial_logger is not None and serial_logger.is_active():
+                    written = serial_logger.log_alert(message)
+                if alert_store is not None:
+                    alert_store.record(name, first, alert_level, alert_description, rules)
+                if metrics is not None:
+                    result_stats[name].record_result(alert_level, rules)
+                    metrics.serial_bytes.inc(written)
+            elif kind == "sketches":
+                sketches.merge(type(sketches).from_bytes(first))
+            else:
+                summary[name]["ticks"], summary[name]["dropped"] = first, second
+                if kind == "done":
+                    finished.add(name)
+                if metrics is not None:
+                    tick_counters[name].value = first # Workers report their running total
+                    for consumer, gauge in enumerate(backlog_gauges):
+                        gauge.set(ring.backlog(consumer))
+    finally:
+        for process in monitors + [acquisition]:
+            if len(finished) < len(names) and process.is_alive():
+                process.terminate() # Stopped early (error or Ctrl+C)
+            process.join()
+        ring.close()
+        ring.unlink()
+    return summary
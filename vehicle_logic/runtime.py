@@ -0,0 +1,140 @@
+# runtime.py
+
+import importlib
+import time
+
+from Simulation_Config import SIMULATION_DURATION_S, CAN_SAMPLE_INTERVAL_S
+
+# --- Monitor Registry ---
+# Monitor name -> (module, pipeline class). Modules are imported only when the
+# monitor is selected, so running one monitor never loads the others' dependencies.
+MONITOR_PIPELINES = {
+    "braking": ("Critical_Health_Monitoring.simulation_runner", "BrakingHealthPipeline"),
+    "stability": ("High_Speed_Monitoring.Simulation_Runner", "StabilityPipeline"),
+    "alertness": ("Driver_Alertness_Module.Alertness_Runner", "AlertnessPipeline"),
+}
+ALL_MONITORS = "all"
+# Monitors that keep signal history and accept feature_mode="window" | "ewm" (see ewm_statistics.py)
+WINDOWED_MONITORS = ("stability", "alertness")
+
+
+def resolve_monitor_names(selection):
+    """Expands "all" (or a list containing it) into every registered monitor name."""
+    names = [selection] if isinstance(selection, str) else list(selection)
+    if ALL_MONITORS in names:
+        return list(MONITOR_PIPELINES)
+    unknown = [name for name in names if name not in MONITOR_PIPELINES]
+    if unknown:
+        raise ValueError(f"Unknown monitor(s): {', '.join(unknown)}")
+    return names
+
+
+def create_pipeline(name, **kwargs):
+    """Imports the monitor's runner module and creates its per-tick pipeline."""
+    module_name, class_name = MONITOR_PIPELINES[name]
+    return getattr(importlib.import_module(module_name), class_name)(**kwargs)
+
+
+def pipeline_options(name, feature_mode="window"):
+    """Returns the create_pipeline() keyword arguments for a feature mode (only windowed monitors take one)."""
+    return {"feature_mode": feature_mode} if name in WINDOWED_MONITORS else {}
+
+
+# --- Combined Monitor Loop ---
+def run_monitors(pipelines, clock, duration_s=SIMULATION_DURATION_S, sample_interval_s=CAN_SAMPLE_INTERVAL_S,
+                 serial_logger=None, verbose=True, metrics=None, alert_store=None, sketches=None, start_time=0.0,
+                 checkpointer=None):
+    """
+    Drives one or more monitor pipelines from a single loop.
+
+    Each tick every pipeline reads its signals, applies its rules, optionally prints
+    its status and sends its alert to the serial logger. The clock paces the loop:
+    a real-time clock waits for each tick, a virtual clock runs as fast as possible.
+
+    Args:
+        pipelines (list): Pipelines created with create_pipeline().
+        clock: Simulation_Clock clock.
+        duration_s (float): Total simulated time in seconds.
+        sample_interval_s (float): Time between CAN samples in seconds.
+        serial_logger (SerialLogger): Alert output (None = no serial output).
+        verbose (bool): Print the per-tick status of every pipeline.
+        metrics (MonitorMetrics): Metrics to update every tick (None = not instrumented).
+        alert_store (AlertStore): Alert history to record non-normal results in (None = not stored).
+        sketches (FeatureSketches): Quantile sketches to add each pipeline's sketch_features to (None = off).
+        start_time (float): Simulation time of the first tick (a warm restart resumes after its checkpoint).
+        checkpointer (Checkpointer): Periodic state snapshots (None = no checkpoints).
+
+    Returns:
+        int: number of ticks processed.
+    """
+    if metrics is not None:
+        return _run_instrumented(pipelines, clock, duration_s, sample_interval_s, serial_logger, verbose, metrics,
+                                 alert_store, sketches, start_time, checkpointer)
+    ticks = 0
+    current_sim_time = start_time
+    while current_sim_time < duration_s:
+        clock.wait_until(current_sim_time - start_time)
+        for pipeline in pipelines:
+            signals = pipeline.read_signals(current_sim_time)
+            alert_level, alert_description = pipeline.process(current_sim_time, signals)
+            if sketches is not None:
+                sketches.update(pipeline)
+            if verbose:
+                pipeline.print_status(current_sim_time, signals, alert_level, alert_description)
+            if serial_logger is not None and serial_logger.is_active():
+                message = pipeline.alert_message(alert_level, alert_description)
+                if message:
+                    serial_logger.log_alert(message)
+            if alert_store is not None and alert_level != pipeline.normal_level:
+                alert_store.record(pipeline.name, current_sim_time, alert_level, alert_description,
+                                   pipeline.triggered_rules())
+        if checkpointer is not None:
+            checkpointer.maybe_checkpoint(pipelines, current_sim_time)
+        ticks += 1
+        current_sim_time = start_time + ticks * sample_interval_s # Multiply instead of accumulate to avoid drift
+    return ticks
+
+
+def _run_instrumented(pipelines, clock, duration_s, sample_interval_s, serial_logger, verbose, metrics, alert_store,
+                      sketches, start_time, checkpointer):
+    """Same loop as run_monitors(), timing each stage and counting results."""
+    stage_metrics = [metrics.for_monitor(pipeline.name) for pipeline in pipelines]
+    pending_ticks = metrics.queue_depth.labels("pending_ticks")
+    perf_counter = time.perf_counter
+    ticks = 0
+    current_sim_time = start_time
+    while current_sim_time < duration_s:
+        clock.wait_until(current_sim_time - start_time)
+        pending_ticks.set(max(0, int((clock.now() - ticks * sample_interval_s) / sample_interval_s))) # Ticks we are behind
+        for pipeline, stage in zip(pipelines, stage_metrics):
+            start = perf_counter()
+            signals = pipeline.read_signals(current_sim_time)
+            read_done = perf_counter()
+            alert_level, alert_description = pipeline.process(current_sim_time, signals)
+            process_done = perf_counter()
+            if sketches is not None:
+                sketches.update(pipeline)
+            if verbose:
+                pipeline.print_status(current_sim_time, signals, alert_level, alert_description)
+            if serial_logger is not None and serial_logger.is_active():
+                message = pipeline.alert_message(alert_level, alert_description)
+                if message:
+                    metrics.serial_bytes.inc(serial_logger.log_alert(message))
+            output_done = perf_counter()
+
+            stage.read_latency.observe(read_done - start)
+            stage.process_latency.observe(process_done - read_done)
+            stage.output_latency.observe(output_done - process_done)
+            stage.ticks.inc()
+            if alert_level != pipeline.normal_level:
+                triggered_rules = pipeline.triggered_rules()
+                stage.record_result(alert_level, triggered_rules)
+                if alert_store is not None:
+                    alert_store.record(pipeline.name, current_sim_time, alert_level, alert_description, triggered_rules)
+            else:
+                stage.record_result(alert_level)
+        if checkpointer is not None:
+            checkpointer.maybe_checkpoint(pipelines, current_sim_time)
+        ticks += 1
+        current_sim_time = start_time + ticks * sample_interval_s
+    return ticks
@@ -0,0 +1,217 @@
+# shm_ring.py
+#
+# Single-producer / multi-consumer ring buffer of decoded samples in
+# multiprocessing.shared_memory. The producer publishes rows by advancing a
+# sequence counter; each consumer publishes how far it has read. Every counter
+# has exactly one writer, but Python has no memory fences, so counters are
+# read and written under a shared lock: its acquire/release orders the row
+# writes before the counter that publishes them (the rows themselves are
+# written and read without it).
+
+import collections.abc
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+DEFAULT_CAPACITY = 4096 # Rows (samples) held in the ring
+POLL_INTERVAL_S = 0.0005 # Sleep between polls when there is nothing to read / no room to write
+
+# --- Header Layout (int64 slots) ---
+_WRITE_SEQ = 0  # Number of rows published so far
+_CLOSED = 1     # Set to 1 by the producer once it will publish nothing more
+_READ_SEQ = 2   # First of the per-consumer "rows consumed so far" slots
+
+
+class SharedRingBuffer:
+    """
+    Fixed-size ring of float64 rows: [timestamp, field_0, field_1, ...].
+
+    Row n of the stream lives in slot n % capacity. The producer writes a row and
+    only then advances the write sequence, so a consumer never sees a row that is
+    still being written. The producer does not overwrite rows a consumer has not
+    read yet (unless created with overwrite=True, in which case a slow consumer
+    skips ahead and counts the rows it lost, and read() copies rows out and
+    re-checks them because their slots may be reused at any moment).
+
+    Create it once in the parent with SharedRingBuffer.create() and open it in
+    other processes with SharedRingBuffer.attach(name, ...).
+    """
+    def __init__(self, shm, capacity, fields, consumers, overwrite, owner, lock):
+        self.shm = shm
+        self.name = shm.name
+        self.capacity = capacity
+        self.fields = list(fields)
+        self.consumers = consumers
+        self.overwrite = overwrite
+        self._owner = owner
+        self._lock = lock
+        header_slots = _READ_SEQ + consumers
+        self._header = np.ndarray((header_slots,), dtype=np.int64, buffer=shm.buf)
+        self._rows = np.ndarray((capacity, 1 + len(self.fields)), dtype=np.float64,
+                                buffer=shm.buf, offset=header_slots * 8)
+
+    @staticmethod
+    def _size(capacity, fields, consumers):
+        return 8 * (_READ_SEQ + consumers + capacity * (1 + len(fields)))
+
+    @classmethod
+    def create(cls, fields, consumers, capacity=DEFAULT_CAPACITY, overwrite=False, context=None):
+        """
+        Allocates a new ring (call unlink() on it once every process is done).
+
+        Args:
+            context: multiprocessing context the consumer processes are started with (None = default).
+        """
+        shm = shared_memory.SharedMemory(create=True, size=cls._size(capacity, fields, consumers))
+        ring = cls(shm, capacity, fields, consumers, overwrite, owner=True, lock=(context or multiprocessing).Lock())
+        ring._header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, fields, consumers, capacity, overwrite, lock):
+        """Opens a ring created by another process (pass the arguments from attach_args())."""
+        return cls(shared_memory.SharedMemory(name=name), capacity, fields, consumers, overwrite, owner=False, lock=lock)
+
+    def attach_args(self):
+        """Arguments that let another process attach() to this ring (pass them as Process args)."""
+        return (self.name, self.fields, self.consumers, self.capacity, self.overwrite, self._lock)
+
+    # --- Counters (always under the lock) ---
+    def _get(self, slot):
+        with self._lock:
+            return int(self._header[slot])
+
+    def _set(self, slot, value):
+        with self._lock:
+            self._header[slot] = value
+
+    # --- Producer Side ---
+    def write(self, timestamp, values):
+        """
+        Publishes one row.
+
+        Args:
+            timestamp (float): Sample time in seconds.
+            values (sequence): One value per field, in field order.
+        """
+        seq = int(self._header[_WRITE_SEQ]) # Only the producer writes it
+        if not self.overwrite:
+            # Wait until the slowest consumer has read the row this one replaces
+            while seq - self._slowest_read_seq() >= self.capacity:
+                time.sleep(POLL_INTERVAL_S)
+        row = self._rows[seq % self.capacity]
+        row[0] = timestamp
+        row[1:] = values
+        self._set(_WRITE_SEQ, seq + 1) # Publish only after the row is complete
+
+    def _slowest_read_seq(self):
+        with self._lock:
+            return int(self._header[_READ_SEQ:].min())
+
+    def close_writer(self):
+        """Tells the consumers that no more rows will be published."""
+        self._set(_CLOSED, 1)
+
+    # --- Consumer Side ---
+    def write_seq(self):
+        return self._get(_WRITE_SEQ)
+
+    def writer_closed(self):
+        return bool(self._get(_CLOSED))
+
+    def read(self, consumer, seq, max_rows=None):
+        """
+        Returns the rows published since seq, without copying them out of shared memory
+        (with overwrite=True they are copied, then rows the producer reused meanwhile are dropped).
+
+        Args:
+            consumer (int): This consumer's index (0 .. consumers-1).
+            seq (int): Sequence number of the next row this consumer wants.
+            max_rows (int): Upper bound on rows returned (None = everything available).
+
+        Returns:
+            tuple: (segments, next_seq, dropped). segments is a list of (rows, columns)
+                   array views in stream order (two views when the range wraps).
+                   Call release(consumer, next_seq) once they are processed.
+                   dropped counts rows overwritten before they could be read.
+        """
+        end = self.write_seq()
+        dropped = 0
+        if end - seq > self.capacity: # Only possible with overwrite=True
+            dropped = end - self.capacity - seq
+            seq = end - self.capacity
+        if max_rows is not None:
+            end = min(end, seq + max_rows)
+        segments = []
+        position = seq
+        while position < end:
+            slot = position % self.capacity
+            count = min(end - position, self.capacity - slot)
+            segments.append(self._rows[slot:slot + count])
+            position += count
+        if self.overwrite and segments:
+            segments = [segment.copy() for segment in segments]
+            torn = self.overwritten_since(seq) # Checked after the copy: these rows may have changed during it
+            dropped += torn
+            while torn and segments:
+                if torn >= len(segments[0]):
+                    torn -= len(segments.pop(0))
+                else:
+                    segments[0] = segments[0][torn:]
+                    torn = 0
+        return segments, end, dropped
+
+    def overwritten_since(self, seq):
+        """
+        Rows from seq onward that the producer has reused or may be reusing right now
+        (0 unless overwrite=True). The row in slot write_seq % capacity counts: the
+        producer writes it before it advances write_seq.
+        """
+        if not self.overwrite:
+            return 0
+        return max(0, self.write_seq() - self.capacity + 1 - seq)
+
+    def backlog(self, consumer):
+        """Rows published but not yet released by a consumer."""
+        with self._lock:
+            return int(self._header[_WRITE_SEQ]) - int(self._header[_READ_SEQ + consumer])
+
+    def release(self, consumer, seq):
+        """Marks every row before seq as consumed, letting the producer reuse the slots."""
+        self._set(_READ_SEQ + consumer, seq)
+
+    def close(self):
+        """Detaches this process from the ring (views into it must not be used afterwards)."""
+        self._header = self._rows = None
+        self.shm.close()
+
+    def unlink(self):
+        """Frees the shared memory (owner only, after every process has closed it)."""
+        if self._owner:
+            self.shm.unlink()
+
+
+class RowSignals(collections.abc.Mapping):
+    """
+    Read-only signal dict over one ring row (field name -> value), for pipelines
+    that take a signals dict. Values are read from a memoryview of the rows, so
+    nothing is copied out of shared memory and only the signals a monitor looks
+    up are converted to Python floats. Point it at a row with `rows` and `row`.
+    """
+    __slots__ = ("rows", "row", "_index")
+
+    def __init__(self, fields):
+        self._index = {name: column for column, name in enumerate(fields, start=1)} # Column 0 is the timestamp
+        self.rows = None # memoryview of a (rows, 1 + fields) float64 block
+        self.row = 0
+
+    def __getitem__(self, name):
+        return self.rows[self.row, self._index[name]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
@@ -0,0 +1,192 @@
+# soak.py
+#
+# Long-run soak test: runs monitor pipelines for a long virtual duration (e.g. 72 h
+# at 100 Hz) and checks that memory and per-tick latency stay flat.
+
+import collections
+import os
+import time
+
+from Simulation_Config import WINDOW_DURATION_S
+from .runtime import MONITOR_PIPELINES, ALL_MONITORS, resolve_monitor_names, create_pipeline
+
+# --- Soak Defaults ---
+DEFAULT_SAMPLE_PERIOD_S = 600        # Virtual seconds between memory/latency samples
+DEFAULT_MEMORY_TOLERANCE = 0.10      # Allowed relative growth of memory after warm-up
+DEFAULT_MEMORY_SLACK_BYTES = 1 << 20 # Growth below this is never a failure (allocator noise)
+DEFAULT_LATENCY_TOLERANCE = 0.50     # Allowed relative growth of p99 tick latency
+BASELINE_SAMPLES = 3                 # Samples averaged (median) for baseline and final values
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text):
+    """Parses "90", "90s", "15m", "72h" or "7d" into seconds."""
+    text = str(text).strip()
+    if text and text[-1] in DURATION_UNITS:
+        return float(text[:-1]) * DURATION_UNITS[text[-1]]
+    return float(text)
+
+
+def current_rss_bytes():
+    """Returns the resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def window_sample_count(pipeline):
+    """Total number of samples held in a pipeline's rolling windows."""
+    return sum(len(value) for value in vars(pipeline).values() if isinstance(value, collections.deque))
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def _median(values):
+    ordered = sorted(values)
+    return ordered[len(ordered) // 2] if ordered else 0
+
+
+# --- Soak Loop ---
+def run_soak(monitor_names, duration_s, sample_interval_s, sample_period_s=DEFAULT_SAMPLE_PERIOD_S,
+             warmup_s=2 * WINDOW_DURATION_S, memory_tolerance=DEFAULT_MEMORY_TOLERANCE,
+             memory_slack_bytes=DEFAULT_MEMORY_SLACK_BYTES, latency_tolerance=DEFAULT_LATENCY_TOLERANCE,
+             use_tracemalloc=True, verbose=True):
+    """
+    Runs the selected pipelines in virtual time and samples memory and tick latency.
+
+    Every sample_period_s of virtual time a sample is recorded with tracemalloc
+    current memory, process RSS, the samples held in rolling windows and the
+    p50/p99 latency of the ticks since the previous sample. Samples taken during
+    warm-up (windows still filling) are reported but not used for the verdict.
+
+    Returns:
+        dict: report with settings, samples, baseline/final values and "passed".
+    """
+    import tracemalloc # Imported here so the CLI parser does not pay for it at startup
+
+    pipelines = [create_pipeline(name) for name in resolve_monitor_names(monitor_names)]
+    if use_tracemalloc:
+        tracemalloc.start()
+
+    samples = []
+    tick_latencies_ns = []
+    ticks = 0
+    current_sim_time = 0.0
+    next_sample_time = sample_period_s
+    wall_start = time.perf_counter()
+    try:
+        while current_sim_time < duration_s:
+            tick_start = time.perf_counter_ns()
+            for pipeline in pipelines:
+                pipeline.process(current_sim_time, pipeline.read_signals(current_sim_time))
+            tick_latencies_ns.append(time.perf_counter_ns() - tick_start)
+            ticks += 1
+            current_sim_time = ticks * sample_interval_s
+
+            if current_sim_time >= next_sample_time or current_sim_time >= duration_s:
+                tick_latencies_ns.sort()
+                sample = {
+                    "sim_time_s": current_sim_time,
+                    "ticks": ticks,
+                    "tracemalloc_bytes": tracemalloc.get_traced_memory()[0] if use_tracemalloc else None,
+                    "rss_bytes": current_rss_bytes(),
+                    "window_samples": sum(window_sample_count(p) for p in pipelines),
+                    "latency_p50_us": _percentile(tick_latencies_ns, 0.50) / 1000.0,
+                    "latency_p99_us": _percentile(tick_latencies_ns, 0.99) / 1000.0,
+                }
+                samples.append(sample)
+                tick_latencies_ns = []
+                next_sample_time += sample_period_s
+                if verbose:
+                    memory = sample["tracemalloc_bytes"] if use_tracemalloc else sample["rss_bytes"]
+                    print(f"Soak t={current_sim_time / 3600.0:7.2f}h | ticks={ticks} | memory={memory / 1024:9.1f} KiB | "
+                          f"windows={sample['window_samples']} pts | p99={sample['latency_p99_us']:8.1f} us")
+    finally:
+        if use_tracemalloc:
+            tracemalloc.stop()
+
+    report = {
+        "settings": {
+            "monitors": [p.name for p in pipelines], "duration_s": duration_s,
+            "sample_interval_s": sample_interval_s, "sample_period_s": sample_period_s, "warmup_s": warmup_s,
+            "memory_tolerance": memory_tolerance, "memory_slack_bytes": memory_slack_bytes,
+            "latency_tolerance": latency_tolerance, "tracemalloc": use_tracemalloc,
+        },
+        "ticks": ticks,
+        "wall_time_s": time.perf_counter() - wall_start,
+        "samples": samples,
+    }
+    report.update(check_drift(samples, warmup_s, memory_tolerance, memory_slack_bytes, latency_tolerance))
+    return report
+
+
+def check_drift(samples, warmup_s, memory_tolerance, memory_slack_bytes, latency_tolerance):
+    """
+    Compares the first post-warm-up samples with the last ones.
+
+    Returns:
+        dict: "baseline", "final", "failures" (list of messages) and "passed".
+    """
+    steady = [s for s in samples if s["sim_time_s"] > warmup_s]
+    if len(steady) < 2 * BASELINE_SAMPLES:
+        return {"baseline": None, "final": None, "passed": None,
+                "failures": ["Not enough post-warm-up samples to judge drift (run longer or sample more often)."]}
+
+    metrics = ["rss_bytes", "window_samples", "latency_p99_us"]
+    if steady[0]["tracemalloc_bytes"] is not None:
+        metrics.insert(0, "tracemalloc_bytes")
+    baseline = {m: _median([s[m] for s in steady[:BASELINE_SAMPLES]]) for m in metrics}
+    final = {m: _median([s[m] for s in steady[-BASELINE_SAMPLES:]]) for m in metrics}
+
+    failures = []
+    for metric in ("tracemalloc_bytes", "rss_bytes"):
+        if metric in baseline:
+            growth = final[metric] - baseline[metric]
+            if growth > memory_slack_bytes and growth > baseline[metric] * memory_tolerance:
+                failures.append(f"{metric} grew from {baseline[metric]} to {final[metric]} bytes")
+    if final["window_samples"] > baseline["window_samples"] * (1 + memory_tolerance) + 1:
+        failures.append(f"rolling windows grew from {baseline['window_samples']} to {final['window_samples']} samples")
+    if final["latency_p99_us"] > baseline["latency_p99_us"] * (1 + latency_tolerance):
+        failures.append(f"p99 tick latency grew from {baseline['latency_p99_us']:.1f} to {final['latency_p99_us']:.1f} us")
+    return {"baseline": baseline, "final": final, "failures": failures, "passed": not failures}
+
+
+# --- Command Line ---
+def add_arguments(parser):
+    parser.add_argument("--monitor", default=ALL_MONITORS, choices=list(MONITOR_PIPELINES) + [ALL_MONITORS],
+                        help="Monitor pipeline(s) to run")
+    parser.add_argument("--duration", default="72h", help="Virtual duration, e.g. 3600, 15m, 72h, 7d")
+    parser.add_argument("--rate", type=float, default=100.0, help="Samples per second per monitor")
+    parser.add_argument("--sample-every", default="10m", help="Virtual time between memory/latency samples")
+    parser.add_argument("--warmup", default=str(2 * WINDOW_DURATION_S), help="Virtual warm-up ignored by the verdict")
+    parser.add_argument("--memory-tolerance", type=float, default=DEFAULT_MEMORY_TOLERANCE)
+    parser.add_argument("--latency-tolerance", type=float, default=DEFAULT_LATENCY_TOLERANCE)
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Only sample RSS (lower overhead)")
+    parser.add_argument("--output", default=None, help="Write the JSON report to this path")
+    parser.add_argument("--quiet", action="store_true", help="Do not print each sample")
+
+
+def soak_command(args):
+    report = run_soak(
+        args.monitor, parse_duration(args.duration), 1.0 / args.rate,
+        sample_period_s=parse_duration(args.sample_every), warmup_s=parse_duration(args.warmup),
+        memory_tolerance=args.memory_tolerance, latency_tolerance=args.latency_tolerance,
+        use_tracemalloc=not args.no_tracemalloc, verbose=not args.quiet,
+    )
+    if args.output:
+        import json
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(f"--- Soak {'PASSED' if report['passed'] else 'FAILED'}: {report['ticks']} ticks "
+          f"in {report['wall_time_s']:.1f}s ---")
+    for failure in report["failures"]:
+        print(f"  {failure}")
+    return 0 if report["passed"] else 1